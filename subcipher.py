@@ -1,32 +1,186 @@
 import argparse
+import sys
 from pathlib import Path
-from subcipher.analysis import get_bigrams, transition_matrix
 from subcipher.cipher import substitute_decrypt
-from subcipher.utils import load_textfile, normalize_text, save_textfile, log_to_percentage
-from subcipher.mh_solver import metropolis_hastings
+from subcipher.utils import DEFAULT_PROFILE, NORMALIZATION_PROFILES, load_textfile, save_textfile, log_to_percentage
+from subcipher.mh_solver import SolverResult, solve
+from subcipher.checkpoint import DEFAULT_CHECKPOINT_INTERVAL
+from subcipher.initialization import INITIALIZERS
+from subcipher.schedules import SCHEDULES
+from subcipher.tempering import solve_tempering
+from subcipher.parallel import solve_parallel
+from subcipher.pool import CiphertextPool
+from subcipher.posterior import DEFAULT_CONFIDENCE, KeyPosterior
+from subcipher.largefile import decrypt_file
+from subcipher.batch import run_batch
+from subcipher.reference import load_language_model
+from subcipher.scoring import LanguageModel
+from subcipher.selection import ModelSelector
+from subcipher.server import main as serve
+from subcipher.modelfile import main as build_model
+from subcipher.ngram import MAX_ORDER, MIN_ORDER
 from subcipher.constants import ALPHABET
 
 
 def main():
-    parser = argparse.ArgumentParser(description='SubCipher - Substitution Cipher Analysis Tool')
+    if sys.argv[1:2] == ['serve']:
+        serve(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ['build-model']:
+        build_model(sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(description='SubCipher - Substitution Cipher Analysis Tool',
+                                     epilog='Run "subcipher.py serve --help" for the solver service and '
+                                            '"subcipher.py build-model --help" for building model files.')
     parser.add_argument('--input', '-i', type=str, help='Path to encrypted file')
-    parser.add_argument('--reference', '-r', type=str,
-                        default="data_samples/krakatit.txt",
-                        help='Path to reference file for bigram matrix creation')
+    parser.add_argument('--reference', '-r', type=str, nargs='+',
+                        default=["data_samples/krakatit.txt"],
+                        help='Path to reference file for bigram matrix creation, or to a model file '
+                             'built by the build-model command. With several references the model matching '
+                             'the ciphertext best is chosen by a quick pre-pass')
+    parser.add_argument('--mix', action='store_true',
+                        help='Interpolate several references with weights fitted to the ciphertext instead of '
+                             'choosing the best one')
+    parser.add_argument('--ngram', '-n', type=int, default=2, choices=range(MIN_ORDER, MAX_ORDER + 1),
+                        help='Order of the n-gram language model built from the reference file')
+    parser.add_argument('--profile', type=str, default=None, choices=list(NORMALIZATION_PROFILES),
+                        help='Language profile of the reference text normalization: Czech, Slovak, German, or '
+                             f'generic removal of diacritics by Unicode decomposition (default: {DEFAULT_PROFILE}, '
+                             'or the profile stored in a model file)')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                        help='Directory for cached reference matrices (default: ~/.cache/subcipher)')
+    parser.add_argument('--rebuild-reference', action='store_true',
+                        help='Rebuild the reference matrices even if they are cached')
+    parser.add_argument('--large', action='store_true',
+                        help='Memory-map the --input file instead of loading it, and stream the plaintext to the '
+                             'output file without printing it')
     parser.add_argument('--all', '-a', action='store_true',
                         help='Process all sample files in data_samples/encrypted')
+    parser.add_argument('--joint', '-j', type=str, nargs='+', default=None, metavar='FILE',
+                        help='Paths to encrypted files sharing one key, which are solved jointly')
+    parser.add_argument('--restarts', type=int, default=1,
+                        help='Number of independent solver chains per file; the best key is kept')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes for the chains or files (default: number of CPU cores)')
+    parser.add_argument('--iterations', type=int, default=20000,
+                        help='Maximum number of solver iterations per chain')
+    parser.add_argument('--patience', type=int, default=None,
+                        help='Stop a chain when its best score has not improved for this many iterations')
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help='Stop a chain after this many seconds')
+    parser.add_argument('--schedule', type=str, default='linear', choices=list(SCHEDULES),
+                        help='Temperature schedule of the solver')
+    parser.add_argument('--init', type=str, default='random', choices=list(INITIALIZERS),
+                        help='Initial key of every chain: random, frequency rank matching, or frequency '
+                             'matching refined by greedy swaps')
+    parser.add_argument('--replicas', type=int, default=1,
+                        help='Run parallel tempering with this many replicas per chain instead of annealing; '
+                             '--iterations then counts rounds of one proposal per replica')
+    parser.add_argument('--summary', type=str, default=None,
+                        help='Path of the JSONL summary written by --all (default: output/summary.jsonl)')
+    parser.add_argument('--report', type=str, default=None,
+                        help='Instrument the solver and write the run report of the best chain to this file '
+                             '(JSON, or the score trace as CSV if the name ends with .csv)')
+    parser.add_argument('--checkpoint', type=str, default=None,
+                        help='Save the solver state to this file periodically; if it exists, the run continues '
+                             'where the saved one stopped')
+    parser.add_argument('--checkpoint-interval', type=int, default=DEFAULT_CHECKPOINT_INTERVAL,
+                        help='Number of iterations between two checkpoints')
+    parser.add_argument('--sample-after', type=int, default=None, metavar='ITERATIONS',
+                        help='Collect the mapping frequencies of every symbol after this many burn-in iterations, '
+                             'report the confidence of every letter and save them as JSON; use with '
+                             '--schedule constant or --replicas to sample at a fixed temperature')
+    parser.add_argument('--confidence', type=float, default=DEFAULT_CONFIDENCE,
+                        help='Lowest confidence of a letter shown in the partial decryption of --sample-after')
 
     args = parser.parse_args()
+    if args.report and args.all:
+        parser.error("--report cannot be used with --all")
+    if args.report and args.replicas > 1:
+        parser.error("--report is not supported with parallel tempering")
+    if args.checkpoint and (args.all or args.restarts > 1 or args.replicas > 1):
+        parser.error("--checkpoint supports a single annealing chain only, without --all, --restarts or --replicas")
+    if args.sample_after is not None and args.all:
+        parser.error("--sample-after cannot be used with --all")
+    if args.all and len(args.reference) > 1:
+        parser.error("several references cannot be used with --all")
 
     # Load and prepare reference text
     try:
-        reference_text = load_textfile(args.reference)
-        normalized_ref = normalize_text(reference_text)
-        bigrams = get_bigrams(normalized_ref)
-        bigram_matrix = transition_matrix(bigrams, ALPHABET)
+        models = {reference: load_language_model(reference, args.ngram, ALPHABET, cache_dir=args.cache_dir,
+                                                 rebuild=args.rebuild_reference, profile=args.profile)
+                  for reference in args.reference}
     except Exception as e:
         print(f"Error preparing reference data: {str(e)}")
         return
+    selector = ModelSelector(models)
+    bigram_matrix = models[args.reference[0]]
+
+    solver_options = {'iterations': args.iterations, 'patience': args.patience, 'time_budget': args.time_budget,
+                      'init': args.init}
+    if args.sample_after is not None:
+        solver_options['sample_after'] = args.sample_after
+    if args.replicas > 1:
+        solver = solve_tempering
+        solver_options['replicas'] = args.replicas
+    else:
+        solver = solve
+        solver_options['schedule'] = args.schedule
+        if args.report:
+            solver_options['instrument'] = True
+        if args.checkpoint:
+            solver_options['checkpoint'] = args.checkpoint
+            solver_options['checkpoint_interval'] = args.checkpoint_interval
+
+    def save_report(result: SolverResult) -> None:
+        if not args.report:
+            return
+        if args.report.endswith('.csv'):
+            result.report.save_csv(args.report)
+        else:
+            result.report.save_json(args.report)
+        print(f"Run report saved to {args.report}")
+
+    def report_posterior(posterior: KeyPosterior | None, key: str, path: Path) -> None:
+        if posterior is None:
+            return
+        confidence = posterior.letter_confidence(key)
+        print(f"Letter confidence over {posterior.samples} samples: "
+              + " ".join(f"{letter}={value:.2f}" for letter, value in confidence.items()))
+        print(f"Ambiguous letters: {posterior.ambiguous_letters(key, args.confidence) or 'none'}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        posterior.save_json(path, key)
+        print(f"Posterior saved to {path}")
+
+    def choose_model(ciphertext: str | CiphertextPool) -> LanguageModel:
+        if len(models) == 1:
+            return bigram_matrix
+        ranking = selector.rank(ciphertext)
+        for score in ranking:
+            print(f"Reference {score.name}: {score.bigram:.4f} per bigram, {score.unigram:.4f} per symbol")
+        if args.mix:
+            weights = selector.mixture_weights(ciphertext, ranking=ranking)
+            print("Mixing references: " + ", ".join(f"{name} {weight:.2f}" for name, weight in weights.items()))
+            return selector.mixture(weights)
+        print(f"Using reference {ranking[0].name}")
+        return models[ranking[0].name]
+
+    def solve_ciphertext(ciphertext: str | CiphertextPool) -> tuple[str, float, KeyPosterior | None]:
+        model = choose_model(ciphertext)
+        if args.restarts > 1:
+            best_key, best_score, chains = solve_parallel(ciphertext, model, restarts=args.restarts,
+                                                          workers=args.workers, solver=solver, **solver_options)
+            for chain in chains:
+                print(f"Chain seed {chain.seed}: score {chain.score:.4f} after {chain.iterations} iterations "
+                      f"in {chain.elapsed:.2f}s ({chain.stop_reason})")
+            best_chain = max(chains, key=lambda chain: chain.score)
+            save_report(best_chain)
+            return best_key, best_score, best_chain.posterior
+        result = solver(ciphertext, model, **solver_options)
+        print(f"\nStopped after {result.iterations} iterations in {result.elapsed:.2f}s ({result.stop_reason})")
+        save_report(result)
+        return result.key, result.score, result.posterior
 
     if args.all:
         encrypted_dir = Path("data_samples/encrypted")
@@ -34,30 +188,44 @@ def main():
             print(f"Directory {encrypted_dir} does not exist!")
             return
 
-        for file in encrypted_dir.glob("text_*_sample_*_ciphertext.txt"):
-            print(f"\nProcessing file: {file.name}")
-            try:
-                ciphertext = load_textfile(str(file))
-                best_key, best_score = metropolis_hastings(ciphertext, bigram_matrix)
-                plaintext = substitute_decrypt(ciphertext, best_key)
-
-                output_dir = Path("output")
-                save_textfile(plaintext, output_dir / f"{file.stem}_plaintext.txt")
-                save_textfile(best_key, output_dir / f"{file.stem}_key.txt")
-
-                print(f"Successfully decrypted:")
-                print(f"Key: {best_key}")
-                print(f"Score: {log_to_percentage(best_score):.2f}%")
-                print(f"Text (first 100 characters):")
-                print(plaintext[:100] + "..." if len(plaintext) > 100 else plaintext)
-            except Exception as e:
-                print(f"Error processing file {file.name}: {str(e)}")
+        files = sorted(encrypted_dir.glob("text_*_sample_*_ciphertext.txt"))
+        results = run_batch(files, bigram_matrix, Path("output"), summary_path=args.summary,
+                            workers=args.workers, restarts=args.restarts, solver=solver, **solver_options)
+        for result in results:
+            file_name = Path(result.file).name
+            if result.error is not None:
+                print(f"\nError processing file {file_name}: {result.error}")
                 continue
 
+            print(f"\nSuccessfully decrypted {file_name} in {result.elapsed:.2f}s:")
+            print(f"Key: {result.key}")
+            print(f"Score: {log_to_percentage(result.score):.2f}%")
+            print(f"Text (first 100 characters):")
+            print(result.plaintext[:100] + "..." if len(result.plaintext) > 100 else result.plaintext)
+
+    elif args.input and args.large:
+        try:
+            pool = CiphertextPool()
+            pool.add_file(args.input)
+            best_key, best_score, posterior = solve_ciphertext(pool)
+
+            output_dir = Path("output")
+            input_file = Path(args.input)
+            plaintext_path = output_dir / f"{input_file.stem}_plaintext.txt"
+            written = decrypt_file(input_file, plaintext_path, best_key)
+            save_textfile(best_key, output_dir / f"{input_file.stem}_key.txt")
+
+            print(f"\nSuccessfully decrypted:")
+            print(f"Key: {best_key}")
+            print(f"Score: {log_to_percentage(best_score):.2f}%")
+            print(f"Decrypted text ({written} bytes) saved to {plaintext_path}")
+            report_posterior(posterior, best_key, output_dir / f"{input_file.stem}_posterior.json")
+        except Exception as e:
+            print(f"Error processing file: {str(e)}")
     elif args.input:
         try:
             ciphertext = load_textfile(args.input)
-            best_key, best_score = metropolis_hastings(ciphertext, bigram_matrix)
+            best_key, best_score, posterior = solve_ciphertext(ciphertext)
             plaintext = substitute_decrypt(ciphertext, best_key)
 
             output_dir = Path("output")
@@ -70,10 +238,33 @@ def main():
             print(f"Score: {log_to_percentage(best_score):.2f}%")
             print(f"Decrypted text:")
             print(plaintext)
+            report_posterior(posterior, best_key, output_dir / f"{input_file.stem}_posterior.json")
+            if posterior is not None:
+                print(f"Letters with confidence of at least {args.confidence:.2f}:")
+                print(posterior.partial_decrypt(ciphertext, best_key, args.confidence))
         except Exception as e:
             print(f"Error processing file: {str(e)}")
+    elif args.joint:
+        try:
+            pool = CiphertextPool(load_textfile(file) for file in args.joint)
+            best_key, best_score, posterior = solve_ciphertext(pool)
+
+            output_dir = Path("output")
+            save_textfile(best_key, output_dir / "joint_key.txt")
+
+            print(f"\nSuccessfully decrypted {len(pool)} messages with one key:")
+            print(f"Key: {best_key}")
+            print(f"Score: {log_to_percentage(best_score):.2f}%")
+            for file, ciphertext in zip(args.joint, pool.messages):
+                plaintext = substitute_decrypt(ciphertext, best_key)
+                save_textfile(plaintext, output_dir / f"{Path(file).stem}_plaintext.txt")
+                print(f"{Path(file).name}: {plaintext[:100] + '...' if len(plaintext) > 100 else plaintext}")
+            report_posterior(posterior, best_key, output_dir / "joint_posterior.json")
+        except Exception as e:
+            print(f"Error processing files: {str(e)}")
     else:
-        print("You must specify either --input for a single file or --all for processing all sample files")
+        print("You must specify either --input for a single file, --joint for files sharing one key "
+              "or --all for processing all sample files")
         parser.print_help()
 
 
@@ -1,9 +1,24 @@
-import math
+from functools import lru_cache
 
 import numpy as np
 
 from subcipher.constants import ALPHABET
 
+EPSILON = 1e-10
+UNKNOWN = 255  # Index assigned by `encode_text` to characters outside the alphabet
+
+
+class _TranslationTable(dict):
+    def __missing__(self, key: int) -> int:
+        return UNKNOWN
+
+
+@lru_cache(maxsize=None)
+def _translation_table(alphabet: str) -> _TranslationTable:
+    if len(alphabet) >= UNKNOWN:
+        raise ValueError(f"Alphabet must have fewer than {UNKNOWN} characters")
+    return _TranslationTable({ord(char): i for i, char in enumerate(alphabet)})
+
 
 def get_bigrams(text: str) -> list[str]:
     """
@@ -17,6 +32,102 @@ def get_bigrams(text: str) -> list[str]:
     return [text[i:i + 2] for i in range(len(text) - 1)]
 
 
+def encode_text(text: str, alphabet: str = ALPHABET, strict: bool = True) -> np.ndarray:
+    """
+    Encode a string into an array of indices into the given alphabet.
+
+    The whole text is mapped with a single cached `str.translate` table, so the cost is one
+    pass over the text regardless of its length.
+
+    :param text: The input string to encode.
+    :type text: str
+    :param alphabet: The alphabet whose character positions define the indices.
+    :type alphabet: str
+    :param strict: Whether characters outside the alphabet are rejected. When False they are
+        encoded as `UNKNOWN` and ignored by `bigram_counts`.
+    :type strict: bool
+    :return: A 1D uint8 numpy array of alphabet indices, one per character of `text`.
+    :rtype: np.ndarray
+    :raises ValueError: If `strict` is set and the text contains a character that is not part
+        of the alphabet.
+    """
+    translated = text.translate(_translation_table(alphabet))
+    encoded = np.frombuffer(translated.encode('latin-1'), dtype=np.uint8)
+
+    if strict:
+        unknown = np.flatnonzero(encoded == UNKNOWN)
+        if unknown.size:
+            raise ValueError(f"Character {text[unknown[0]]!r} is not part of the alphabet")
+
+    return encoded
+
+
+def bigram_counts(encoded: np.ndarray, size: int = len(ALPHABET)) -> np.ndarray:
+    """
+    Count the bigrams of an encoded text into a square matrix.
+
+    Bigrams containing an index outside of the alphabet (such as `UNKNOWN`) are skipped.
+
+    :param encoded: A 1D array of alphabet indices, as returned by `encode_text`.
+    :type encoded: np.ndarray
+    :param size: The size of the alphabet the indices refer to.
+    :type size: int
+    :return: A `size` x `size` integer matrix whose entry at row i and column j is the
+        number of times character i is directly followed by character j.
+    :rtype: np.ndarray
+    """
+    return pair_counts(encoded[:-1], encoded[1:], size)
+
+
+def pair_counts(first: np.ndarray, second: np.ndarray, size: int = len(ALPHABET)) -> np.ndarray:
+    """
+    Count pairs of encoded characters into a square matrix.
+
+    :param first: A 1D array with the index of the first character of each pair.
+    :type first: np.ndarray
+    :param second: A 1D array of the same length with the index of the second character.
+    :type second: np.ndarray
+    :param size: The size of the alphabet the indices refer to.
+    :type size: int
+    :return: A `size` x `size` integer matrix of pair counts.
+    :rtype: np.ndarray
+    """
+    first = np.asarray(first, dtype=np.int64)
+    second = np.asarray(second, dtype=np.int64)
+    valid = (first < size) & (second < size)
+    if not valid.all():
+        first, second = first[valid], second[valid]
+    return np.bincount(first * size + second, minlength=size * size).reshape(size, size)
+
+
+def normalize_counts(counts: np.ndarray) -> np.ndarray:
+    """
+    Turn a bigram count matrix into a transition matrix with add-one smoothing.
+
+    :param counts: A square matrix of bigram counts.
+    :type counts: np.ndarray
+    :return: A 2D numpy array of probabilities that sums to one.
+    :rtype: np.ndarray
+    """
+    matrix = counts + 1.0
+    return matrix / matrix.sum()
+
+
+def log_transition_matrix(tm_ref: np.ndarray) -> np.ndarray:
+    """
+    Convert a transition matrix into the log-probabilities used for scoring.
+
+    The same epsilon as in `calculate_plausibility` is added so that scores computed
+    from this matrix are identical to the ones computed from the text itself.
+
+    :param tm_ref: A 2D numpy array of transition probabilities.
+    :type tm_ref: np.ndarray
+    :return: A 2D numpy array of the same shape holding `log(tm_ref + epsilon)`.
+    :rtype: np.ndarray
+    """
+    return np.log(tm_ref + EPSILON)
+
+
 def transition_matrix(bigrams: list[str], alphabet: str) -> np.ndarray:
     """
     Compute the transition matrix for a given list of bigrams and an alphabet.
@@ -26,19 +137,40 @@ def transition_matrix(bigrams: list[str], alphabet: str) -> np.ndarray:
                      of characters defines the indices used in the resulting matrix.
     :return: A 2D numpy array representing the normalized transition matrix.
     """
-    n = len(alphabet)
-    index = {char: i for i, char in enumerate(alphabet)}
-    matrix = np.ones((n, n))
+    pairs = ''.join(bigram for bigram in bigrams if len(bigram) == 2)
+    encoded = encode_text(pairs, alphabet, strict=False)
+    return normalize_counts(pair_counts(encoded[0::2], encoded[1::2], len(alphabet)))
+
+
+def text_transition_matrix(text: str, alphabet: str = ALPHABET) -> np.ndarray:
+    """
+    Compute the transition matrix of a text without building its list of bigrams.
+
+    The result is identical to `transition_matrix(get_bigrams(text), alphabet)`.
+
+    :param text: The (normalized) text to build the matrix from.
+    :type text: str
+    :param alphabet: The alphabet defining the rows and columns of the matrix.
+    :type alphabet: str
+    :return: A 2D numpy array representing the normalized transition matrix.
+    :rtype: np.ndarray
+    """
+    return normalize_counts(bigram_counts(encode_text(text, alphabet, strict=False), len(alphabet)))
 
-    for bigram in bigrams:
-        if len(bigram) != 2:
-            continue
-        a, b = bigram
-        if a in index and b in index:
-            matrix[index[a]][index[b]] += 1
 
-    matrix = matrix / matrix.sum()
-    return matrix
+def encoded_plausibility(encoded: np.ndarray, log_tm: np.ndarray) -> float:
+    """
+    Calculate the logarithmic plausibility of an encoded text.
+
+    :param encoded: A 1D array of alphabet indices, as returned by `encode_text`.
+    :type encoded: np.ndarray
+    :param log_tm: Log-probabilities of the reference model, see `log_transition_matrix`.
+    :type log_tm: np.ndarray
+    :return: The sum of the log-probabilities of all bigrams of the text.
+    :rtype: float
+    """
+    return float(log_tm[encoded[:-1], encoded[1:]].sum())
+
 
 def calculate_plausibility(text: str, tm_ref: np.ndarray) -> float:
     """
@@ -58,15 +190,6 @@ def calculate_plausibility(text: str, tm_ref: np.ndarray) -> float:
     :type tm_ref: np.ndarray
     :return: The calculated logarithmic plausibility score of the input text.
     :rtype: float
+    :raises ValueError: If the text contains a character outside of `ALPHABET`.
     """
-    bigrams = get_bigrams(text)
-
-    log_plausibility = 0.0
-    epsilon = 1e-10
-
-    for bg in bigrams:
-        i, j = map(lambda x: ALPHABET.index(x), bg)
-        prob = tm_ref[i, j]
-        log_plausibility += math.log(prob + epsilon)
-
-    return log_plausibility
\ No newline at end of file
+    return encoded_plausibility(encode_text(text), log_transition_matrix(tm_ref))
@@ -0,0 +1,157 @@
+import json
+import os
+import time
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from subcipher.cipher import substitute_decrypt
+from subcipher.parallel import chain_seeds, solve_parallel
+from subcipher.scoring import LanguageModel
+from subcipher.utils import load_textfile, save_textfile
+
+_worker_tm_ref: LanguageModel | None = None
+
+
+@dataclass
+class BatchResult:
+    """
+    Outcome of decrypting one file in a batch.
+
+    :ivar file: Path of the ciphertext file.
+    :ivar key: Best key found, or None if the file failed.
+    :ivar score: Logarithmic plausibility of the best key, or None if the file failed.
+    :ivar iterations: Total number of solver iterations spent on the file, over all chains.
+    :ivar elapsed: Wall time spent on the file in seconds.
+    :ivar plaintext: Decrypted text; not part of the JSONL summary.
+    :ivar error: Error message if the file could not be processed.
+    """
+    file: str
+    key: str | None
+    score: float | None
+    iterations: int
+    elapsed: float
+    plaintext: str | None = None
+    error: str | None = None
+
+    def summary(self) -> dict:
+        """
+        Return the fields recorded in the JSONL summary.
+
+        :return: A JSON serializable dictionary without the plaintext.
+        :rtype: dict
+        """
+        record = asdict(self)
+        del record['plaintext']
+        return record
+
+
+def _init_worker(tm_ref: LanguageModel) -> None:
+    # The reference matrix is sent once per worker process instead of once per task
+    global _worker_tm_ref
+    _worker_tm_ref = tm_ref
+
+
+def _solve_file(file: str, tm_ref: LanguageModel, seed: int, restarts: int, options: dict) -> BatchResult:
+    start = time.perf_counter()
+    try:
+        ciphertext = load_textfile(file)
+        key, score, chains = solve_parallel(ciphertext, tm_ref, restarts=restarts, workers=1, seed=seed, **options)
+        plaintext = substitute_decrypt(ciphertext, key)
+    except Exception as e:
+        return BatchResult(file=file, key=None, score=None, iterations=0,
+                           elapsed=time.perf_counter() - start, error=str(e))
+    return BatchResult(file=file, key=key, score=score, iterations=sum(chain.iterations for chain in chains),
+                       elapsed=time.perf_counter() - start, plaintext=plaintext)
+
+
+def _solve_file_in_worker(file: str, seed: int, restarts: int, options: dict) -> BatchResult:
+    return _solve_file(file, _worker_tm_ref, seed, restarts, options)
+
+
+def solve_files(files: list[Path], tm_ref: LanguageModel, workers: int | None = None, restarts: int = 1,
+                seed: int | None = None, **options) -> Iterator[BatchResult]:
+    """
+    Decrypt many ciphertext files across a pool of worker processes.
+
+    The reference matrix is handed to every worker once when the pool starts, and the
+    results are yielded in the order in which the files finish, not in the input order.
+
+    :param files: Paths of the ciphertext files.
+    :type files: list[Path]
+    :param tm_ref: Reference transition matrix or n-gram model.
+    :type tm_ref: LanguageModel
+    :param workers: Number of worker processes. Defaults to the number of CPU cores; with a
+        single worker the files are processed in the calling process.
+    :type workers: int | None
+    :param restarts: Number of chains run for every file; the best key is kept.
+    :type restarts: int
+    :param seed: Base seed from which the per-file seeds are derived.
+    :type seed: int | None
+    :param options: Further keyword arguments of `solve_parallel`, e.g. `iterations`, `patience` or `solver`.
+    :return: An iterator of `BatchResult`, one per file.
+    :rtype: Iterator[BatchResult]
+    :raises ValueError: If `workers` is smaller than one.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("At least one worker is required")
+
+    seeds = chain_seeds(len(files), seed)
+    workers = min(workers, len(files))
+
+    if workers <= 1:
+        for file, file_seed in zip(files, seeds):
+            yield _solve_file(str(file), tm_ref, file_seed, restarts, options)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tm_ref,)) as executor:
+        futures = [executor.submit(_solve_file_in_worker, str(file), file_seed, restarts, options)
+                   for file, file_seed in zip(files, seeds)]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def run_batch(files: list[Path], tm_ref: LanguageModel, output_dir: Path, summary_path: Path | None = None,
+              workers: int | None = None, restarts: int = 1, seed: int | None = None,
+              **options) -> Iterator[BatchResult]:
+    """
+    Decrypt many ciphertext files and write every result as soon as it is available.
+
+    For each file the plaintext and the key are saved to `output_dir` as
+    `<stem>_plaintext.txt` and `<stem>_key.txt`, and one JSON line with the key, score,
+    iterations and wall time is written to the summary file.
+
+    :param files: Paths of the ciphertext files.
+    :type files: list[Path]
+    :param tm_ref: Reference transition matrix or n-gram model.
+    :type tm_ref: LanguageModel
+    :param output_dir: Directory for the decrypted texts and keys.
+    :type output_dir: Path
+    :param summary_path: Path of the JSONL summary. Defaults to `summary.jsonl` in `output_dir`.
+    :type summary_path: Path | None
+    :param workers: Number of worker processes, see `solve_files`.
+    :type workers: int | None
+    :param restarts: Number of chains run for every file.
+    :type restarts: int
+    :param seed: Base seed from which the per-file seeds are derived.
+    :type seed: int | None
+    :param options: Further keyword arguments of `solve_parallel`, e.g. `iterations`, `patience` or `solver`.
+    :return: An iterator of `BatchResult` in completion order, yielded after the result was written.
+    :rtype: Iterator[BatchResult]
+    """
+    output_dir = Path(output_dir)
+    summary_path = Path(summary_path) if summary_path is not None else output_dir / "summary.jsonl"
+    os.makedirs(summary_path.parent, exist_ok=True)
+
+    with open(summary_path, 'w', encoding='utf-8') as summary:
+        for result in solve_files(files, tm_ref, workers=workers, restarts=restarts, seed=seed, **options):
+            if result.error is None:
+                stem = Path(result.file).stem
+                save_textfile(result.plaintext, output_dir / f"{stem}_plaintext.txt")
+                save_textfile(result.key, output_dir / f"{stem}_key.txt")
+            summary.write(json.dumps(result.summary()) + "\n")
+            summary.flush()
+            yield result
@@ -0,0 +1,294 @@
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from dataclasses import asdict, dataclass
+from importlib import metadata
+from pathlib import Path
+
+from subcipher.cipher import substitute_decrypt, substitute_encrypt
+from subcipher.constants import ALPHABET
+from subcipher.mh_solver import solve
+from subcipher.ngram import MAX_ORDER, MIN_ORDER, build_ngram_model_from_file
+from subcipher.reference import build_reference_from_file
+from subcipher.scoring import LanguageModel
+from subcipher.utils import load_textfile, normalize_text
+
+SAMPLE_PATTERN = re.compile(r"text_(\d+)_sample_(\d+)_ciphertext\.txt")
+LENGTH_CLASSES = (250, 500, 1000)
+
+
+@dataclass
+class BenchmarkCase:
+    """
+    A ciphertext to benchmark the solver on.
+
+    :ivar name: Identifier of the case in the report.
+    :ivar length_class: Nominal plaintext length (250, 500 or 1000).
+    :ivar ciphertext: The encrypted text.
+    :ivar key: The correct key, or None if it is not known.
+    """
+    name: str
+    length_class: int
+    ciphertext: str
+    key: str | None = None
+
+
+@dataclass
+class CaseResult:
+    """
+    Measurements of one solver run on a `BenchmarkCase`.
+
+    The accuracy fields are None for cases without a known key.
+    """
+    name: str
+    length_class: int
+    iterations: int
+    elapsed: float
+    iterations_per_sec: float
+    score: float
+    key: str
+    stop_reason: str
+    accuracy: float | None = None
+    solved: bool | None = None
+    time_to_solve: float | None = None
+    iterations_to_solve: int | None = None
+
+
+def character_accuracy(ciphertext: str, key: str, true_key: str) -> float:
+    """
+    Return the fraction of characters that `key` decrypts the same way as `true_key`.
+
+    :param ciphertext: The encrypted text.
+    :type ciphertext: str
+    :param key: The key to evaluate.
+    :type key: str
+    :param true_key: The correct key.
+    :type true_key: str
+    :return: A value between 0 and 1; 1 for an empty ciphertext.
+    :rtype: float
+    """
+    if not ciphertext:
+        return 1.0
+    decrypted = substitute_decrypt(ciphertext, key)
+    expected = substitute_decrypt(ciphertext, true_key)
+    return sum(a == b for a, b in zip(decrypted, expected)) / len(expected)
+
+
+def load_sample_cases(encrypted_dir: str | Path, decrypted_dir: str | Path | None = None) -> list[BenchmarkCase]:
+    """
+    Load the bundled `text_<length>_sample_<n>_ciphertext.txt` files as benchmark cases.
+
+    A case gets a known key when `decrypted_dir` contains the matching
+    `text_<length>_sample_<n>_key.txt` file.
+
+    :param encrypted_dir: Directory with the ciphertext samples.
+    :type encrypted_dir: str | Path
+    :param decrypted_dir: Directory with the known keys, if any.
+    :type decrypted_dir: str | Path | None
+    :return: The cases sorted by length class and sample number.
+    :rtype: list[BenchmarkCase]
+    """
+    cases = []
+    for file in Path(encrypted_dir).iterdir():
+        match = SAMPLE_PATTERN.fullmatch(file.name)
+        if match is None:
+            continue
+
+        length, number = int(match[1]), int(match[2])
+        key = None
+        if decrypted_dir is not None:
+            key_file = Path(decrypted_dir) / f"text_{length}_sample_{number}_key.txt"
+            if key_file.exists():
+                key = load_textfile(str(key_file)).strip()
+        cases.append((length, number, BenchmarkCase(file.stem, length, load_textfile(str(file)).strip(), key)))
+
+    return [case for _, _, case in sorted(cases, key=lambda item: item[:2])]
+
+
+def synthetic_cases(corpus: str, per_class: int = 5, length_classes: tuple[int, ...] = LENGTH_CLASSES,
+                    seed: int = 0) -> list[BenchmarkCase]:
+    """
+    Create ciphertexts with known keys by encrypting excerpts of a corpus with seeded keys.
+
+    :param corpus: The raw corpus text; it is normalized with `normalize_text` first.
+    :type corpus: str
+    :param per_class: Number of cases per length class.
+    :type per_class: int
+    :param length_classes: Plaintext lengths to generate.
+    :type length_classes: tuple[int, ...]
+    :param seed: Seed for the excerpt offsets and the keys; the same seed yields the same cases.
+    :type seed: int
+    :return: The generated cases.
+    :rtype: list[BenchmarkCase]
+    :raises ValueError: If the corpus is shorter than the longest length class.
+    """
+    normalized = normalize_text(corpus)
+    if len(normalized) < max(length_classes):
+        raise ValueError("Corpus is too short for the requested length classes")
+
+    rng = random.Random(seed)
+    cases = []
+    for length in length_classes:
+        for number in range(1, per_class + 1):
+            start = rng.randrange(len(normalized) - length + 1)
+            key = ''.join(rng.sample(ALPHABET, len(ALPHABET)))
+            ciphertext = substitute_encrypt(normalized[start:start + length], key)
+            cases.append(BenchmarkCase(f"synthetic_{length}_{number}", length, ciphertext, key))
+    return cases
+
+
+def run_case(case: BenchmarkCase, model: LanguageModel, iterations: int = 20000, seed: int | None = None,
+             **options) -> CaseResult:
+    """
+    Run the solver once on a case and measure it.
+
+    :param case: The case to solve.
+    :type case: BenchmarkCase
+    :param model: Reference transition matrix or n-gram model.
+    :type model: LanguageModel
+    :param iterations: Maximum number of solver iterations.
+    :type iterations: int
+    :param seed: Seed of the solver run.
+    :type seed: int | None
+    :param options: Further keyword arguments of `solve`, e.g. `patience`.
+    :return: The measurements of the run.
+    :rtype: CaseResult
+    """
+    # Only the improvements are recorded while the run is timed; they are checked afterwards
+    improvements: list[tuple[int, float, str]] = []
+
+    def on_improvement(iteration: int, key: str, score: float) -> None:
+        improvements.append((iteration, time.perf_counter() - start, key))
+
+    start = time.perf_counter()
+    run = solve(case.ciphertext, model, iterations=iterations, seed=seed, verbose=False,
+                callback=on_improvement if case.key is not None else None, **options)
+    elapsed = time.perf_counter() - start
+    solved_at = next(((iteration, found) for iteration, found, key in improvements
+                      if character_accuracy(case.ciphertext, key, case.key) == 1.0), None)
+
+    result = CaseResult(name=case.name, length_class=case.length_class, iterations=run.iterations,
+                        elapsed=elapsed, iterations_per_sec=run.iterations / elapsed if elapsed > 0 else float('inf'),
+                        score=run.score, key=run.key, stop_reason=str(run.stop_reason))
+    if case.key is not None:
+        result.accuracy = character_accuracy(case.ciphertext, run.key, case.key)
+        result.solved = solved_at is not None
+        if solved_at is not None:
+            result.iterations_to_solve, result.time_to_solve = solved_at
+    return result
+
+
+def _mean(values: list[float]) -> float | None:
+    return sum(values) / len(values) if values else None
+
+
+def summarize(results: list[CaseResult]) -> dict[str, dict]:
+    """
+    Aggregate case results per length class.
+
+    :param results: Results of `run_case`.
+    :type results: list[CaseResult]
+    :return: A dictionary keyed by the length class with the number of cases, the number of
+        cases with a known key, success rate, mean character accuracy, overall iterations per
+        second and mean time and iterations to the correct key.
+    :rtype: dict[str, dict]
+    """
+    summary = {}
+    for length in sorted({result.length_class for result in results}):
+        group = [result for result in results if result.length_class == length]
+        known = [result for result in group if result.accuracy is not None]
+        solved = [result for result in known if result.solved]
+        total_elapsed = sum(result.elapsed for result in group)
+        summary[str(length)] = {
+            "cases": len(group),
+            "known": len(known),
+            "success_rate": len(solved) / len(known) if known else None,
+            "mean_accuracy": _mean([result.accuracy for result in known]),
+            "iterations_per_sec": sum(result.iterations for result in group) / total_elapsed if total_elapsed else None,
+            "mean_time_to_solve": _mean([result.time_to_solve for result in solved]),
+            "mean_iterations_to_solve": _mean([result.iterations_to_solve for result in solved]),
+        }
+    return summary
+
+
+def run_benchmark(cases: list[BenchmarkCase], model: LanguageModel, iterations: int = 20000,
+                  seed: int = 0, **options) -> dict:
+    """
+    Run the solver on all cases and build the machine-readable report.
+
+    :param cases: The cases to solve.
+    :type cases: list[BenchmarkCase]
+    :param model: Reference transition matrix or n-gram model.
+    :type model: LanguageModel
+    :param iterations: Number of solver iterations per case.
+    :type iterations: int
+    :param seed: Base seed; case `i` is solved with seed `seed + i`.
+    :type seed: int
+    :param options: Further keyword arguments of `solve`, e.g. `patience`.
+    :return: A JSON serializable report with the package version, the settings, the
+        per-class summary and the per-case results.
+    :rtype: dict
+    """
+    results = [run_case(case, model, iterations, seed + i, **options) for i, case in enumerate(cases)]
+    try:
+        version = metadata.version("subcrypto")
+    except metadata.PackageNotFoundError:
+        version = None
+
+    return {
+        "version": version,
+        "python": sys.version.split()[0],
+        "iterations": iterations,
+        "seed": seed,
+        "options": options,
+        "classes": summarize(results),
+        "cases": [asdict(result) for result in results],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='SubCipher - solver benchmark and accuracy suite')
+    parser.add_argument('--reference', '-r', type=str, default="data_samples/krakatit.txt",
+                        help='Path to reference file for the language model')
+    parser.add_argument('--ngram', '-n', type=int, default=2, choices=range(MIN_ORDER, MAX_ORDER + 1),
+                        help='Order of the n-gram language model')
+    parser.add_argument('--encrypted-dir', type=str, default="data_samples/encrypted",
+                        help='Directory with the bundled ciphertext samples')
+    parser.add_argument('--decrypted-dir', type=str, default="data_samples/decrypted",
+                        help='Directory with the known keys of the samples')
+    parser.add_argument('--corpus', type=str, default="data_samples/svejk.txt",
+                        help='Corpus for synthetic ciphertexts with known keys')
+    parser.add_argument('--synthetic', type=int, default=5,
+                        help='Number of synthetic ciphertexts per length class (0 to disable)')
+    parser.add_argument('--iterations', type=int, default=20000, help='Maximum solver iterations per case')
+    parser.add_argument('--patience', type=int, default=None,
+                        help='Stop a run when its best score has not improved for this many iterations')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for synthetic cases and solver runs')
+    parser.add_argument('--output', '-o', type=str, default=None, help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    if args.ngram == 2:
+        model = build_reference_from_file(args.reference).matrix
+    else:
+        model = build_ngram_model_from_file(args.reference, args.ngram)
+
+    cases = load_sample_cases(args.encrypted_dir, args.decrypted_dir)
+    if args.synthetic > 0:
+        cases += synthetic_cases(load_textfile(args.corpus), args.synthetic, seed=args.seed)
+
+    report = run_benchmark(cases, model, iterations=args.iterations, seed=args.seed, patience=args.patience)
+    report["reference"] = args.reference
+    report["ngram"] = args.ngram
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding='utf-8')
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
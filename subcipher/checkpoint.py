@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from subcipher.analysis import log_transition_matrix
+from subcipher.ngram import NgramModel
+from subcipher.pool import CiphertextPool
+from subcipher.schedules import SCHEDULES, Schedule
+from subcipher.scoring import LanguageModel
+
+CHECKPOINT_VERSION = 3
+DEFAULT_CHECKPOINT_INTERVAL = 10000  # Iterations between two checkpoints of a solver run
+
+
+@dataclass
+class SolverCheckpoint:
+    """
+    State of a solver run from which it can be continued exactly.
+
+    :ivar fingerprint: Identifies the ciphertext, model and settings of the run, see
+        `run_fingerprint`.
+    :ivar iteration: Number of iterations performed.
+    :ivar decode: The current mapping of the chain.
+    :ivar current_score: Score of the current mapping as accumulated by the chain.
+    :ivar best_decode: The best mapping found.
+    :ivar best_score: Score of the best mapping.
+    :ivar best_iteration: Iteration at which the best mapping was found.
+    :ivar elapsed: Wall time spent in the run so far, in seconds.
+    :ivar rng_state: State of the bit generator of the run's `numpy.random.Generator` from
+        which the proposals of the current block were drawn.
+    :ivar schedule_state: Attributes of the temperature schedule object.
+    :ivar stop_reason: Why the run ended, or None while it is still running.
+    :ivar posterior_counts: Mapping counts collected so far by posterior sampling, if the
+        run samples, see `PosteriorRecorder`.
+    """
+    fingerprint: str
+    iteration: int
+    decode: np.ndarray
+    current_score: float
+    best_decode: np.ndarray
+    best_score: float
+    best_iteration: int
+    elapsed: float
+    rng_state: dict
+    schedule_state: dict = field(default_factory=dict)
+    stop_reason: str | None = None
+    posterior_counts: np.ndarray | None = None
+
+
+def _schedule_name(schedule: str | Schedule) -> str:
+    # Subclasses of a built-in schedule, e.g. wrappers, keep its state and resume as it
+    if isinstance(schedule, str):
+        return schedule
+    for name, schedule_class in SCHEDULES.items():
+        if isinstance(schedule, schedule_class):
+            return name
+    return f"{type(schedule).__module__}.{type(schedule).__qualname__}"
+
+
+def run_fingerprint(ciphertext: str | CiphertextPool, iterations: int, model: LanguageModel | None = None,
+                    schedule: str | Schedule = "linear", initial_temp: float = 1.0,
+                    delta_scoring: bool = True) -> str:
+    """
+    Compute the identifier of a solver run stored in its checkpoints.
+
+    A checkpoint is only resumed by a run with the same ciphertext, iteration count, language
+    model and schedule settings, as the saved scores and the schedule state depend on them.
+    Files of a pool are identified by their path, size and modification time.
+
+    :param ciphertext: The encrypted text or a pool of messages.
+    :type ciphertext: str | CiphertextPool
+    :param iterations: The iteration count of the run.
+    :type iterations: int
+    :param model: The language model of the run; its log-probability table is digested.
+    :type model: LanguageModel | None
+    :param schedule: The temperature schedule, by name or as the schedule object.
+    :type schedule: str | Schedule
+    :param initial_temp: The initial temperature of the run.
+    :type initial_temp: float
+    :param delta_scoring: Whether the run scores proposals incrementally.
+    :type delta_scoring: bool
+    :return: A hexadecimal SHA-256 digest.
+    :rtype: str
+    """
+    settings = f"v{CHECKPOINT_VERSION}:{iterations}:{_schedule_name(schedule)}:{initial_temp!r}:{delta_scoring}:"
+    digest = hashlib.sha256(settings.encode('utf-8'))
+    if model is not None:
+        log_table = model.log_probs if isinstance(model, NgramModel) else log_transition_matrix(model)
+        digest.update(np.ascontiguousarray(log_table, dtype='<f8').tobytes())
+    if isinstance(ciphertext, str):
+        digest.update(ciphertext.encode('utf-8'))
+    else:
+        for message in ciphertext.messages:
+            digest.update(message.encode('utf-8') + b"\0")
+        for file_path in ciphertext.files:
+            # Size and modification time tell an edited file apart without reading it again
+            stat = Path(file_path).stat()
+            digest.update(f"{Path(file_path).resolve()}:{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8') + b"\0")
+    return digest.hexdigest()
+
+
+def save_checkpoint(checkpoint: SolverCheckpoint, path: str | Path) -> None:
+    """
+    Write a checkpoint as a small JSON file.
+
+    The file is written to a temporary path first and renamed, so a run killed while saving
+    leaves the previous checkpoint intact.
+
+    :param checkpoint: The state to save.
+    :type checkpoint: SolverCheckpoint
+    :param path: Path of the checkpoint file; parent directories are created.
+    :type path: str | Path
+    """
+    record = asdict(checkpoint)
+    record["version"] = CHECKPOINT_VERSION
+    record["decode"] = checkpoint.decode.tolist()
+    record["best_decode"] = checkpoint.best_decode.tolist()
+    if checkpoint.posterior_counts is not None:
+        record["posterior_counts"] = checkpoint.posterior_counts.tolist()
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(record), encoding='utf-8')
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str | Path) -> SolverCheckpoint:
+    """
+    Read a checkpoint written by `save_checkpoint`.
+
+    :param path: Path of the checkpoint file.
+    :type path: str | Path
+    :return: The saved state.
+    :rtype: SolverCheckpoint
+    :raises ValueError: If the file is not a checkpoint of a supported version.
+    :raises FileNotFoundError: If the file does not exist.
+    """
+    try:
+        record = json.loads(Path(path).read_text(encoding='utf-8'))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"{path} is not a solver checkpoint") from e
+    if not isinstance(record, dict) or "version" not in record:
+        raise ValueError(f"{path} is not a solver checkpoint")
+    version = record.pop("version")
+    if version != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version {version}, expected {CHECKPOINT_VERSION}")
+
+    record["decode"] = np.array(record["decode"], dtype=np.intp)
+    record["best_decode"] = np.array(record["best_decode"], dtype=np.intp)
+    if record.get("posterior_counts") is not None:
+        record["posterior_counts"] = np.array(record["posterior_counts"], dtype=np.int64)
+    return SolverCheckpoint(**record)
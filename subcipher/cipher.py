@@ -1,5 +1,145 @@
+from collections.abc import Iterable
+from functools import lru_cache
+from typing import IO, TypeVar
+
 from subcipher.constants import ALPHABET
+from subcipher.utils import DEFAULT_CHUNK_SIZE
+
+Text = TypeVar("Text", str, bytes)
+
+
+def _str_table(source: str, target: str) -> dict[int, int]:
+    # Lowercase letters are mapped like uppercase ones, which replaces `upper()` for ASCII text
+    return str.maketrans(source.lower() + source, target + target)
+
+
+def _bytes_table(source: str, target: str) -> bytes:
+    table = bytearray(range(256))
+    for source_char, target_char in zip(source, target):
+        table[ord(source_char.lower())] = ord(target_char)
+        table[ord(source_char)] = ord(target_char)
+    return bytes(table)
+
+
+class SubstitutionCipher:
+    """
+    A substitution cipher key with precomputed translation tables.
+
+    The key is validated once and the forward and inverse tables are built for both `str`
+    and `bytes`, so encrypting many messages with the same key repeats no setup. Text is
+    processed case-insensitively: lowercase letters are substituted like uppercase ones and
+    characters outside of `ALPHABET` are kept. Bytes are translated with `bytes.translate`,
+    so they are expected in an ASCII-compatible encoding.
+
+    :param key: A permutation of `ALPHABET`; the plaintext symbol `ALPHABET[i]` is encrypted
+        as `key[i]`.
+    :type key: str
+    :raises ValueError: If the key is not a permutation of `ALPHABET`.
+    """
+
+    def __init__(self, key: str):
+        if len(key) != len(ALPHABET) or sorted(key) != sorted(ALPHABET):
+            raise ValueError("Key has to be a permutation of " + ALPHABET)
+        self.key = key
+        self._encrypt_str = _str_table(ALPHABET, key)
+        self._decrypt_str = _str_table(key, ALPHABET)
+        self._encrypt_bytes = _bytes_table(ALPHABET, key)
+        self._decrypt_bytes = _bytes_table(key, ALPHABET)
+
+    def __repr__(self) -> str:
+        return f"SubstitutionCipher({self.key!r})"
+
+    @staticmethod
+    def _translate(text: Text, str_table: dict[int, int], bytes_table: bytes) -> Text:
+        if isinstance(text, str):
+            # Non-ASCII text may contain characters whose uppercase form is in the alphabet
+            return text.translate(str_table) if text.isascii() else text.upper().translate(str_table)
+        return text.translate(bytes_table)
+
+    def encrypt(self, text: Text) -> Text:
+        """
+        Encrypt a plaintext.
 
+        :param text: The plaintext as `str` or `bytes`.
+        :type text: str | bytes
+        :return: The ciphertext, of the same type as `text`, in uppercase.
+        :rtype: str | bytes
+        """
+        return self._translate(text, self._encrypt_str, self._encrypt_bytes)
+
+    def decrypt(self, text: Text) -> Text:
+        """
+        Decrypt a ciphertext.
+
+        :param text: The ciphertext as `str` or `bytes`.
+        :type text: str | bytes
+        :return: The plaintext, of the same type as `text`, in uppercase.
+        :rtype: str | bytes
+        """
+        return self._translate(text, self._decrypt_str, self._decrypt_bytes)
+
+    def encrypt_batch(self, texts: Iterable[Text]) -> list[Text]:
+        """
+        Encrypt several plaintexts with the key.
+
+        :param texts: The plaintexts as `str` or `bytes`.
+        :type texts: Iterable[str | bytes]
+        :return: The ciphertexts in the same order.
+        :rtype: list[str | bytes]
+        """
+        return [self.encrypt(text) for text in texts]
+
+    def decrypt_batch(self, texts: Iterable[Text]) -> list[Text]:
+        """
+        Decrypt several ciphertexts with the key.
+
+        :param texts: The ciphertexts as `str` or `bytes`.
+        :type texts: Iterable[str | bytes]
+        :return: The plaintexts in the same order.
+        :rtype: list[str | bytes]
+        """
+        return [self.decrypt(text) for text in texts]
+
+    def encrypt_stream(self, source: IO, target: IO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        Encrypt a file-like object into another one chunk by chunk.
+
+        :param source: A readable file-like object in text or binary mode.
+        :type source: IO
+        :param target: A writable file-like object in the same mode as `source`.
+        :type target: IO
+        :param chunk_size: Number of characters or bytes processed at once.
+        :type chunk_size: int
+        :return: The number of characters or bytes written.
+        :rtype: int
+        """
+        return self._stream(source, target, self._encrypt_str, self._encrypt_bytes, chunk_size)
+
+    def decrypt_stream(self, source: IO, target: IO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        Decrypt a file-like object into another one chunk by chunk.
+
+        :param source: A readable file-like object in text or binary mode.
+        :type source: IO
+        :param target: A writable file-like object in the same mode as `source`.
+        :type target: IO
+        :param chunk_size: Number of characters or bytes processed at once.
+        :type chunk_size: int
+        :return: The number of characters or bytes written.
+        :rtype: int
+        """
+        return self._stream(source, target, self._decrypt_str, self._decrypt_bytes, chunk_size)
+
+    def _stream(self, source: IO, target: IO, str_table: dict[int, int], bytes_table: bytes, chunk_size: int) -> int:
+        written = 0
+        while chunk := source.read(chunk_size):
+            written += target.write(self._translate(chunk, str_table, bytes_table))
+        return written
+
+
+@lru_cache(maxsize=16)
+def _cipher(key: str) -> SubstitutionCipher:
+    return SubstitutionCipher(key)
 
 def substitute_encrypt(text: str, key: str) -> str:
     """
@@ -7,7 +147,8 @@ def substitute_encrypt(text: str, key: str) -> str:
     The key must be a permutation of the defined `ALPHABET`. The function substitutes
     each character of the plaintext with the corresponding character in the given key
     based on the position within the `ALPHABET`. Input text is first converted to uppercase
-    before the substitution process.
+    before the substitution process. The `SubstitutionCipher` of the key is cached, so
+    repeated calls with the same key do not rebuild the translation table.
 
     :param text: The plaintext string to be encrypted.
     :type text: str
@@ -18,13 +159,7 @@ def substitute_encrypt(text: str, key: str) -> str:
     :rtype: str
     :raises ValueError: If the key is not a permutation of the defined `ALPHABET`.
     """
-    if len(key) != 27 or sorted(key) != sorted(ALPHABET):
-        raise ValueError("Key has to be a permutation of " + ALPHABET)
-
-    text = text.upper()
-    trans_table = str.maketrans(ALPHABET, key)
-
-    return text.translate(trans_table)
+    return _cipher(key).encrypt(text)
 
 def substitute_decrypt(text: str, key: str) -> str:
     """
@@ -47,10 +182,4 @@ def substitute_decrypt(text: str, key: str) -> str:
     :raises ValueError: If the `key` is not exactly 27 characters long or
         is not a valid permutation of the defined alphabet including space.
     """
-    if len(key) != 27 or sorted(key) != sorted(ALPHABET):
-        raise ValueError("Key has to be a permutation of " + ALPHABET)
-
-    text = text.upper()
-    trans_table = str.maketrans(key, ALPHABET)
-
-    return text.translate(trans_table)
\ No newline at end of file
+    return _cipher(key).decrypt(text)
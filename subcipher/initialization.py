@@ -0,0 +1,130 @@
+from itertools import combinations
+
+import numpy as np
+
+from subcipher.constants import ALPHABET
+from subcipher.ngram import NgramModel
+from subcipher.pool import CiphertextPool
+from subcipher.scoring import LanguageModel, Scorer, key_to_decode
+from subcipher.streams import create_rng
+
+INITIALIZERS = ("random", "frequency", "greedy")
+_PAIRS = np.array(list(combinations(range(len(ALPHABET)), 2)), dtype=np.intp)
+
+
+def unigram_frequencies(model: LanguageModel) -> np.ndarray:
+    """
+    Return the relative frequencies of the single symbols under a language model.
+
+    :param model: A bigram transition matrix or an `NgramModel`.
+    :type model: LanguageModel
+    :return: A float array with one frequency per symbol of the alphabet, summing to one.
+    :rtype: np.ndarray
+    """
+    if isinstance(model, NgramModel):
+        probs = np.exp(model.log_probs)
+        frequencies = probs.sum(axis=tuple(range(1, model.n)))
+    else:
+        # The transition matrix is normalized jointly, so its row sums are the symbol marginals
+        frequencies = np.asarray(model, dtype=np.float64).sum(axis=1)
+    return frequencies / frequencies.sum()
+
+
+def frequency_decode(ciphertext: str | CiphertextPool, model: LanguageModel) -> np.ndarray:
+    """
+    Map the ciphertext symbols to plaintext symbols by matching their frequency ranks.
+
+    The most frequent ciphertext symbol is mapped to the most frequent symbol of the model
+    (usually `_`, the word separator), the second to the second and so on. Ties and symbols
+    missing from the ciphertext keep the alphabet order.
+
+    :param ciphertext: The encrypted text, or a pool of messages whose counts are pooled.
+    :type ciphertext: str | CiphertextPool
+    :param model: A bigram transition matrix or an `NgramModel`.
+    :type model: LanguageModel
+    :return: The mapping from ciphertext symbol indices to plaintext indices, see `key_to_decode`.
+    :rtype: np.ndarray
+    :raises ValueError: If the ciphertext contains a character outside of `ALPHABET`.
+    """
+    size = len(ALPHABET)
+    pool = CiphertextPool([ciphertext]) if isinstance(ciphertext, str) else ciphertext
+    counts = pool.counts(1)
+    cipher_ranks = np.argsort(-counts, kind='stable')
+    plain_ranks = np.argsort(-unigram_frequencies(model), kind='stable')
+
+    decode = np.empty(size, dtype=np.intp)
+    decode[cipher_ranks] = plain_ranks
+    return decode
+
+
+def greedy_refine(scorer: Scorer, decode: np.ndarray, max_rounds: int = 100) -> np.ndarray:
+    """
+    Improve a mapping by steepest-ascent hill climbing over all swaps of two symbols.
+
+    Every round scores all 351 swapped mappings with one `score_batch` call and applies
+    the best one, until no swap improves the score or `max_rounds` is reached.
+
+    :param scorer: A scorer of the ciphertext.
+    :type scorer: Scorer
+    :param decode: The mapping to start from; it is not modified.
+    :type decode: np.ndarray
+    :param max_rounds: Maximum number of applied swaps.
+    :type max_rounds: int
+    :return: The refined mapping.
+    :rtype: np.ndarray
+    """
+    decode = np.array(decode, dtype=np.intp)
+    score = scorer.score(decode)
+    rows = np.arange(len(_PAIRS))
+
+    for _ in range(max_rounds):
+        candidates = np.tile(decode, (len(_PAIRS), 1))
+        candidates[rows, _PAIRS[:, 0]] = decode[_PAIRS[:, 1]]
+        candidates[rows, _PAIRS[:, 1]] = decode[_PAIRS[:, 0]]
+
+        scores = scorer.score_batch(candidates)
+        best = int(np.argmax(scores))
+        # Swaps of symbols with identical contexts change the score by rounding errors only
+        if scores[best] - score <= 1e-9 * max(1.0, abs(score)):
+            break
+        decode, score = candidates[best], scores[best]
+    return decode
+
+
+def initial_decode(ciphertext: str | CiphertextPool, model: LanguageModel, scorer: Scorer, init: str = "random",
+                   initial_key: str | None = None, rng: np.random.Generator | None = None) -> np.ndarray:
+    """
+    Choose the mapping a solver run starts from.
+
+    :param ciphertext: The encrypted text or a pool of messages.
+    :type ciphertext: str | CiphertextPool
+    :param model: A bigram transition matrix or an `NgramModel`.
+    :type model: LanguageModel
+    :param scorer: A scorer of the ciphertext, used by the greedy refinement.
+    :type scorer: Scorer
+    :param init: `random` for a random permutation, `frequency` for `frequency_decode` or
+        `greedy` for `frequency_decode` refined by `greedy_refine`.
+    :type init: str
+    :param initial_key: A key to start from; when given, `init` is ignored.
+    :type initial_key: str | None
+    :param rng: The random generator of the run, used by the random initializer. When None,
+        a generator seeded from the operating system is used.
+    :type rng: np.random.Generator | None
+    :return: The initial mapping from ciphertext symbol indices to plaintext indices.
+    :rtype: np.ndarray
+    :raises ValueError: If the initializer is unknown or `initial_key` is not a permutation of `ALPHABET`.
+    """
+    if initial_key is not None:
+        if sorted(initial_key) != sorted(ALPHABET):
+            raise ValueError("Initial key has to be a permutation of the alphabet")
+        return key_to_decode(initial_key)
+    if init not in INITIALIZERS:
+        raise ValueError(f"Unknown initializer '{init}', expected one of: {', '.join(INITIALIZERS)}")
+
+    if init == "random":
+        return create_rng(rng).permutation(len(ALPHABET)).astype(np.intp)
+
+    decode = frequency_decode(ciphertext, model)
+    if init == "greedy":
+        decode = greedy_refine(scorer, decode)
+    return decode
@@ -0,0 +1,215 @@
+import csv
+import json
+from dataclasses import asdict, dataclass, field, fields
+from pathlib import Path
+
+PHASES = ("propose", "score", "accept")
+DEFAULT_BANDS = 10
+DEFAULT_TRACE_POINTS = 200
+
+
+@dataclass
+class TemperatureBand:
+    """
+    Acceptance statistics of the proposals made while the temperature was within a range.
+
+    :ivar low: Lower bound of the temperature range (inclusive).
+    :ivar high: Upper bound of the temperature range (exclusive, except for the last band).
+    :ivar proposals: Number of proposals made in the range.
+    :ivar accepted: Number of accepted proposals.
+    :ivar improving: Number of proposals that did not lower the score.
+    """
+    low: float
+    high: float
+    proposals: int = 0
+    accepted: int = 0
+    improving: int = 0
+
+    @property
+    def acceptance_rate(self) -> float | None:
+        """
+        The fraction of accepted proposals, or None if no proposal fell into the band.
+
+        :rtype: float | None
+        """
+        return self.accepted / self.proposals if self.proposals else None
+
+
+@dataclass
+class TracePoint:
+    """
+    State of the chain at a sampled iteration.
+    """
+    iteration: int
+    temperature: float
+    current_score: float
+    best_score: float
+    acceptance_rate: float  # Fraction of proposals accepted since the previous trace point
+
+
+@dataclass
+class RunReport:
+    """
+    Instrumentation report of a single solver run.
+
+    :ivar proposals: Number of proposals evaluated.
+    :ivar accepted: Number of accepted proposals.
+    :ivar elapsed: Wall time of the run in seconds, including setup.
+    :ivar timings: Seconds spent in each phase of the loop: `propose` (drawing the swap),
+        `score` (evaluating it), `accept` (the acceptance test and applying the swap),
+        `setup` (building the scorer and the initial key) and `overhead` (the remaining
+        loop bookkeeping, including the instrumentation itself).
+    :ivar bands: Acceptance statistics per temperature band, from the coldest to the hottest.
+    :ivar trace: The chain state at sampled iterations.
+    """
+    proposals: int = 0
+    accepted: int = 0
+    elapsed: float = 0.0
+    timings: dict[str, float] = field(default_factory=dict)
+    bands: list[TemperatureBand] = field(default_factory=list)
+    trace: list[TracePoint] = field(default_factory=list)
+
+    @property
+    def proposals_per_sec(self) -> float | None:
+        """
+        Proposals evaluated per second of wall time spent in the loop.
+
+        :rtype: float | None
+        """
+        loop_time = self.elapsed - self.timings.get("setup", 0.0)
+        return self.proposals / loop_time if loop_time > 0 else None
+
+    @property
+    def acceptance_rate(self) -> float | None:
+        """
+        The overall fraction of accepted proposals, or None if there were none.
+
+        :rtype: float | None
+        """
+        return self.accepted / self.proposals if self.proposals else None
+
+    def to_dict(self) -> dict:
+        """
+        Convert the report into a JSON serializable dictionary, including the derived rates.
+
+        :rtype: dict
+        """
+        report = asdict(self)
+        report["proposals_per_sec"] = self.proposals_per_sec
+        report["acceptance_rate"] = self.acceptance_rate
+        for band, data in zip(self.bands, report["bands"]):
+            data["acceptance_rate"] = band.acceptance_rate
+        return report
+
+    def save_json(self, path: str | Path) -> None:
+        """
+        Write the report as a JSON document.
+
+        :param path: The output file.
+        :type path: str | Path
+        """
+        Path(path).write_text(json.dumps(self.to_dict(), indent=2) + "\n", encoding='utf-8')
+
+    def save_csv(self, path: str | Path, table: str = "trace") -> None:
+        """
+        Write one table of the report as CSV with a header row.
+
+        :param path: The output file.
+        :type path: str | Path
+        :param table: `trace` for the score trace or `bands` for the temperature bands.
+        :type table: str
+        :raises ValueError: If the table name is unknown.
+        """
+        if table == "trace":
+            columns = [column.name for column in fields(TracePoint)]
+            rows = [asdict(point) for point in self.trace]
+        elif table == "bands":
+            columns = [column.name for column in fields(TemperatureBand)] + ["acceptance_rate"]
+            rows = [asdict(band) | {"acceptance_rate": band.acceptance_rate} for band in self.bands]
+        else:
+            raise ValueError("Table has to be 'trace' or 'bands'")
+
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+class RunRecorder:
+    """
+    Collects the measurements of a solver run into a `RunReport`.
+
+    The solver passes the timestamps it took around each phase of an iteration, so the
+    recorder adds no clock calls of its own.
+
+    :param iterations: The maximum number of iterations of the run.
+    :type iterations: int
+    :param max_temp: The highest temperature of the schedule; the range from 0 to it is split
+        into equal bands.
+    :type max_temp: float
+    :param bands: Number of temperature bands.
+    :type bands: int
+    :param trace_points: Approximate number of sampled trace points.
+    :type trace_points: int
+    """
+
+    def __init__(self, iterations: int, max_temp: float, bands: int = DEFAULT_BANDS,
+                 trace_points: int = DEFAULT_TRACE_POINTS):
+        width = max_temp / bands
+        self.report = RunReport(timings={phase: 0.0 for phase in ("setup",) + PHASES},
+                                bands=[TemperatureBand(i * width, (i + 1) * width) for i in range(bands)])
+        self.band_scale = bands / max_temp if max_temp > 0 else 0.0
+        self.trace_interval = max(1, iterations // trace_points)
+        self._window_accepted = 0
+        self._window_proposals = 0
+        self._last_point: tuple[int, float, float, float] | None = None
+
+    def setup(self, seconds: float) -> None:
+        """
+        Record the time spent before the first iteration.
+        """
+        self.report.timings["setup"] += seconds
+
+    def record(self, iteration: int, temperature: float, score_diff: float, accepted: bool,
+               propose_start: float, score_start: float, accept_start: float, end: float,
+               current_score: float, best_score: float) -> None:
+        """
+        Record one iteration; `iteration` is the number of iterations performed so far.
+        """
+        report = self.report
+        timings = report.timings
+        timings["propose"] += score_start - propose_start
+        timings["score"] += accept_start - score_start
+        timings["accept"] += end - accept_start
+
+        band = report.bands[min(int(temperature * self.band_scale), len(report.bands) - 1)]
+        band.proposals += 1
+        report.proposals += 1
+        self._window_proposals += 1
+        if score_diff >= 0:
+            band.improving += 1
+        if accepted:
+            band.accepted += 1
+            report.accepted += 1
+            self._window_accepted += 1
+
+        self._last_point = (iteration, temperature, current_score, best_score)
+        if iteration % self.trace_interval == 0:
+            self._add_trace_point()
+
+    def _add_trace_point(self) -> None:
+        self.report.trace.append(TracePoint(*self._last_point, self._window_accepted / self._window_proposals))
+        self._window_accepted = self._window_proposals = 0
+
+    def finish(self, elapsed: float) -> RunReport:
+        """
+        Close the report of a run that took `elapsed` seconds and return it.
+        """
+        if self._window_proposals:
+            # The run stopped between two sampled points
+            self._add_trace_point()
+
+        report = self.report
+        report.elapsed = elapsed
+        report.timings["overhead"] = max(0.0, elapsed - sum(report.timings.values()))
+        return report
@@ -0,0 +1,131 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from subcipher.analysis import UNKNOWN
+from subcipher.cipher import SubstitutionCipher
+from subcipher.constants import ALPHABET
+from subcipher.ngram import ngram_ids
+from subcipher.utils import DEFAULT_CHUNK_SIZE
+
+
+@lru_cache(maxsize=None)
+def byte_encoding_table(alphabet: str = ALPHABET) -> np.ndarray:
+    """
+    Return the lookup table mapping every byte value to its alphabet index.
+
+    Lowercase letters are mapped like their uppercase counterparts, as `substitute_decrypt`
+    does; all other bytes map to `UNKNOWN`.
+
+    :param alphabet: An ASCII alphabet.
+    :type alphabet: str
+    :return: A read-only uint8 array of length 256.
+    :rtype: np.ndarray
+    """
+    table = np.full(256, UNKNOWN, dtype=np.uint8)
+    for i, char in enumerate(alphabet):
+        table[ord(char.lower())] = i
+        table[ord(char)] = i
+    table.flags.writeable = False
+    return table
+
+
+def map_file(file_path: str | Path) -> np.ndarray:
+    """
+    Memory-map a file as a read-only array of bytes.
+
+    :param file_path: Path of the file.
+    :type file_path: str | Path
+    :return: A uint8 array backed by the file; empty for an empty file.
+    :rtype: np.ndarray
+    :raises FileNotFoundError: If the file does not exist.
+    """
+    if os.path.getsize(file_path) == 0:
+        # Empty files cannot be mapped
+        return np.empty(0, dtype=np.uint8)
+    return np.memmap(file_path, dtype=np.uint8, mode='r')
+
+
+def encode_bytes(data: np.ndarray, alphabet: str = ALPHABET, out: np.ndarray | None = None) -> np.ndarray:
+    """
+    Encode raw text bytes to alphabet indices in a single vectorized pass.
+
+    :param data: A uint8 array of text bytes, e.g. a slice of `map_file`.
+    :type data: np.ndarray
+    :param alphabet: An ASCII alphabet.
+    :type alphabet: str
+    :param out: Optional array of the same length receiving the result, to reuse a buffer.
+    :type out: np.ndarray | None
+    :return: A uint8 array of alphabet indices with `UNKNOWN` for bytes outside the alphabet,
+        the same as `encode_text(text, alphabet, strict=False)` for ASCII text.
+    :rtype: np.ndarray
+    """
+    return np.take(byte_encoding_table(alphabet), data, out=out)
+
+
+def file_ngram_counts(file_path: str | Path, n: int, alphabet: str = ALPHABET,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE) -> np.ndarray:
+    """
+    Count the n-grams of a ciphertext file without loading it into memory.
+
+    The memory-mapped file is encoded in chunks, carrying the last `n - 1` symbols over to
+    the next chunk, so peak memory depends on `chunk_size` only. Bytes outside the alphabet,
+    such as line breaks, are skipped together with the n-grams containing them.
+
+    :param file_path: Path of the ciphertext file.
+    :type file_path: str | Path
+    :param n: The n-gram order; 1 counts single symbols.
+    :type n: int
+    :param alphabet: An ASCII alphabet.
+    :type alphabet: str
+    :param chunk_size: Number of bytes encoded at once.
+    :type chunk_size: int
+    :return: An integer array of shape `(len(alphabet),) * n`.
+    :rtype: np.ndarray
+    :raises FileNotFoundError: If the file does not exist.
+    """
+    size = len(alphabet)
+    data = map_file(file_path)
+    counts = np.zeros(size ** n, dtype=np.int64)
+    buffer = np.empty(n - 1 + chunk_size, dtype=np.uint8)
+    carried = 0
+
+    for start in range(0, len(data), chunk_size):
+        chunk = data[start:start + chunk_size]
+        encoded = buffer[:carried + len(chunk)]
+        encode_bytes(chunk, alphabet, out=encoded[carried:])
+        counts += np.bincount(ngram_ids(encoded, n, size), minlength=size ** n)
+
+        carried = min(n - 1, len(encoded))
+        buffer[:carried] = encoded[len(encoded) - carried:]
+
+    return counts.reshape((size,) * n)
+
+
+def decrypt_file(input_path: str | Path, output_path: str | Path, key: str,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Decrypt a ciphertext file into a plaintext file with a streaming byte-level translation.
+
+    The result equals `substitute_decrypt` of the file content for ASCII text, while only
+    one chunk is held in memory at a time.
+
+    :param input_path: Path of the ciphertext file.
+    :type input_path: str | Path
+    :param output_path: Path of the plaintext file; parent directories are created.
+    :type output_path: str | Path
+    :param key: The key, a permutation of `ALPHABET`.
+    :type key: str
+    :param chunk_size: Number of bytes translated at once.
+    :type chunk_size: int
+    :return: The number of bytes written.
+    :rtype: int
+    :raises ValueError: If the key is not a permutation of `ALPHABET`.
+    :raises FileNotFoundError: If the ciphertext file does not exist.
+    """
+    cipher = SubstitutionCipher(key)
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(input_path, 'rb') as source, open(output_path, 'wb') as target:
+        return cipher.decrypt_stream(source, target, chunk_size)
@@ -1,65 +1,308 @@
-import math
-import random
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from enum import StrEnum
+from pathlib import Path
 
-import numpy as np
+from subcipher.checkpoint import (DEFAULT_CHECKPOINT_INTERVAL, SolverCheckpoint, load_checkpoint, run_fingerprint,
+                                  save_checkpoint)
+from subcipher.initialization import initial_decode
+from subcipher.instrumentation import RunRecorder, RunReport
+from subcipher.pool import CiphertextPool
+from subcipher.posterior import KeyPosterior, PosteriorRecorder
+from subcipher.schedules import Schedule, create_schedule
+from subcipher.scoring import LanguageModel, create_scorer, decode_to_key
+from subcipher.streams import PROPOSAL_BLOCK, Seed, create_rng, draw_proposals
 
-from subcipher.analysis import calculate_plausibility
-from subcipher.cipher import substitute_decrypt
-from subcipher.constants import ALPHABET
+
+class StopReason(StrEnum):
+    """
+    Why a solver run ended.
+    """
+    ITERATIONS = "iterations"  # The full iteration count was used
+    PATIENCE = "patience"  # The best score did not improve within the patience window
+    TARGET_SCORE = "target_score"  # The best score reached the target
+    TIME_BUDGET = "time_budget"  # The wall-clock budget was exhausted
 
 
-def metropolis_hastings(ciphertext: str, tm_ref: np.ndarray, iterations: int = 20000, initial_temp: float = 1.0) -> tuple[str, float]:
+@dataclass
+class SolverResult:
     """
-    Implements the Metropolis-Hastings algorithm with simulated annealing.
+    Outcome of a single Metropolis-Hastings run.
+
+    :ivar key: Best key found.
+    :ivar score: Logarithmic plausibility of the best key.
+    :ivar iterations: Number of iterations actually performed.
+    :ivar stop_reason: Why the run ended.
+    :ivar elapsed: Wall time of the run in seconds.
+    :ivar seed: Seed the run was started with, if any; rerunning with it reproduces the run.
+    :ivar report: Instrumentation report of the run, if it was requested with `instrument=True`.
+    :ivar posterior: Mapping frequencies of the states after the burn-in, if they were
+        requested with `sample_after`.
+    """
+    key: str
+    score: float
+    iterations: int
+    stop_reason: StopReason
+    elapsed: float
+    seed: int | None = None
+    report: RunReport | None = None
+    posterior: KeyPosterior | None = None
+
+
+def solve(ciphertext: str | CiphertextPool, tm_ref: LanguageModel, iterations: int = 20000,
+          initial_temp: float = 1.0, delta_scoring: bool = True, seed: Seed = None, verbose: bool = True,
+          callback: Callable[[int, str, float], None] | None = None, patience: int | None = None,
+          target_score: float | None = None, time_budget: float | None = None,
+          instrument: bool = False, schedule: str | Schedule = "linear", init: str = "random",
+          initial_key: str | None = None, checkpoint: str | Path | None = None,
+          checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL, sample_after: int | None = None) -> SolverResult:
+    """
+    Implements the Metropolis-Hastings algorithm with simulated annealing and early stopping.
 
     Args:
-        ciphertext: The encrypted text to decrypt
-        tm_ref: Reference transition matrix
-        iterations: Number of iterations to perform
+        ciphertext: The encrypted text to decrypt, or a `CiphertextPool` of messages sharing one key
+        tm_ref: Reference transition matrix, or an `NgramModel` of order 2 to 4
+        iterations: Maximum number of iterations to perform
         initial_temp: Initial temperature for simulated annealing
+        delta_scoring: Score proposals from the ciphertext n-gram counts, rescoring only the
+            n-grams that contain one of the two swapped symbols. When False, every proposal
+            decrypts and rescores the whole text. Both modes yield the same scores.
+        seed: Seed of the `numpy.random.Generator` of this run, or the generator itself, see
+            `create_rng`. When None, the generator is seeded from the operating system. The
+            proposals are drawn in blocks of `PROPOSAL_BLOCK` iterations
+        verbose: Whether to print the progress every 500 iterations
+        callback: Called with the iteration number, key and score whenever a new best key is
+            found; iteration 0 is the initial key
+        patience: Stop when the best score has not improved for this many iterations
+        target_score: Stop as soon as the best score reaches this value
+        time_budget: Stop after this many seconds of wall time
+        instrument: Attach a `RunReport` with throughput, acceptance rates per temperature
+            band, a sampled score trace and a time breakdown of the loop phases. Timing every
+            iteration slows the loop down, so it is off by default
+        schedule: Temperature schedule, either a name from `SCHEDULES` (`linear`, `exponential`,
+            `adaptive` or `constant`) starting at `initial_temp`, or a `Schedule` object
+        init: How to choose the initial key: `random`, `frequency` (match the unigram
+            frequency ranks of the ciphertext to those of the model) or `greedy` (the
+            frequency match refined by greedy swaps), see `initial_decode`
+        initial_key: Start from this key instead; `init` is then ignored
+        checkpoint: Path of a checkpoint file. The state of the run, including the random
+            generator and the schedule, is saved there every `checkpoint_interval` iterations
+            and when the run ends. If the file exists, the run continues exactly where the
+            saved one stopped, and a finished run returns its result at once. An instrument
+            report then covers the continued part only
+        checkpoint_interval: Number of iterations between two checkpoints
+        sample_after: Collect a `KeyPosterior` from the states of the chain after this many
+            burn-in iterations. Only accepted swaps update it, so sampling costs almost
+            nothing. With the `constant` schedule the chain samples the posterior of the
+            keys at `initial_temp`; with a cooling schedule the frequencies show how settled
+            each letter was while the chain cooled down
 
     Returns:
-        tuple containing the best key found and its score
+        SolverResult with the best key, its score, the number of iterations used and why the run stopped
+
+    Raises:
+        ValueError: If the checkpoint belongs to a different ciphertext, iteration count, model
+            or schedule, or was saved without the posterior requested by `sample_after`
     """
-    current_key = list(ALPHABET)
-    random.shuffle(current_key)
-    current_key = ''.join(current_key)
+    clock = time.perf_counter
+    start = clock()
+    schedule = create_schedule(schedule, initial_temp, iterations)
+    recorder = RunRecorder(iterations, initial_temp) if instrument else None
+    rng = create_rng(seed)
+
+    # The chain works on the integer mapping held by the scorer; keys are only built for
+    # the callback and the result
+    scorer = create_scorer(ciphertext, tm_ref, delta_scoring)
+    fingerprint = None
+    if checkpoint is not None:
+        fingerprint = run_fingerprint(ciphertext, iterations, tm_ref, schedule, initial_temp, delta_scoring)
+    saved = load_checkpoint(checkpoint) if checkpoint is not None and Path(checkpoint).exists() else None
+
+    if saved is None:
+        current_score = scorer.reset(initial_decode(ciphertext, tm_ref, scorer, init, initial_key, rng))
+        best_decode = scorer.decode.copy()
+        best_score = current_score
+        best_iteration = performed = 0
+        previous_elapsed = 0.0
+    else:
+        if saved.fingerprint != fingerprint:
+            raise ValueError(f"Checkpoint {checkpoint} belongs to a different ciphertext, iteration count, "
+                             f"model or schedule")
+        if sample_after is not None and saved.posterior_counts is None and saved.iteration > sample_after:
+            raise ValueError(f"Checkpoint {checkpoint} was saved without posterior sampling")
+        # The accumulated score is kept instead of the rescored one, so the chain continues bit for bit
+        scorer.reset(saved.decode)
+        current_score = saved.current_score
+        best_decode, best_score, best_iteration = saved.best_decode, saved.best_score, saved.best_iteration
+        performed = saved.iteration
+        previous_elapsed = saved.elapsed
+        rng.bit_generator.state = saved.rng_state
+        vars(schedule).update(saved.schedule_state)
+    if callback is not None:
+        callback(best_iteration, decode_to_key(best_decode), best_score)
+    sampler = None
+    if sample_after is not None:
+        sampler = PosteriorRecorder(scorer.decode, sample_after, saved.posterior_counts if saved is not None else None,
+                                    performed)
+
+    def save(reason: StopReason | None) -> None:
+        save_checkpoint(SolverCheckpoint(fingerprint=fingerprint, iteration=performed, decode=scorer.decode,
+                                         current_score=current_score, best_decode=best_decode, best_score=best_score,
+                                         best_iteration=best_iteration, elapsed=previous_elapsed + clock() - start,
+                                         rng_state=block_state if performed < block_end else rng.bit_generator.state,
+                                         schedule_state=vars(schedule), stop_reason=reason,
+                                         posterior_counts=sampler.flush(performed)
+                                         if sampler is not None else None), checkpoint)
 
-    current_text = substitute_decrypt(ciphertext, current_key)
-    current_score = calculate_plausibility(current_text, tm_ref)
+    if recorder is not None:
+        recorder.setup(clock() - start)
 
-    best_key = current_key
-    best_score = current_score
+    deadline = start - previous_elapsed + time_budget if time_budget is not None else None
+    stop_reason = StopReason(saved.stop_reason) if saved is not None and saved.stop_reason else StopReason.ITERATIONS
+    # A finished run is not continued
+    first = iterations if saved is not None and saved.stop_reason else performed
 
-    min_temp = 1e-10  # Minimum temperature to prevent division by zero
+    # Proposals are drawn for blocks of iterations starting at multiples of PROPOSAL_BLOCK; a
+    # checkpoint stores the generator state the current block was drawn from
+    block_start = block_end = first - first % PROPOSAL_BLOCK
+    block_state = rng.bit_generator.state
+    firsts = seconds = thresholds = ()
+    if block_start < first:
+        firsts, seconds, thresholds = draw_proposals(rng, min(PROPOSAL_BLOCK, iterations - block_start))
+        block_end = block_start + len(firsts)
 
-    for i in range(iterations):
-        temperature = max(initial_temp * (1 - i / iterations), min_temp)
+    for i in range(first, iterations):
+        if target_score is not None and best_score >= target_score:
+            stop_reason = StopReason.TARGET_SCORE
+            break
+        if patience is not None and i - best_iteration >= patience:
+            stop_reason = StopReason.PATIENCE
+            break
+        if deadline is not None and clock() >= deadline:
+            stop_reason = StopReason.TIME_BUDGET
+            break
 
-        new_key = list(current_key)
-        idx1, idx2 = random.sample(range(len(ALPHABET)), 2)
-        new_key[idx1], new_key[idx2] = new_key[idx2], new_key[idx1]
-        new_key = ''.join(new_key)
+        temperature = schedule.temperature(i)
+        if recorder is not None:
+            propose_start = clock()
 
-        new_text = substitute_decrypt(ciphertext, new_key)
-        new_score = calculate_plausibility(new_text, tm_ref)
+        if i == block_end:
+            block_start, block_state = i, rng.bit_generator.state
+            firsts, seconds, thresholds = draw_proposals(rng, min(PROPOSAL_BLOCK, iterations - i))
+            block_end = i + len(firsts)
 
-        score_diff = 0.0
-        try:
-            score_diff = new_score - current_score
-            acceptance_probability = math.exp(min(score_diff / temperature, 700))  # Limit exponent to prevent overflow
-        except (OverflowError, ZeroDivisionError):
-            acceptance_probability = 1.0 if score_diff and score_diff  > 0 else 0.0
+        # Two distinct ciphertext symbols whose plaintext images are swapped
+        j = i - block_start
+        a, b = firsts[j], seconds[j]
 
-        if new_score > current_score or random.random() < acceptance_probability:
-            current_key = new_key
-            current_score = new_score
+        if recorder is not None:
+            score_start = clock()
+        score_diff = scorer.swap_delta(a, b)
+        if recorder is not None:
+            accept_start = clock()
+
+        # The Metropolis criterion, see `draw_proposals`
+        accept = score_diff > thresholds[j] * temperature
+        schedule.observe(accept)
+
+        if accept:
+            if sampler is not None:
+                sampler.swap(i, a, b)
+            scorer.swap(a, b)
+            current_score += score_diff
 
             if current_score > best_score:
-                best_key = current_key
+                best_decode[:] = scorer.decode
                 best_score = current_score
+                best_iteration = i + 1
+                if callback is not None:
+                    callback(i + 1, decode_to_key(best_decode), best_score)
+
+        performed = i + 1
+        if recorder is not None:
+            recorder.record(performed, temperature, score_diff, accept, propose_start, score_start, accept_start,
+                            clock(), current_score, best_score)
+        if verbose and performed % 500 == 0:
+            print(f"\rIteration {performed:5d} | current score: {current_score:.4f} | best score: {best_score:.4f}", end="\033[K")
+        if checkpoint is not None and performed % checkpoint_interval == 0 and performed < iterations:
+            save(None)
+
+    if checkpoint is not None:
+        save(stop_reason)
+    elapsed = previous_elapsed + clock() - start
+    return SolverResult(key=decode_to_key(best_decode), score=best_score, iterations=performed, stop_reason=stop_reason,
+                        elapsed=elapsed, seed=seed if isinstance(seed, int) else None,
+                        report=recorder.finish(elapsed) if recorder is not None else None,
+                        posterior=sampler.finish(performed) if sampler is not None else None)
+
 
-        if (i + 1) % 500 == 0:
-            print(f"\rIteration {i + 1:5d} | current score: {current_score:.4f} | best score: {best_score:.4f}", end="\033[K")
+def metropolis_hastings(ciphertext: str, tm_ref: LanguageModel, iterations: int = 20000, initial_temp: float = 1.0,
+                        delta_scoring: bool = True, seed: Seed = None, verbose: bool = True,
+                        callback: Callable[[int, str, float], None] | None = None, patience: int | None = None,
+                        target_score: float | None = None, time_budget: float | None = None,
+                        schedule: str | Schedule = "linear", init: str = "random",
+                        initial_key: str | None = None) -> tuple[str, float]:
+    """
+    Implements the Metropolis-Hastings algorithm with simulated annealing.
+
+    This is a shorthand for `solve`, which additionally reports the number of iterations
+    used and why the run stopped.
 
-    return best_key, best_score
\ No newline at end of file
+    Args:
+        ciphertext: The encrypted text to decrypt
+        tm_ref: Reference transition matrix, or an `NgramModel` of order 2 to 4
+        iterations: Number of iterations to perform
+        initial_temp: Initial temperature for simulated annealing
+        delta_scoring: Score proposals from the ciphertext n-gram counts, rescoring only the
+            n-grams that contain one of the two swapped symbols. When False, every proposal
+            decrypts and rescores the whole text. Both modes yield the same scores.
+        seed: Seed of the `numpy.random.Generator` of this run, or the generator itself, see
+            `create_rng`. When None, the generator is seeded from the operating system
+        verbose: Whether to print the progress every 500 iterations
+        callback: Called with the iteration number, key and score whenever a new best key is found
+        patience: Stop when the best score has not improved for this many iterations
+        target_score: Stop as soon as the best score reaches this value
+        time_budget: Stop after this many seconds of wall time
+        schedule: Temperature schedule, a name from `SCHEDULES` or a `Schedule` object
+        init: How to choose the initial key: `random`, `frequency` or `greedy`, see `initial_decode`
+        initial_key: Start from this key instead; `init` is then ignored
+
+    Returns:
+        tuple containing the best key found and its score
+    """
+    result = solve(ciphertext, tm_ref, iterations=iterations, initial_temp=initial_temp, delta_scoring=delta_scoring,
+                   seed=seed, verbose=verbose, callback=callback, patience=patience, target_score=target_score,
+                   time_budget=time_budget, schedule=schedule, init=init, initial_key=initial_key)
+    return result.key, result.score
+
+
+def solve_joint(ciphertexts: Iterable[str] | CiphertextPool, tm_ref: LanguageModel,
+                solver: Callable[..., SolverResult] = solve, **options) -> SolverResult:
+    """
+    Search for one key shared by several messages.
+
+    The n-gram counts of the messages are pooled without joining the messages, so many short
+    messages give the solver as much signal as one long text. To add messages later, keep
+    the `CiphertextPool`, `add` them and solve again with `initial_key` set to the previous key.
+
+    Args:
+        ciphertexts: The encrypted messages, or a `CiphertextPool` of them
+        tm_ref: Reference transition matrix, or an `NgramModel` of order 2 to 4
+        solver: The solver to run, `solve` or `solve_tempering`
+        options: Further keyword arguments of the solver. Both solvers accept `iterations`,
+            `delta_scoring`, `seed`, `verbose`, `callback`, `patience`, `target_score`,
+            `time_budget`, `init`, `initial_key` and `sample_after`; `solve` also takes
+            `initial_temp`, `schedule`, `instrument`, `checkpoint` and `checkpoint_interval`,
+            `solve_tempering` takes `replicas`, `min_temp`, `max_temp` and `exchange_interval`
+
+    Returns:
+        SolverResult with the shared key and its joint score over all messages
+
+    Raises:
+        ValueError: If there is no message, or a message contains a character outside of `ALPHABET`
+    """
+    pool = ciphertexts if isinstance(ciphertexts, CiphertextPool) else CiphertextPool(ciphertexts)
+    if not len(pool):
+        raise ValueError("At least one ciphertext is required")
+    return solver(pool, tm_ref, **options)
@@ -0,0 +1,218 @@
+import argparse
+import hashlib
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from subcipher.constants import ALPHABET
+from subcipher.ngram import MAX_ORDER, MIN_ORDER, NgramModel, build_ngram_model_from_file
+from subcipher.utils import DEFAULT_PROFILE, NORMALIZATION_PROFILES
+
+MODEL_MAGIC = b"SUBCMODL"
+MODEL_VERSION = 1
+MODEL_SUFFIX = ".scm"
+
+# magic, version, order, count item size, alphabet length, smoothing, counts offset, log_probs offset,
+# profile, checksum
+_HEADER = struct.Struct("<8sHBBIdQQ16s32s")
+_ALIGNMENT = 64
+_COUNT_TYPES = (np.uint8, np.uint16, np.uint32, np.uint64)
+
+
+@dataclass
+class MappedNgramModel(NgramModel):
+    """
+    An `NgramModel` whose arrays are memory-mapped from a model file.
+
+    When pickled, e.g. to be sent to worker processes, only the path is transferred and the
+    receiving process maps the same file again.
+
+    :ivar path: Path of the model file.
+    :ivar profile: Name of the normalization profile of the corpus, None if it was not given
+        to `save_model`.
+    """
+    path: Path | None = None
+    profile: str | None = None
+
+    def __reduce__(self):
+        return load_model, (self.path, False)
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _compact_counts(counts: np.ndarray) -> np.ndarray:
+    largest = int(counts.max(initial=0))
+    if int(counts.min(initial=0)) < 0:
+        raise ValueError("Counts must not be negative")
+    for dtype in _COUNT_TYPES:
+        if largest <= np.iinfo(dtype).max:
+            return counts.astype(np.dtype(dtype).newbyteorder('<'))
+
+
+def _checksum(header: bytes, body) -> bytes:
+    # The checksum field is the last one of the header and is not covered
+    digest = hashlib.sha256(header[:-32])
+    digest.update(body)
+    return digest.digest()
+
+
+def is_model_file(file_path: str | Path) -> bool:
+    """
+    Check whether a file is a model file by its magic bytes.
+
+    :param file_path: Path of the file.
+    :type file_path: str | Path
+    :return: True if the file starts with `MODEL_MAGIC`.
+    :rtype: bool
+    """
+    try:
+        with open(file_path, 'rb') as file:
+            return file.read(len(MODEL_MAGIC)) == MODEL_MAGIC
+    except OSError:
+        return False
+
+
+def save_model(model: NgramModel, file_path: str | Path, profile: str | None = None) -> None:
+    """
+    Write an n-gram model to a model file.
+
+    The file holds a little-endian header with the order, smoothing, profile name and a
+    SHA-256 checksum of the rest, the alphabet, the counts in the smallest unsigned type
+    holding them and the float64 log-probabilities. Both arrays start at 64-byte aligned
+    offsets, so `load_model` can map them. The file is written to a temporary path first and
+    renamed, so concurrent readers never see a partial file.
+
+    :param model: The model to save.
+    :type model: NgramModel
+    :param file_path: Path of the model file; parent directories are created.
+    :type file_path: str | Path
+    :param profile: Name of the normalization profile of the corpus, see
+        `NORMALIZATION_PROFILES`; None if it is not known.
+    :type profile: str | None
+    :raises ValueError: If the counts are negative or the profile name is longer than 16 bytes.
+    """
+    profile_name = (profile or "").encode('utf-8')
+    if len(profile_name) > 16:
+        raise ValueError(f"Profile name '{profile}' is too long for a model file")
+    alphabet = model.alphabet.encode('utf-8')
+    counts = _compact_counts(np.asarray(model.counts))
+    log_probs = np.asarray(model.log_probs, dtype='<f8')
+
+    counts_offset = _align(_HEADER.size + len(alphabet))
+    log_probs_offset = _align(counts_offset + counts.nbytes)
+    body = bytearray(log_probs_offset + log_probs.nbytes - _HEADER.size)
+    body[:len(alphabet)] = alphabet
+    body[counts_offset - _HEADER.size:counts_offset - _HEADER.size + counts.nbytes] = counts.tobytes()
+    body[log_probs_offset - _HEADER.size:] = log_probs.tobytes()
+
+    fields = (MODEL_MAGIC, MODEL_VERSION, model.n, counts.itemsize, len(alphabet), model.smoothing,
+              counts_offset, log_probs_offset, profile_name)
+    header = _HEADER.pack(*fields, bytes(32))
+    header = _HEADER.pack(*fields, _checksum(header, body))
+
+    path = Path(file_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as file:
+        file.write(header)
+        file.write(body)
+    os.replace(tmp_path, path)
+
+
+def load_model(file_path: str | Path, verify: bool = True) -> MappedNgramModel:
+    """
+    Load an n-gram model from a model file with memory mapping.
+
+    :param file_path: Path of the model file.
+    :type file_path: str | Path
+    :param verify: Whether to check the checksum, which reads the whole file once.
+    :type verify: bool
+    :return: The model; its arrays are read-only views of the file and its counts keep the
+        compact integer type of the file.
+    :rtype: MappedNgramModel
+    :raises ValueError: If the file is not a model file, has an unsupported version, is
+        truncated or fails the checksum.
+    :raises FileNotFoundError: If the file does not exist.
+    """
+    path = Path(file_path)
+    if os.path.getsize(path) < _HEADER.size:
+        raise ValueError(f"{path} is not a model file")
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+
+    magic, version, n, itemsize, alphabet_size, smoothing, counts_offset, log_probs_offset, profile, checksum = \
+        _HEADER.unpack(data[:_HEADER.size].tobytes())
+    if magic != MODEL_MAGIC:
+        raise ValueError(f"{path} is not a model file")
+    if version != MODEL_VERSION:
+        raise ValueError(f"Unsupported model file version {version}, expected {MODEL_VERSION}")
+
+    alphabet = data[_HEADER.size:_HEADER.size + alphabet_size].tobytes().decode('utf-8')
+    shape = (len(alphabet),) * n
+    size = len(alphabet) ** n
+    if len(data) != log_probs_offset + size * 8:
+        raise ValueError(f"Model file {path} is truncated")
+    if verify and _checksum(data[:_HEADER.size].tobytes(), data[_HEADER.size:]) != checksum:
+        raise ValueError(f"Model file {path} is corrupted")
+
+    count_type = np.dtype(f"<u{itemsize}")
+    counts = data[counts_offset:counts_offset + size * itemsize].view(count_type).reshape(shape)
+    log_probs = data[log_probs_offset:].view('<f8').reshape(shape)
+    return MappedNgramModel(n=n, alphabet=alphabet, counts=counts, smoothing=smoothing, log_probs=log_probs,
+                            path=path, profile=profile.rstrip(b"\0").decode('utf-8') or None)
+
+
+def build_model_file(corpora: list[str | Path], output_path: str | Path, n: int = 2, alphabet: str = ALPHABET,
+                     smoothing: float = 1.0, profile: str = DEFAULT_PROFILE) -> NgramModel:
+    """
+    Build an n-gram model of one or more corpora and save it as a model file.
+
+    The counts of the corpora are added up; no n-gram spans two corpora.
+
+    :param corpora: Paths of the reference text files.
+    :type corpora: list[str | Path]
+    :param output_path: Path of the model file.
+    :type output_path: str | Path
+    :param n: The n-gram order, between `MIN_ORDER` and `MAX_ORDER`.
+    :type n: int
+    :param alphabet: The alphabet of the model.
+    :type alphabet: str
+    :param smoothing: The pseudo-count added to every n-gram.
+    :type smoothing: float
+    :param profile: The language profile of the normalization, see `NORMALIZATION_PROFILES`.
+    :type profile: str
+    :return: The built model.
+    :rtype: NgramModel
+    :raises ValueError: If no corpus is given, the order is not supported or the profile is unknown.
+    :raises FileNotFoundError: If a corpus does not exist.
+    """
+    if not corpora:
+        raise ValueError("At least one corpus is required")
+    counts = sum(build_ngram_model_from_file(corpus, n, alphabet, profile=profile).counts for corpus in corpora)
+    model = NgramModel.from_counts(counts, alphabet, smoothing)
+    save_model(model, output_path, profile)
+    return model
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog='subcipher.py build-model',
+                                     description='SubCipher - build a language model file from corpora')
+    parser.add_argument('corpora', type=str, nargs='+', metavar='CORPUS', help='Paths to reference text files')
+    parser.add_argument('--output', '-o', type=str, required=True,
+                        help=f'Path of the model file (conventionally with the {MODEL_SUFFIX} suffix)')
+    parser.add_argument('--ngram', '-n', type=int, default=2, choices=range(MIN_ORDER, MAX_ORDER + 1),
+                        help='Order of the n-gram language model')
+    parser.add_argument('--smoothing', type=float, default=1.0, help='Pseudo-count added to every n-gram')
+    parser.add_argument('--profile', type=str, default=DEFAULT_PROFILE, choices=list(NORMALIZATION_PROFILES),
+                        help='Language profile of the corpus normalization')
+    args = parser.parse_args(argv)
+    if args.smoothing <= 0:
+        parser.error("--smoothing has to be positive")
+
+    model = build_model_file(args.corpora, args.output, args.ngram, ALPHABET, args.smoothing, args.profile)
+    print(f"Saved {model.n}-gram model of {int(model.counts.sum())} n-grams to {args.output} "
+          f"({os.path.getsize(args.output)} bytes)")
@@ -0,0 +1,187 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from subcipher.analysis import EPSILON, encode_text
+from subcipher.constants import ALPHABET
+from subcipher.utils import DEFAULT_CHUNK_SIZE, DEFAULT_PROFILE, normalize_chunks, normalize_text, read_chunks
+
+MIN_ORDER = 2
+MAX_ORDER = 4
+
+
+def _check_order(n: int) -> None:
+    if not MIN_ORDER <= n <= MAX_ORDER:
+        raise ValueError(f"N-gram order has to be between {MIN_ORDER} and {MAX_ORDER}")
+
+
+def ngram_ids(encoded: np.ndarray, n: int, size: int = len(ALPHABET)) -> np.ndarray:
+    """
+    Compute the flat index of every n-gram of an encoded text.
+
+    The index of the n-gram (c1, ..., cn) is `c1 * size**(n-1) + ... + cn`, i.e. its position
+    in a C-ordered array of shape `(size,) * n`. N-grams containing an index outside of the
+    alphabet (such as `UNKNOWN`) are skipped.
+
+    :param encoded: A 1D array of alphabet indices, as returned by `encode_text`.
+    :type encoded: np.ndarray
+    :param n: The n-gram order.
+    :type n: int
+    :param size: The size of the alphabet the indices refer to.
+    :type size: int
+    :return: A 1D int64 array of flat n-gram indices in text order.
+    :rtype: np.ndarray
+    """
+    encoded = np.asarray(encoded, dtype=np.int64)
+    length = len(encoded) - n + 1
+    if length <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    ids = np.zeros(length, dtype=np.int64)
+    valid = np.ones(length, dtype=bool)
+    for k in range(n):
+        window = encoded[k:k + length]
+        ids = ids * size + window
+        valid &= window < size
+    return ids if valid.all() else ids[valid]
+
+
+def ngram_counts(encoded: np.ndarray, n: int, size: int = len(ALPHABET)) -> np.ndarray:
+    """
+    Count the n-grams of an encoded text into a dense array.
+
+    :param encoded: A 1D array of alphabet indices, as returned by `encode_text`.
+    :type encoded: np.ndarray
+    :param n: The n-gram order.
+    :type n: int
+    :param size: The size of the alphabet the indices refer to.
+    :type size: int
+    :return: An integer array of shape `(size,) * n` holding the number of occurrences of
+        every n-gram. For `n == 2` this equals `bigram_counts`.
+    :rtype: np.ndarray
+    """
+    return np.bincount(ngram_ids(encoded, n, size), minlength=size ** n).reshape((size,) * n)
+
+
+@dataclass
+class NgramModel:
+    """
+    Character n-gram language model with add-k smoothing.
+
+    The log-probabilities are stored densely, so looking up any n-gram is a single array
+    access. A bigram model with `smoothing=1.0` scores texts exactly like the transition
+    matrix returned by `transition_matrix`.
+
+    :ivar n: The n-gram order, between `MIN_ORDER` and `MAX_ORDER`.
+    :ivar alphabet: The alphabet defining the axes of the arrays.
+    :ivar counts: Raw n-gram counts, an array of shape `(len(alphabet),) * n`.
+    :ivar smoothing: The pseudo-count added to every n-gram.
+    :ivar log_probs: Log-probabilities of all n-grams, an array of the same shape as `counts`.
+    """
+    n: int
+    alphabet: str
+    counts: np.ndarray
+    smoothing: float
+    log_probs: np.ndarray
+
+    @classmethod
+    def from_counts(cls, counts: np.ndarray, alphabet: str = ALPHABET, smoothing: float = 1.0) -> "NgramModel":
+        """
+        Create a model from raw n-gram counts.
+
+        :param counts: Raw n-gram counts of shape `(len(alphabet),) * n`.
+        :type counts: np.ndarray
+        :param alphabet: The alphabet of the model.
+        :type alphabet: str
+        :param smoothing: The pseudo-count added to every n-gram; has to be positive.
+        :type smoothing: float
+        :return: The n-gram model.
+        :rtype: NgramModel
+        :raises ValueError: If the order or the shape of `counts` is invalid, or `smoothing` is not positive.
+        """
+        n = counts.ndim
+        _check_order(n)
+        if counts.shape != (len(alphabet),) * n:
+            raise ValueError("Counts have to be of shape (len(alphabet),) * n")
+        if smoothing <= 0:
+            raise ValueError("Smoothing has to be positive")
+
+        probs = counts + smoothing
+        probs = probs / probs.sum()
+        return cls(n=n, alphabet=alphabet, counts=counts, smoothing=smoothing, log_probs=np.log(probs + EPSILON))
+
+    def plausibility(self, text: str) -> float:
+        """
+        Calculate the logarithmic plausibility of a text under this model.
+
+        :param text: Input string consisting of characters of the model's alphabet.
+        :type text: str
+        :return: The sum of the log-probabilities of all n-grams of the text.
+        :rtype: float
+        :raises ValueError: If the text contains a character outside of the alphabet.
+        """
+        ids = ngram_ids(encode_text(text, self.alphabet), self.n, len(self.alphabet))
+        return float(self.log_probs.reshape(-1)[ids].sum())
+
+
+def build_ngram_model(text: str, n: int, alphabet: str = ALPHABET, smoothing: float = 1.0,
+                      profile: str = DEFAULT_PROFILE) -> NgramModel:
+    """
+    Build an n-gram model from a raw reference text.
+
+    :param text: The reference text; it is normalized with `normalize_text` first.
+    :type text: str
+    :param n: The n-gram order, between `MIN_ORDER` and `MAX_ORDER`.
+    :type n: int
+    :param alphabet: The alphabet of the model.
+    :type alphabet: str
+    :param smoothing: The pseudo-count added to every n-gram.
+    :type smoothing: float
+    :param profile: The language profile of the normalization, see `NORMALIZATION_PROFILES`.
+    :type profile: str
+    :return: The n-gram model of the text.
+    :rtype: NgramModel
+    :raises ValueError: If the order is not supported.
+    """
+    _check_order(n)
+    counts = ngram_counts(encode_text(normalize_text(text, profile), alphabet, strict=False), n, len(alphabet))
+    return NgramModel.from_counts(counts, alphabet, smoothing)
+
+
+def build_ngram_model_from_file(file_path: str | Path, n: int, alphabet: str = ALPHABET, smoothing: float = 1.0,
+                                chunk_size: int = DEFAULT_CHUNK_SIZE, profile: str = DEFAULT_PROFILE) -> NgramModel:
+    """
+    Build an n-gram model of a reference file by streaming it in chunks.
+
+    The last `n - 1` characters of every chunk are carried over to the next one, so the
+    result equals `build_ngram_model` of the whole file.
+
+    :param file_path: Path of the reference text file.
+    :type file_path: str | Path
+    :param n: The n-gram order, between `MIN_ORDER` and `MAX_ORDER`.
+    :type n: int
+    :param alphabet: The alphabet of the model.
+    :type alphabet: str
+    :param smoothing: The pseudo-count added to every n-gram.
+    :type smoothing: float
+    :param chunk_size: Number of characters read at once.
+    :type chunk_size: int
+    :param profile: The language profile of the normalization, see `NORMALIZATION_PROFILES`.
+    :type profile: str
+    :return: The n-gram model of the file.
+    :rtype: NgramModel
+    :raises ValueError: If the order is not supported.
+    :raises FileNotFoundError: If the reference file does not exist.
+    """
+    _check_order(n)
+    size = len(alphabet)
+    counts = np.zeros(size ** n, dtype=np.int64)
+    previous = np.empty(0, dtype=np.uint8)
+
+    for chunk in normalize_chunks(read_chunks(file_path, chunk_size), profile):
+        encoded = np.concatenate((previous, encode_text(chunk, alphabet, strict=False)))
+        counts += np.bincount(ngram_ids(encoded, n, size), minlength=size ** n)
+        previous = encoded[-(n - 1):]
+
+    return NgramModel.from_counts(counts.reshape((size,) * n), alphabet, smoothing)
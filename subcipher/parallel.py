@@ -0,0 +1,93 @@
+import os
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from subcipher.mh_solver import SolverResult, solve
+from subcipher.scoring import LanguageModel
+
+
+def chain_seeds(restarts: int, seed: int | None = None) -> list[int]:
+    """
+    Derive one independent seed per chain.
+
+    The seeds come from children spawned from the `numpy.random.SeedSequence` of the base
+    seed, so the random streams of the chains are independent, while every chain can still be
+    reproduced alone from its integer seed.
+
+    :param restarts: Number of chains.
+    :type restarts: int
+    :param seed: Base seed. When None, the seeds are drawn from the operating system.
+    :type seed: int | None
+    :return: A list of `restarts` distinct seeds.
+    :rtype: list[int]
+    """
+    seeds: list[int] = []
+    for child in np.random.SeedSequence(seed).spawn(restarts):
+        candidate = int(child.generate_state(1, np.uint64)[0] >> np.uint64(1))
+        while candidate in seeds:
+            # Colliding 63-bit seeds are practically impossible, but the chains have to differ
+            child = child.spawn(1)[0]
+            candidate = int(child.generate_state(1, np.uint64)[0] >> np.uint64(1))
+        seeds.append(candidate)
+    return seeds
+
+
+def _run_chain(solver: Callable[..., SolverResult], ciphertext: str, tm_ref: LanguageModel, seed: int,
+               options: dict) -> SolverResult:
+    return solver(ciphertext, tm_ref, seed=seed, verbose=False, **options)
+
+
+def solve_parallel(ciphertext: str, tm_ref: LanguageModel, restarts: int = 8, workers: int | None = None,
+                   seed: int | None = None, solver: Callable[..., SolverResult] = solve,
+                   **options) -> tuple[str, float, list[SolverResult]]:
+    """
+    Run several independent Metropolis-Hastings chains and keep the best key.
+
+    Every chain starts from its own random key with its own seed. The chains are spread
+    across a process pool, so the restarts run on all available CPU cores.
+
+    :param ciphertext: The encrypted text to decrypt.
+    :type ciphertext: str
+    :param tm_ref: Reference transition matrix or n-gram model.
+    :type tm_ref: LanguageModel
+    :param restarts: Number of independent chains to run.
+    :type restarts: int
+    :param workers: Number of worker processes. Defaults to the number of CPU cores; with a
+        single worker the chains run in the calling process.
+    :type workers: int | None
+    :param seed: Base seed from which the chain seeds are derived, making the whole run reproducible.
+    :type seed: int | None
+    :param solver: The solver running a chain, `solve` or `solve_tempering`; it has to be a
+        module-level function so it can be sent to the worker processes.
+    :type solver: Callable[..., SolverResult]
+    :param options: Further keyword arguments of the solver applied to every chain, e.g.
+        `iterations`, `initial_temp` or `patience`.
+    :return: The best key, its score and the results of all chains in the order they were started.
+    :rtype: tuple[str, float, list[SolverResult]]
+    :raises ValueError: If `restarts` or `workers` is smaller than one, or a `checkpoint` is
+        given for more than one chain, as the chains would overwrite each other's file.
+    """
+    if restarts < 1:
+        raise ValueError("At least one restart is required")
+    if options.get("checkpoint") is not None and restarts > 1:
+        raise ValueError("A checkpoint supports a single chain only")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("At least one worker is required")
+
+    seeds = chain_seeds(restarts, seed)
+    workers = min(workers, restarts)
+
+    if workers == 1:
+        chains = [_run_chain(solver, ciphertext, tm_ref, chain_seed, options) for chain_seed in seeds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_run_chain, solver, ciphertext, tm_ref, chain_seed, options)
+                       for chain_seed in seeds]
+            chains = [future.result() for future in futures]
+
+    best = max(chains, key=lambda chain: chain.score)
+    return best.key, best.score, chains
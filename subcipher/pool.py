@@ -0,0 +1,96 @@
+from collections.abc import Iterable
+from pathlib import Path
+
+import numpy as np
+
+from subcipher.analysis import encode_text
+from subcipher.constants import ALPHABET
+from subcipher.largefile import file_ngram_counts
+from subcipher.ngram import ngram_counts
+
+
+class CiphertextPool:
+    """
+    A collection of ciphertexts encrypted with one shared key, with pooled n-gram counts.
+
+    The n-gram counts of every message are added up, so no n-gram spans two messages. The
+    pooled counts of each order are computed on first use and kept up to date by `add`, so
+    messages can be added incrementally without recounting the earlier ones. A pool can be
+    passed to the solvers in place of a single ciphertext.
+
+    Ciphertexts too large to be held as strings are added with `add_file`; their counts are
+    streamed from the memory-mapped file whenever a new order is requested.
+
+    :param ciphertexts: The initial messages.
+    :type ciphertexts: Iterable[str]
+    :raises ValueError: If a message contains a character outside of `ALPHABET`.
+    """
+
+    def __init__(self, ciphertexts: Iterable[str] = ()):
+        self.messages: list[str] = []
+        self.files: list[Path] = []
+        self._encoded: list[np.ndarray] = []
+        self._counts: dict[int, np.ndarray] = {}
+        for ciphertext in ciphertexts:
+            self.add(ciphertext)
+
+    def __len__(self) -> int:
+        return len(self.messages) + len(self.files)
+
+    def add(self, ciphertext: str) -> None:
+        """
+        Add a message to the pool and update the cached counts.
+
+        :param ciphertext: The encrypted message.
+        :type ciphertext: str
+        :raises ValueError: If the message contains a character outside of `ALPHABET`.
+        """
+        encoded = encode_text(ciphertext.upper())
+        self.messages.append(ciphertext)
+        self._encoded.append(encoded)
+        for n, counts in self._counts.items():
+            counts += ngram_counts(encoded, n)
+
+    def add_file(self, file_path: str | Path) -> None:
+        """
+        Add a ciphertext file to the pool without loading it into memory.
+
+        The file is memory-mapped and counted by `file_ngram_counts`, so lowercase letters are
+        counted as uppercase and other bytes, such as line breaks, are skipped.
+
+        :param file_path: Path of the ciphertext file.
+        :type file_path: str | Path
+        :raises FileNotFoundError: If the file does not exist.
+        """
+        file_path = Path(file_path)
+        counts = {n: file_ngram_counts(file_path, n) for n in self._counts}
+        self.files.append(file_path)
+        for n, file_counts in counts.items():
+            self._counts[n] += file_counts
+
+    def counts(self, n: int) -> np.ndarray:
+        """
+        Return the pooled n-gram counts of all messages.
+
+        :param n: The n-gram order; 1 counts single symbols.
+        :type n: int
+        :return: An integer array of shape `(len(ALPHABET),) * n`. It is cached and updated
+            in place when messages are added, so it must not be modified.
+        :rtype: np.ndarray
+        """
+        if n not in self._counts:
+            counts = np.zeros((len(ALPHABET),) * n, dtype=np.int64)
+            for encoded in self._encoded:
+                counts += ngram_counts(encoded, n)
+            for file_path in self.files:
+                counts += file_ngram_counts(file_path, n)
+            self._counts[n] = counts
+        return self._counts[n]
+
+    def __getstate__(self) -> dict:
+        # Only the messages and file paths are sent to worker processes; the counts are cheap to rebuild
+        return {"messages": self.messages, "files": self.files}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["messages"])
+        self.files = state["files"]
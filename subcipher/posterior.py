@@ -0,0 +1,207 @@
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from subcipher.constants import ALPHABET
+from subcipher.scoring import key_to_decode
+
+DEFAULT_CONFIDENCE = 0.9  # Confidence from which a letter is shown in a partial decryption
+PLACEHOLDER = "?"
+
+
+@dataclass
+class KeyPosterior:
+    """
+    Mapping frequencies of the ciphertext symbols over the sampled states of a chain.
+
+    :ivar counts: Square integer array; `counts[c, p]` is the number of sampled states in
+        which ciphertext symbol `c` was decrypted to plaintext symbol `p`. Every row sums to
+        `samples`.
+    :ivar samples: Number of sampled states.
+    """
+    counts: np.ndarray
+    samples: int
+
+    @property
+    def frequencies(self) -> np.ndarray:
+        """
+        The mapping frequencies, `counts` divided by `samples`; all zero without samples.
+
+        :rtype: np.ndarray
+        """
+        return self.counts / self.samples if self.samples else np.zeros(self.counts.shape)
+
+    def symbol_confidence(self, key: str) -> np.ndarray:
+        """
+        Return how often each ciphertext symbol was mapped as in a key.
+
+        :param key: The key to rate, usually the best key of the run.
+        :type key: str
+        :return: The confidence of every ciphertext symbol, indexed by its position in `ALPHABET`.
+        :rtype: np.ndarray
+        """
+        decode = key_to_decode(key)
+        return self.frequencies[np.arange(len(decode)), decode]
+
+    def letter_confidence(self, key: str) -> dict[str, float]:
+        """
+        Return the confidence of every plaintext letter of a key.
+
+        :param key: The key to rate, usually the best key of the run.
+        :type key: str
+        :return: The share of the samples in which the ciphertext symbol `key[i]` was
+            decrypted to `ALPHABET[i]`, by plaintext letter.
+        :rtype: dict[str, float]
+        """
+        confidence = self.symbol_confidence(key)
+        return {letter: float(confidence[ALPHABET.index(symbol)]) for letter, symbol in zip(ALPHABET, key)}
+
+    def ambiguous_letters(self, key: str, threshold: float = DEFAULT_CONFIDENCE) -> str:
+        """
+        Return the plaintext letters of a key whose confidence is below a threshold.
+
+        :param key: The key to rate.
+        :type key: str
+        :param threshold: The lowest confidence of an accepted letter.
+        :type threshold: float
+        :return: The ambiguous letters in the order of `ALPHABET`.
+        :rtype: str
+        """
+        return ''.join(letter for letter, value in self.letter_confidence(key).items() if value < threshold)
+
+    def partial_decrypt(self, ciphertext: str, key: str, threshold: float = DEFAULT_CONFIDENCE,
+                        placeholder: str = PLACEHOLDER) -> str:
+        """
+        Decrypt a text showing only the letters of a key with a high confidence.
+
+        :param ciphertext: The encrypted text.
+        :type ciphertext: str
+        :param key: The key to decrypt with.
+        :type key: str
+        :param threshold: The lowest confidence of a shown letter.
+        :type threshold: float
+        :param placeholder: The character replacing the ambiguous letters.
+        :type placeholder: str
+        :return: The plaintext with the ambiguous letters replaced by `placeholder`.
+        :rtype: str
+        """
+        table = {ord(symbol): letter if value >= threshold else placeholder
+                 for (letter, value), symbol in zip(self.letter_confidence(key).items(), key)}
+        return ciphertext.translate(table)
+
+    def merge(self, other: "KeyPosterior") -> "KeyPosterior":
+        """
+        Pool the samples of two chains.
+
+        :param other: The posterior of another chain over the same alphabet.
+        :type other: KeyPosterior
+        :return: A new posterior with the counts of both.
+        :rtype: KeyPosterior
+        """
+        return KeyPosterior(counts=self.counts + other.counts, samples=self.samples + other.samples)
+
+    def to_dict(self, key: str | None = None) -> dict:
+        """
+        Convert the posterior into a JSON serializable dictionary.
+
+        :param key: If given, the confidence of its letters is added as `letters`, mapping
+            every plaintext letter to its ciphertext symbol and confidence.
+        :type key: str | None
+        :rtype: dict
+        """
+        record = {"samples": self.samples, "counts": self.counts.tolist()}
+        if key is not None:
+            record["letters"] = {letter: {"symbol": symbol, "confidence": value}
+                                 for (letter, value), symbol in zip(self.letter_confidence(key).items(), key)}
+        return record
+
+    def save_json(self, path: str | Path, key: str | None = None) -> None:
+        """
+        Write the posterior as a JSON document, see `to_dict`.
+
+        :param path: The output file.
+        :type path: str | Path
+        :param key: The key whose letter confidences are included.
+        :type key: str | None
+        """
+        Path(path).write_text(json.dumps(self.to_dict(key), indent=2) + "\n", encoding='utf-8')
+
+
+class PosteriorRecorder:
+    """
+    Collects the states of a chain into a `KeyPosterior`.
+
+    Instead of adding the whole mapping after every iteration, the recorder remembers since
+    when each symbol holds its current mapping and adds the length of that stretch when the
+    mapping changes. Rejected proposals cost nothing and an accepted swap two updates of
+    plain Python lists, so the collection does not slow the chain down.
+
+    :param decode: The mapping of the chain when the recorder is created.
+    :type decode: np.ndarray
+    :param start: Number of burn-in iterations; the states after the later iterations are counted.
+    :type start: int
+    :param counts: Counts collected by an earlier part of the run, e.g. from a checkpoint.
+    :type counts: np.ndarray | None
+    :param performed: Number of iterations performed by the earlier part of the run.
+    :type performed: int
+    """
+
+    def __init__(self, decode: np.ndarray, start: int, counts: np.ndarray | None = None, performed: int = 0):
+        size = len(decode)
+        self.start = start
+        self._size = size
+        self._decode = [int(plain) for plain in decode]
+        self._counts = [0] * (size * size) if counts is None else [int(count) for count in np.ravel(counts)]
+        self._since = [max(start, performed)] * size
+
+    def _close(self, iteration: int, symbol: int) -> None:
+        held = iteration - self._since[symbol]
+        if held > 0:
+            self._counts[symbol * self._size + self._decode[symbol]] += held
+            self._since[symbol] = iteration
+
+    def swap(self, iteration: int, a: int, b: int) -> None:
+        """
+        Record that symbols `a` and `b` exchange their mappings in iteration `iteration`,
+        counted from zero.
+        """
+        self._close(iteration, a)
+        self._close(iteration, b)
+        decode = self._decode
+        decode[a], decode[b] = decode[b], decode[a]
+
+    def replace(self, iteration: int, decode: np.ndarray) -> None:
+        """
+        Record that the mapping is replaced by `decode` in iteration `iteration`, as by an
+        exchange of parallel tempering.
+        """
+        for symbol, plain in enumerate(decode.tolist()):
+            if plain != self._decode[symbol]:
+                self._close(iteration, symbol)
+                self._decode[symbol] = plain
+
+    @property
+    def counts(self) -> np.ndarray:
+        """
+        The counts of the states up to the last change of every symbol.
+
+        :rtype: np.ndarray
+        """
+        return np.array(self._counts, dtype=np.int64).reshape(self._size, self._size)
+
+    def flush(self, performed: int) -> np.ndarray:
+        """
+        Count the states up to `performed` iterations and return the counts, e.g. to save
+        them in a checkpoint.
+        """
+        for symbol in range(self._size):
+            self._close(performed, symbol)
+        return self.counts
+
+    def finish(self, performed: int) -> KeyPosterior:
+        """
+        Close the posterior of a run that ended after `performed` iterations.
+        """
+        return KeyPosterior(counts=self.flush(performed), samples=max(performed - self.start, 0))
@@ -0,0 +1,219 @@
+import hashlib
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from subcipher.analysis import bigram_counts, encode_text, log_transition_matrix, normalize_counts
+from subcipher.constants import ALPHABET
+from subcipher.modelfile import is_model_file, load_model
+from subcipher.ngram import NgramModel, build_ngram_model_from_file
+from subcipher.scoring import LanguageModel
+from subcipher.utils import DEFAULT_CHUNK_SIZE, DEFAULT_PROFILE, normalize_chunks, normalize_text, read_chunks
+
+CACHE_VERSION = 1
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+@dataclass
+class ReferenceModel:
+    """
+    Bigram statistics of a reference corpus.
+
+    :ivar alphabet: The alphabet defining the rows and columns of the matrices.
+    :ivar counts: Raw bigram counts of the normalized corpus.
+    :ivar log_probs: Log-probabilities of the smoothed transition matrix, see `log_transition_matrix`.
+    """
+    alphabet: str
+    counts: np.ndarray
+    log_probs: np.ndarray
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """
+        The smoothed transition matrix, as returned by `transition_matrix`.
+
+        :rtype: np.ndarray
+        """
+        return normalize_counts(self.counts)
+
+    @property
+    def ngram_model(self) -> NgramModel:
+        """
+        The model as a bigram `NgramModel` that scores with `log_probs` directly, exactly like `matrix`.
+
+        :rtype: NgramModel
+        """
+        return NgramModel(n=2, alphabet=self.alphabet, counts=self.counts, smoothing=1.0, log_probs=self.log_probs)
+
+
+def default_cache_dir() -> Path:
+    """
+    Return the directory used for cached reference models when none is given.
+
+    :return: `$XDG_CACHE_HOME/subcipher`, or `~/.cache/subcipher` if the variable is not set.
+    :rtype: Path
+    """
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "subcipher"
+
+
+def reference_digest(file_path: str | Path, alphabet: str = ALPHABET, profile: str = DEFAULT_PROFILE) -> str:
+    """
+    Compute the cache key of a reference file.
+
+    The key covers the file content, the alphabet, the normalization profile and the cache
+    format version, so a changed corpus, alphabet or profile never reuses a stale entry.
+
+    :param file_path: Path of the reference text file.
+    :type file_path: str | Path
+    :param alphabet: The alphabet of the model.
+    :type alphabet: str
+    :param profile: The language profile of the normalization, see `NORMALIZATION_PROFILES`.
+    :type profile: str
+    :return: A hexadecimal SHA-256 digest.
+    :rtype: str
+    """
+    digest = hashlib.sha256(f"v{CACHE_VERSION}:{alphabet}:{profile}:".encode('utf-8'))
+    with open(file_path, 'rb') as file:
+        while chunk := file.read(_HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_reference(text: str, alphabet: str = ALPHABET, profile: str = DEFAULT_PROFILE) -> ReferenceModel:
+    """
+    Build the bigram statistics of a raw reference text.
+
+    :param text: The reference text; it is normalized with `normalize_text` first.
+    :type text: str
+    :param alphabet: The alphabet of the model.
+    :type alphabet: str
+    :param profile: The language profile of the normalization, see `NORMALIZATION_PROFILES`.
+    :type profile: str
+    :return: The reference model of the text.
+    :rtype: ReferenceModel
+    """
+    counts = bigram_counts(encode_text(normalize_text(text, profile), alphabet, strict=False), len(alphabet))
+    return ReferenceModel(alphabet=alphabet, counts=counts, log_probs=log_transition_matrix(normalize_counts(counts)))
+
+
+def build_reference_from_file(file_path: str | Path, alphabet: str = ALPHABET,
+                              chunk_size: int = DEFAULT_CHUNK_SIZE, profile: str = DEFAULT_PROFILE) -> ReferenceModel:
+    """
+    Build the bigram statistics of a reference file by streaming it in chunks.
+
+    The file is read and normalized chunk by chunk and the bigram counts are accumulated
+    incrementally, carrying the last character over to the next chunk. Peak memory depends
+    on `chunk_size` only, and the result equals `build_reference` of the whole file.
+
+    :param file_path: Path of the reference text file.
+    :type file_path: str | Path
+    :param alphabet: The alphabet of the model.
+    :type alphabet: str
+    :param chunk_size: Number of characters read at once.
+    :type chunk_size: int
+    :param profile: The language profile of the normalization, see `NORMALIZATION_PROFILES`.
+    :type profile: str
+    :return: The reference model of the file.
+    :rtype: ReferenceModel
+    :raises FileNotFoundError: If the reference file does not exist.
+    """
+    size = len(alphabet)
+    counts = np.zeros((size, size), dtype=np.int64)
+    previous = np.empty(0, dtype=np.uint8)
+
+    for chunk in normalize_chunks(read_chunks(file_path, chunk_size), profile):
+        encoded = np.concatenate((previous, encode_text(chunk, alphabet, strict=False)))
+        counts += bigram_counts(encoded, size)
+        previous = encoded[-1:]
+
+    return ReferenceModel(alphabet=alphabet, counts=counts, log_probs=log_transition_matrix(normalize_counts(counts)))
+
+
+def _save_array(path: Path, array: np.ndarray) -> None:
+    # Write to a temporary file first so concurrent readers never see a partial file
+    tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npy")
+    np.save(tmp_path, array)
+    os.replace(tmp_path, path)
+
+
+def load_reference(file_path: str | Path, alphabet: str = ALPHABET, cache_dir: str | Path | None = None,
+                   rebuild: bool = False, profile: str = DEFAULT_PROFILE) -> ReferenceModel:
+    """
+    Load the reference model of a text file, building and caching it on first use.
+
+    The count and log-probability matrices are stored as `.npy` files in a subdirectory of
+    `cache_dir` named after `reference_digest`, and are loaded with memory mapping.
+
+    :param file_path: Path of the reference text file.
+    :type file_path: str | Path
+    :param alphabet: The alphabet of the model.
+    :type alphabet: str
+    :param cache_dir: Directory of the cache. Defaults to `default_cache_dir()`.
+    :type cache_dir: str | Path | None
+    :param rebuild: Whether to rebuild the model even if it is cached.
+    :type rebuild: bool
+    :param profile: The language profile of the normalization, see `NORMALIZATION_PROFILES`.
+    :type profile: str
+    :return: The reference model of the file.
+    :rtype: ReferenceModel
+    :raises FileNotFoundError: If the reference file does not exist.
+    """
+    entry = Path(cache_dir or default_cache_dir()) / reference_digest(file_path, alphabet, profile)
+    counts_path, log_probs_path = entry / "counts.npy", entry / "log_probs.npy"
+
+    if not rebuild and counts_path.exists() and log_probs_path.exists():
+        return ReferenceModel(alphabet=alphabet,
+                              counts=np.load(counts_path, mmap_mode='r'),
+                              log_probs=np.load(log_probs_path, mmap_mode='r'))
+
+    model = build_reference_from_file(file_path, alphabet, profile=profile)
+    os.makedirs(entry, exist_ok=True)
+    _save_array(counts_path, model.counts)
+    _save_array(log_probs_path, model.log_probs)
+    return model
+
+
+def load_language_model(file_path: str | Path, n: int = 2, alphabet: str = ALPHABET,
+                        cache_dir: str | Path | None = None, rebuild: bool = False,
+                        profile: str | None = None) -> LanguageModel:
+    """
+    Load the language model of a reference file as used by the solvers.
+
+    Model files written by `save_model` are recognized by their header and loaded with
+    `load_model`; their order and profile are stored in the file, so `n` is ignored and a
+    given `profile` has to match the recorded one.
+
+    :param file_path: Path of the reference text file or of a model file.
+    :type file_path: str | Path
+    :param n: The n-gram order. Bigram models are returned as the `ngram_model` of the cached
+        `load_reference` model, so the solvers score with its memory-mapped log-probabilities;
+        higher orders are built as an `NgramModel`.
+    :type n: int
+    :param alphabet: The alphabet of the model.
+    :type alphabet: str
+    :param cache_dir: Directory of the bigram cache, see `load_reference`.
+    :type cache_dir: str | Path | None
+    :param rebuild: Whether to rebuild a cached bigram model.
+    :type rebuild: bool
+    :param profile: The language profile of the normalization, see `NORMALIZATION_PROFILES`.
+        When None, text files are normalized with `DEFAULT_PROFILE` and model files keep
+        their recorded profile.
+    :type profile: str | None
+    :return: The transition matrix or n-gram model.
+    :rtype: LanguageModel
+    :raises ValueError: If the order is not supported, a model file is corrupted or was built
+        with a different profile.
+    :raises FileNotFoundError: If the reference file does not exist.
+    """
+    if is_model_file(file_path):
+        model = load_model(file_path)
+        if profile is not None and model.profile is not None and model.profile != profile:
+            raise ValueError(f"Model file {file_path} was built with the normalization profile "
+                             f"'{model.profile}', not '{profile}'")
+        return model
+    profile = profile or DEFAULT_PROFILE
+    if n == 2:
+        return load_reference(file_path, alphabet, cache_dir=cache_dir, rebuild=rebuild, profile=profile).ngram_model
+    return build_ngram_model_from_file(file_path, n, alphabet, profile=profile)
@@ -0,0 +1,179 @@
+import math
+from typing import Protocol
+
+MIN_TEMP = 1e-10  # Lowest temperature any schedule returns, keeping the acceptance test well defined
+
+
+class Schedule(Protocol):
+    """
+    Temperature schedule of a simulated annealing run.
+
+    The solver asks for the temperature before every proposal and reports whether the
+    proposal was accepted, so schedules can react to the behaviour of the chain.
+    Schedules may keep state, so a schedule object should drive a single run only.
+    """
+
+    def temperature(self, iteration: int) -> float:
+        """
+        Return the temperature of the given iteration; always at least `MIN_TEMP`.
+        """
+        ...
+
+    def observe(self, accepted: bool) -> None:
+        """
+        Report whether the proposal made at the last returned temperature was accepted.
+        """
+        ...
+
+
+class ConstantSchedule:
+    """
+    Temperature kept at `initial_temp` for the whole run, e.g. to sample keys after a burn-in.
+
+    :param initial_temp: The temperature of every iteration.
+    :type initial_temp: float
+    :param iterations: The number of iterations of the run.
+    :type iterations: int
+    """
+
+    def __init__(self, initial_temp: float, iterations: int):
+        self.initial_temp = initial_temp
+        self.iterations = iterations
+
+    def temperature(self, iteration: int) -> float:
+        return max(self.initial_temp, MIN_TEMP)
+
+    def observe(self, accepted: bool) -> None:
+        pass
+
+
+class LinearSchedule:
+    """
+    Temperature falling linearly from `initial_temp` to zero over the run.
+
+    :param initial_temp: The temperature of the first iteration.
+    :type initial_temp: float
+    :param iterations: The number of iterations of the run.
+    :type iterations: int
+    """
+
+    def __init__(self, initial_temp: float, iterations: int):
+        self.initial_temp = initial_temp
+        self.iterations = iterations
+
+    def temperature(self, iteration: int) -> float:
+        return max(self.initial_temp * (1 - iteration / self.iterations), MIN_TEMP)
+
+    def observe(self, accepted: bool) -> None:
+        pass
+
+
+class ExponentialSchedule:
+    """
+    Temperature falling geometrically from `initial_temp` to `final_temp` over the run.
+
+    :param initial_temp: The temperature of the first iteration.
+    :type initial_temp: float
+    :param iterations: The number of iterations of the run.
+    :type iterations: int
+    :param final_temp: The temperature reached at the end of the run.
+    :type final_temp: float
+    :raises ValueError: If a temperature is not positive.
+    """
+
+    def __init__(self, initial_temp: float, iterations: int, final_temp: float = 0.01):
+        if initial_temp <= 0 or final_temp <= 0:
+            raise ValueError("Temperatures of an exponential schedule have to be positive")
+        self.initial_temp = initial_temp
+        self.iterations = iterations
+        self.final_temp = final_temp
+        self._log_ratio = math.log(final_temp / initial_temp)
+
+    def temperature(self, iteration: int) -> float:
+        return max(self.initial_temp * math.exp(self._log_ratio * iteration / self.iterations), MIN_TEMP)
+
+    def observe(self, accepted: bool) -> None:
+        pass
+
+
+class AdaptiveSchedule:
+    """
+    Temperature steered towards a target acceptance rate.
+
+    After every `window` proposals the temperature is multiplied by `factor` when fewer
+    proposals than `target_rate` were accepted, and divided by it otherwise. The target itself
+    decays linearly to zero over the run, so the chain still cools down towards the end.
+
+    :param initial_temp: The temperature of the first iteration.
+    :type initial_temp: float
+    :param iterations: The number of iterations of the run.
+    :type iterations: int
+    :param target_rate: The acceptance rate aimed at in the first window.
+    :type target_rate: float
+    :param window: Number of proposals between two adjustments.
+    :type window: int
+    :param factor: Multiplicative step of an adjustment; has to be greater than one.
+    :type factor: float
+    :raises ValueError: If the target rate is not between 0 and 1, or `factor` is not greater than one.
+    """
+
+    def __init__(self, initial_temp: float, iterations: int, target_rate: float = 0.1, window: int = 100,
+                 factor: float = 1.1):
+        if not 0 < target_rate < 1:
+            raise ValueError("Target acceptance rate has to be between 0 and 1")
+        if factor <= 1:
+            raise ValueError("Adjustment factor has to be greater than one")
+        self.iterations = iterations
+        self.target_rate = target_rate
+        self.window = window
+        self.factor = factor
+        self.current_temp = max(initial_temp, MIN_TEMP)
+        self._iteration = 0
+        self._proposals = 0
+        self._accepted = 0
+
+    def temperature(self, iteration: int) -> float:
+        self._iteration = iteration
+        return self.current_temp
+
+    def observe(self, accepted: bool) -> None:
+        self._proposals += 1
+        self._accepted += accepted
+        if self._proposals < self.window:
+            return
+
+        target = self.target_rate * (1 - self._iteration / self.iterations)
+        if self._accepted < target * self._proposals:
+            self.current_temp *= self.factor
+        else:
+            self.current_temp = max(self.current_temp / self.factor, MIN_TEMP)
+        self._proposals = self._accepted = 0
+
+
+SCHEDULES = {
+    "linear": LinearSchedule,
+    "exponential": ExponentialSchedule,
+    "adaptive": AdaptiveSchedule,
+    "constant": ConstantSchedule,
+}
+
+
+def create_schedule(schedule: str | Schedule, initial_temp: float, iterations: int) -> Schedule:
+    """
+    Resolve a schedule name into a schedule for a run, or return a schedule object unchanged.
+
+    :param schedule: One of the names in `SCHEDULES`, or a `Schedule` object.
+    :type schedule: str | Schedule
+    :param initial_temp: The temperature of the first iteration.
+    :type initial_temp: float
+    :param iterations: The number of iterations of the run.
+    :type iterations: int
+    :return: The schedule of the run.
+    :rtype: Schedule
+    :raises ValueError: If the schedule name is unknown.
+    """
+    if not isinstance(schedule, str):
+        return schedule
+    if schedule not in SCHEDULES:
+        raise ValueError(f"Unknown schedule '{schedule}', expected one of: {', '.join(SCHEDULES)}")
+    return SCHEDULES[schedule](initial_temp, iterations)
@@ -0,0 +1,319 @@
+from typing import Protocol
+
+import numpy as np
+
+from subcipher.analysis import calculate_plausibility, log_transition_matrix
+from subcipher.cipher import substitute_decrypt
+from subcipher.constants import ALPHABET
+from subcipher.ngram import NgramModel
+from subcipher.pool import CiphertextPool
+
+LanguageModel = np.ndarray | NgramModel  # A bigram transition matrix or an n-gram model
+BATCH_CHUNK = 256  # Mappings gathered at once by batch scoring; keeps the gathered block in cache
+
+
+class Scorer(Protocol):
+    """
+    Scores decryption mappings of one ciphertext under a language model.
+
+    A mapping is an integer array `decode` in which `decode[c]` is the plaintext index of
+    ciphertext symbol `c`. Besides scoring arbitrary mappings, a scorer tracks a current
+    mapping that the solver changes by swaps in place, so proposals can be scored and
+    applied without allocating new keys.
+    """
+
+    decode: np.ndarray  # The current mapping; read-only for callers
+
+    def score(self, decode: np.ndarray) -> float:
+        """
+        Return the logarithmic plausibility of the ciphertext decrypted with `decode`.
+        """
+        ...
+
+    def score_batch(self, decodes: np.ndarray) -> np.ndarray:
+        """
+        Return the scores of a batch of mappings given as the rows of a `(K, 27)` array.
+        """
+        ...
+
+    def reset(self, decode: np.ndarray) -> float:
+        """
+        Make a copy of `decode` the current mapping and return its score.
+        """
+        ...
+
+    def swap_delta(self, a: int, b: int) -> float:
+        """
+        Return the change of the score caused by swapping the images of symbols `a` and `b`
+        in the current mapping, without changing it.
+        """
+        ...
+
+    def swap(self, a: int, b: int) -> None:
+        """
+        Swap the images of symbols `a` and `b` in the current mapping.
+        """
+        ...
+
+
+def key_to_decode(key: str) -> np.ndarray:
+    """
+    Convert a key into the mapping from ciphertext symbol indices to plaintext indices.
+
+    :param key: A permutation of `ALPHABET`, as used by `substitute_decrypt`.
+    :type key: str
+    :return: An integer array `decode` with `decode[ALPHABET.index(key[i])] == i`.
+    :rtype: np.ndarray
+    """
+    decode = np.empty(len(ALPHABET), dtype=np.intp)
+    decode[[ALPHABET.index(char) for char in key]] = np.arange(len(ALPHABET))
+    return decode
+
+
+def decode_to_key(decode: np.ndarray) -> str:
+    """
+    Convert a mapping from ciphertext symbol indices to plaintext indices back into a key.
+
+    :param decode: An integer permutation array, see `key_to_decode`.
+    :type decode: np.ndarray
+    :return: The key as a permutation of `ALPHABET`.
+    :rtype: str
+    """
+    return ''.join(ALPHABET[c] for c in np.argsort(decode))
+
+
+def key_score(counts: np.ndarray, log_tm: np.ndarray, decode: np.ndarray) -> float:
+    """
+    Score a decryption mapping from the bigram counts of the ciphertext.
+
+    The result equals `calculate_plausibility` of the decrypted text, but it is computed
+    from the 27x27 ciphertext bigram matrix, so its cost does not depend on the text length.
+
+    :param counts: Bigram count matrix of the ciphertext, as returned by `bigram_counts`.
+    :type counts: np.ndarray
+    :param log_tm: Log-probabilities of the reference model, see `log_transition_matrix`.
+    :type log_tm: np.ndarray
+    :param decode: Integer array mapping each ciphertext symbol index to its plaintext index.
+    :type decode: np.ndarray
+    :return: The logarithmic plausibility of the decrypted text.
+    :rtype: float
+    """
+    return float((counts * log_tm[np.ix_(decode, decode)]).sum())
+
+
+def batch_key_scores(counts: np.ndarray, log_tm: np.ndarray, decodes: np.ndarray) -> np.ndarray:
+    """
+    Score a batch of decryption mappings from the bigram counts of the ciphertext at once.
+
+    Only the bigrams occurring in the ciphertext are gathered, so the work is a single
+    `(K, nonzero bigrams)` gather followed by a matrix-vector product.
+
+    :param counts: Bigram count matrix of the ciphertext, as returned by `bigram_counts`.
+    :type counts: np.ndarray
+    :param log_tm: Log-probabilities of the reference model, see `log_transition_matrix`.
+    :type log_tm: np.ndarray
+    :param decodes: Integer array of shape `(K, len(counts))` whose rows are mappings, see `key_score`.
+    :type decodes: np.ndarray
+    :return: A float array of the `K` scores; entry `k` equals `key_score(counts, log_tm, decodes[k])`.
+    :rtype: np.ndarray
+    :raises ValueError: If `decodes` is not a two-dimensional array with one column per symbol.
+    """
+    decodes = _check_batch(decodes, len(counts))
+    first, second = np.nonzero(counts)
+    weights = counts[first, second].astype(np.float64)
+    scores = np.empty(len(decodes), dtype=np.float64)
+    for start in range(0, len(decodes), BATCH_CHUNK):
+        chunk = decodes[start:start + BATCH_CHUNK]
+        scores[start:start + BATCH_CHUNK] = log_tm[chunk[:, first], chunk[:, second]] @ weights
+    return scores
+
+
+def _check_batch(decodes: np.ndarray, size: int) -> np.ndarray:
+    decodes = np.asarray(decodes, dtype=np.intp)
+    if decodes.ndim != 2 or decodes.shape[1] != size:
+        raise ValueError(f"Mappings have to be an array of shape (K, {size})")
+    return decodes
+
+
+class BigramScorer:
+    """
+    Scorer for a bigram transition matrix working on the 27x27 ciphertext bigram counts.
+
+    The log-probabilities permuted by the current mapping are kept up to date, so the
+    delta of a swap is a closed-form expression over two rows and two columns.
+    """
+
+    def __init__(self, counts: np.ndarray, log_tm: np.ndarray):
+        self.counts = counts.astype(np.float64)
+        self.log_tm = log_tm
+        self.decode = np.arange(len(counts), dtype=np.intp)
+        self.permuted = self.log_tm.copy()
+
+    def score(self, decode: np.ndarray) -> float:
+        return key_score(self.counts, self.log_tm, decode)
+
+    def score_batch(self, decodes: np.ndarray) -> np.ndarray:
+        return batch_key_scores(self.counts, self.log_tm, decodes)
+
+    def reset(self, decode: np.ndarray) -> float:
+        self.decode = np.array(decode, dtype=np.intp)
+        self.permuted = self.log_tm[np.ix_(self.decode, self.decode)]
+        return float((self.counts * self.permuted).sum())
+
+    def swap_delta(self, a: int, b: int) -> float:
+        c, p = self.counts, self.permuted
+        caa, cab, cba, cbb = c[a, a], c[a, b], c[b, a], c[b, b]
+        paa, pab, pba, pbb = p[a, a], p[a, b], p[b, a], p[b, b]
+
+        # Bigrams starting with a or b, then bigrams ending with a or b, each without the
+        # four bigrams made of a and b only, which are accounted for separately
+        rows = (c[a] - c[b]) @ (p[b] - p[a]) - (caa - cba) * (pba - paa) - (cab - cbb) * (pbb - pab)
+        cols = (c[:, a] - c[:, b]) @ (p[:, b] - p[:, a]) - (caa - cab) * (pab - paa) - (cba - cbb) * (pbb - pba)
+        corners = (caa - cbb) * (pbb - paa) + (cab - cba) * (pba - pab)
+        return float(rows + cols + corners)
+
+    def swap(self, a: int, b: int) -> None:
+        self.decode[[a, b]] = self.decode[[b, a]]
+        self.permuted[[a, b]] = self.permuted[[b, a]]
+        self.permuted[:, [a, b]] = self.permuted[:, [b, a]]
+
+
+class NgramScorer:
+    """
+    Scorer for an n-gram model working on the distinct n-grams of the ciphertext.
+
+    A swap only rescores the distinct n-grams that contain one of the two swapped symbols,
+    so its cost is bounded by the model size rather than by the text length.
+    """
+
+    def __init__(self, log_probs: np.ndarray, counts: np.ndarray):
+        n, size = log_probs.ndim, log_probs.shape[0]
+        ids = np.flatnonzero(counts)
+        counts = counts.reshape(-1)[ids]
+
+        self.log_probs = log_probs.reshape(-1)
+        self.grams = np.stack(np.unravel_index(ids, (size,) * n), axis=1).astype(np.intp)
+        self.counts = counts.astype(np.float64)
+        self.powers = size ** np.arange(n - 1, -1, -1, dtype=np.intp)
+
+        self.contains = np.zeros((size, len(ids)), dtype=bool)
+        for k in range(n):
+            self.contains[self.grams[:, k], np.arange(len(ids))] = True
+        self.containing = [np.flatnonzero(row) for row in self.contains]
+
+        self.decode = np.arange(size, dtype=np.intp)
+        self.current = self.log_probs[self.grams @ self.powers]
+        self._pending: tuple[int, int, np.ndarray, np.ndarray] | None = None
+
+    def score(self, decode: np.ndarray) -> float:
+        return float(self.counts @ self.log_probs[decode[self.grams] @ self.powers])
+
+    def score_batch(self, decodes: np.ndarray) -> np.ndarray:
+        size = len(self.contains)
+        decodes = _check_batch(decodes, size)
+        scores = np.empty(len(decodes), dtype=np.float64)
+        for start in range(0, len(decodes), BATCH_CHUNK):
+            chunk = decodes[start:start + BATCH_CHUNK]
+            # Integer matrix products do not use BLAS, so the flat ids are built column by column
+            ids = chunk[:, self.grams[:, 0]]
+            for k in range(1, self.grams.shape[1]):
+                ids *= size
+                ids += chunk[:, self.grams[:, k]]
+            scores[start:start + BATCH_CHUNK] = self.log_probs[ids] @ self.counts
+        return scores
+
+    def reset(self, decode: np.ndarray) -> float:
+        self.decode = np.array(decode, dtype=np.intp)
+        self.current = self.log_probs[self.decode[self.grams] @ self.powers]
+        self._pending = None
+        return float(self.counts @ self.current)
+
+    def _affected(self, a: int, b: int) -> np.ndarray:
+        with_b = self.containing[b]
+        return np.concatenate((self.containing[a], with_b[~self.contains[a, with_b]]))
+
+    def swap_delta(self, a: int, b: int) -> float:
+        affected = self._affected(a, b)
+        decode = self.decode
+        decode[a], decode[b] = decode[b], decode[a]
+        new = self.log_probs[decode[self.grams[affected]] @ self.powers]
+        decode[a], decode[b] = decode[b], decode[a]
+
+        self._pending = (a, b, affected, new)
+        return float(self.counts[affected] @ (new - self.current[affected]))
+
+    def swap(self, a: int, b: int) -> None:
+        if self._pending is None or self._pending[:2] != (a, b):
+            self.swap_delta(a, b)
+        _, _, affected, new = self._pending
+        self.decode[a], self.decode[b] = self.decode[b], self.decode[a]
+        self.current[affected] = new
+        self._pending = None
+
+
+class TextScorer:
+    """
+    Reference scorer that decrypts and rescores the whole text of every message for every mapping.
+    """
+
+    def __init__(self, messages: list[str], model: LanguageModel):
+        self.messages = messages
+        self.model = model
+        self.decode = np.arange(len(ALPHABET), dtype=np.intp)
+        self.current_score = 0.0
+
+    def score(self, decode: np.ndarray) -> float:
+        key = decode_to_key(decode)
+        texts = [substitute_decrypt(message, key) for message in self.messages]
+        if isinstance(self.model, NgramModel):
+            return sum(self.model.plausibility(text) for text in texts)
+        return sum(calculate_plausibility(text, self.model) for text in texts)
+
+    def score_batch(self, decodes: np.ndarray) -> np.ndarray:
+        return np.array([self.score(decode) for decode in _check_batch(decodes, len(ALPHABET))], dtype=np.float64)
+
+    def reset(self, decode: np.ndarray) -> float:
+        self.decode = np.array(decode, dtype=np.intp)
+        self.current_score = self.score(self.decode)
+        return self.current_score
+
+    def swap_delta(self, a: int, b: int) -> float:
+        swapped = self.decode.copy()
+        swapped[a], swapped[b] = self.decode[b], self.decode[a]
+        return self.score(swapped) - self.current_score
+
+    def swap(self, a: int, b: int) -> None:
+        delta = self.swap_delta(a, b)
+        self.decode[a], self.decode[b] = self.decode[b], self.decode[a]
+        self.current_score += delta
+
+
+def create_scorer(ciphertext: str | CiphertextPool, model: LanguageModel, delta_scoring: bool = True) -> Scorer:
+    """
+    Create the scorer of a ciphertext for a language model.
+
+    :param ciphertext: The encrypted text, or a pool of messages sharing one key, which are
+        scored jointly.
+    :type ciphertext: str | CiphertextPool
+    :param model: A bigram transition matrix or an `NgramModel`.
+    :type model: LanguageModel
+    :param delta_scoring: Whether swaps are rescored incrementally from the ciphertext's n-gram
+        counts. When False, the returned scorer decrypts and rescores the whole text.
+    :type delta_scoring: bool
+    :return: A scorer of the ciphertext.
+    :rtype: Scorer
+    :raises ValueError: If the ciphertext contains a character outside of `ALPHABET`, or if
+        `delta_scoring` is False for a pool with ciphertext files.
+    """
+    if not delta_scoring:
+        if isinstance(ciphertext, CiphertextPool) and ciphertext.files:
+            raise ValueError("Ciphertext files can only be scored from their n-gram counts")
+        return TextScorer([ciphertext] if isinstance(ciphertext, str) else ciphertext.messages, model)
+
+    pool = CiphertextPool([ciphertext]) if isinstance(ciphertext, str) else ciphertext
+    if isinstance(model, NgramModel) and model.n == 2:
+        # Bigram models take the faster closed-form swap deltas of the transition matrix scorer
+        return BigramScorer(pool.counts(2), model.log_probs)
+    if isinstance(model, NgramModel):
+        return NgramScorer(model.log_probs, pool.counts(model.n))
+    return BigramScorer(pool.counts(2), log_transition_matrix(model))
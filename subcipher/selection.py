@@ -0,0 +1,200 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from subcipher.analysis import EPSILON, log_transition_matrix
+from subcipher.initialization import frequency_decode, greedy_refine, unigram_frequencies
+from subcipher.ngram import NgramModel
+from subcipher.pool import CiphertextPool
+from subcipher.scoring import BigramScorer, LanguageModel
+
+DEFAULT_REFINE_ROUNDS = 30
+DEFAULT_EM_ITERATIONS = 50
+
+
+@dataclass
+class ModelScore:
+    """
+    Result of the pre-pass of one model.
+
+    :ivar name: Identifier of the model.
+    :ivar unigram: Mean log-probability per symbol with the symbols matched by frequency rank.
+    :ivar bigram: Mean log-probability per bigram after the greedy refinement.
+    :ivar decode: The refined mapping from ciphertext symbol indices to plaintext indices.
+    """
+    name: str
+    unigram: float
+    bigram: float
+    decode: np.ndarray
+
+    def to_dict(self) -> dict:
+        """
+        Return the JSON representation of the score, without the mapping.
+
+        :rtype: dict
+        """
+        return {"name": self.name, "unigram": self.unigram, "bigram": self.bigram}
+
+
+def bigram_probabilities(model: LanguageModel) -> np.ndarray:
+    """
+    Return the joint bigram probabilities of a language model.
+
+    :param model: A bigram transition matrix or an `NgramModel`; higher orders are reduced
+        to the marginal probabilities of their first two symbols.
+    :type model: LanguageModel
+    :return: A square float array summing to one.
+    :rtype: np.ndarray
+    """
+    if isinstance(model, NgramModel):
+        probs = np.exp(model.log_probs).sum(axis=tuple(range(2, model.n)))
+    else:
+        probs = np.asarray(model, dtype=np.float64)
+    return probs / probs.sum()
+
+
+class ModelSelector:
+    """
+    Scores candidate language models against ciphertexts and picks or mixes the best ones.
+
+    The bigram log-probability tables and unigram frequencies of the models are computed on
+    first use and kept, so one selector can rank many ciphertexts cheaply.
+
+    :param models: The candidate models by identifier; they have to share one alphabet.
+    :type models: dict[str, LanguageModel]
+    :param refine_rounds: Maximum number of greedy swaps of the pre-pass, see `greedy_refine`.
+    :type refine_rounds: int
+    :raises ValueError: If there is no model.
+    """
+
+    def __init__(self, models: dict[str, LanguageModel], refine_rounds: int = DEFAULT_REFINE_ROUNDS):
+        if not models:
+            raise ValueError("At least one model is required")
+        self.models = models
+        self.refine_rounds = refine_rounds
+        self._log_tables: dict[str, np.ndarray] = {}
+        self._unigrams: dict[str, np.ndarray] = {}
+
+    def log_table(self, name: str) -> np.ndarray:
+        """
+        Return the cached bigram log-probability table of a model.
+
+        :param name: Identifier of the model.
+        :type name: str
+        :return: A square array of bigram log-probabilities.
+        :rtype: np.ndarray
+        """
+        if name not in self._log_tables:
+            self._log_tables[name] = log_transition_matrix(bigram_probabilities(self.models[name]))
+        return self._log_tables[name]
+
+    def _unigram_log_probs(self, name: str) -> np.ndarray:
+        if name not in self._unigrams:
+            self._unigrams[name] = np.log(unigram_frequencies(self.models[name]) + EPSILON)
+        return self._unigrams[name]
+
+    def rank(self, ciphertext: str | CiphertextPool) -> list[ModelScore]:
+        """
+        Score every model against a ciphertext.
+
+        :param ciphertext: The encrypted text or a pool of messages sharing one key.
+        :type ciphertext: str | CiphertextPool
+        :return: The scores of all models, best first.
+        :rtype: list[ModelScore]
+        :raises ValueError: If the ciphertext contains a character outside of `ALPHABET`.
+        """
+        pool = CiphertextPool([ciphertext]) if isinstance(ciphertext, str) else ciphertext
+        unigrams, bigrams = pool.counts(1), pool.counts(2)
+        symbols, pairs = max(int(unigrams.sum()), 1), max(int(bigrams.sum()), 1)
+
+        scores = []
+        for name, model in self.models.items():
+            decode = frequency_decode(pool, model)
+            unigram = float(unigrams @ self._unigram_log_probs(name)[decode]) / symbols
+            scorer = BigramScorer(bigrams, self.log_table(name))
+            decode = greedy_refine(scorer, decode, self.refine_rounds)
+            scores.append(ModelScore(name=name, unigram=unigram, bigram=scorer.score(decode) / pairs, decode=decode))
+        return sorted(scores, key=lambda score: score.bigram, reverse=True)
+
+    def select(self, ciphertext: str | CiphertextPool) -> tuple[str, LanguageModel]:
+        """
+        Choose the model under which a ciphertext is most likely.
+
+        :param ciphertext: The encrypted text or a pool of messages sharing one key.
+        :type ciphertext: str | CiphertextPool
+        :return: The identifier and the model.
+        :rtype: tuple[str, LanguageModel]
+        :raises ValueError: If the ciphertext contains a character outside of `ALPHABET`.
+        """
+        if len(self.models) == 1:
+            return next(iter(self.models.items()))
+        best = self.rank(ciphertext)[0].name
+        return best, self.models[best]
+
+    def mixture_weights(self, ciphertext: str | CiphertextPool, iterations: int = DEFAULT_EM_ITERATIONS,
+                        ranking: list[ModelScore] | None = None) -> dict[str, float]:
+        """
+        Fit the interpolation weights of the models to a ciphertext.
+
+        The ciphertext bigrams are decoded with the mapping of the best ranked model, and the
+        weights of the linear interpolation of the bigram probabilities are estimated from
+        them by expectation-maximization.
+
+        :param ciphertext: The encrypted text or a pool of messages sharing one key.
+        :type ciphertext: str | CiphertextPool
+        :param iterations: Number of expectation-maximization steps.
+        :type iterations: int
+        :param ranking: The result of `rank` for the ciphertext, if it is already known.
+        :type ranking: list[ModelScore] | None
+        :return: The weight of every model, summing to one.
+        :rtype: dict[str, float]
+        :raises ValueError: If the ciphertext contains a character outside of `ALPHABET`.
+        """
+        names = list(self.models)
+        pool = CiphertextPool([ciphertext]) if isinstance(ciphertext, str) else ciphertext
+        decode = (ranking or self.rank(pool))[0].decode
+
+        # Plaintext bigram counts under the best mapping, and the probability of each under each model
+        counts = np.empty_like(pool.counts(2))
+        counts[np.ix_(decode, decode)] = pool.counts(2)
+        observed = counts > 0
+        if not observed.any():
+            return dict(zip(names, [1.0 / len(names)] * len(names)))
+        probs = np.stack([np.exp(self.log_table(name))[observed] for name in names])
+        weight_of_bigram = counts[observed] / counts[observed].sum()
+
+        weights = np.full(len(names), 1.0 / len(names))
+        for _ in range(iterations):
+            joint = weights[:, None] * probs
+            weights = (joint / joint.sum(axis=0)) @ weight_of_bigram
+        return dict(zip(names, weights.tolist()))
+
+    def mixture(self, weights: dict[str, float]) -> LanguageModel:
+        """
+        Interpolate the models with the given weights.
+
+        Models of one common order above two are mixed in full as an `NgramModel`, whose
+        counts are the pooled counts of the corpora. Otherwise the bigram probabilities are
+        mixed into a transition matrix.
+
+        :param weights: Weight of every model to mix, e.g. from `mixture_weights`.
+        :type weights: dict[str, float]
+        :return: The interpolated model.
+        :rtype: LanguageModel
+        :raises ValueError: If no weight is positive.
+        """
+        weights = {name: weight for name, weight in weights.items() if weight > 0}
+        if not weights:
+            raise ValueError("At least one weight has to be positive")
+        total = sum(weights.values())
+        models = {name: self.models[name] for name in weights}
+
+        orders = {model.n if isinstance(model, NgramModel) else 2 for model in models.values()}
+        if len(orders) == 1 and orders.pop() > 2:
+            first = next(iter(models.values()))
+            probs = sum(weight / total * np.exp(models[name].log_probs) for name, weight in weights.items())
+            return NgramModel(n=first.n, alphabet=first.alphabet,
+                              counts=sum(np.asarray(model.counts, dtype=np.int64) for model in models.values()),
+                              smoothing=sum(weight / total * models[name].smoothing for name, weight in weights.items()),
+                              log_probs=np.log(probs + EPSILON))
+        return sum(weight / total * bigram_probabilities(models[name]) for name, weight in weights.items())
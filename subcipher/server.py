@@ -0,0 +1,383 @@
+import argparse
+import json
+import os
+import socketserver
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import asdict, dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from subcipher.cipher import substitute_decrypt
+from subcipher.constants import ALPHABET
+from subcipher.initialization import INITIALIZERS
+from subcipher.mh_solver import solve
+from subcipher.ngram import MAX_ORDER, MIN_ORDER
+from subcipher.reference import load_language_model
+from subcipher.schedules import SCHEDULES
+from subcipher.scoring import LanguageModel
+from subcipher.tempering import solve_tempering
+from subcipher.utils import DEFAULT_PROFILE, NORMALIZATION_PROFILES
+
+DEFAULT_PORT = 8765
+MAX_RETAINED_JOBS = 10000
+MAX_REQUEST_SIZE = 16 << 20
+# Request fields forwarded to the solver, with the type each has to have
+SOLVER_OPTIONS = {
+    "iterations": int,
+    "initial_temp": float,
+    "patience": int,
+    "target_score": float,
+    "time_budget": float,
+    "seed": int,
+    "init": str,
+    "initial_key": str,
+    "schedule": str,
+    "replicas": int,
+    "sample_after": int,
+}
+
+_worker_models: dict[str, LanguageModel] = {}
+
+
+def _init_worker(models: dict[str, LanguageModel]) -> None:
+    # The models are sent once per worker process and stay loaded for all requests
+    global _worker_models
+    _worker_models = models
+
+
+def _solve_request(model_id: str, ciphertext: str, options: dict) -> dict:
+    options = dict(options)
+    replicas = options.pop("replicas", 1)
+    if replicas > 1:
+        # Tempering runs at fixed temperatures
+        options.pop("schedule", None)
+        options.pop("initial_temp", None)
+        result = solve_tempering(ciphertext, _worker_models[model_id], replicas=replicas, verbose=False, **options)
+    else:
+        result = solve(ciphertext, _worker_models[model_id], verbose=False, **options)
+
+    record = asdict(result)
+    record["stop_reason"] = str(result.stop_reason)
+    record["plaintext"] = substitute_decrypt(ciphertext, result.key)
+    if result.posterior is not None:
+        record["posterior"] = result.posterior.to_dict(result.key)
+    return record
+
+
+def _ping() -> None:
+    pass
+
+
+@dataclass
+class Job:
+    """
+    A solve request and its state.
+
+    :ivar id: Identifier of the job.
+    :ivar model: Identifier of the model the ciphertext is solved with.
+    :ivar submitted: Time of submission as a Unix timestamp.
+    :ivar future: The pending solver call.
+    """
+    id: str
+    model: str
+    submitted: float
+    future: Future = field(repr=False)
+
+    @property
+    def status(self) -> str:
+        """
+        `queued`, `running`, `done` or `failed`.
+
+        :rtype: str
+        """
+        if self.future.running():
+            return "running"
+        if not self.future.done():
+            return "queued"
+        return "failed" if self.future.exception() is not None else "done"
+
+    def to_dict(self) -> dict:
+        """
+        Return the JSON representation of the job, including the result once it is done.
+
+        :rtype: dict
+        """
+        record = {"id": self.id, "model": self.model, "submitted": self.submitted, "status": self.status}
+        if record["status"] == "done":
+            record["result"] = self.future.result()
+        elif record["status"] == "failed":
+            record["error"] = str(self.future.exception())
+        return record
+
+
+class SolverService:
+    """
+    Queue of solve requests executed by a pool of worker processes with preloaded models.
+
+    :param models: The language models by identifier.
+    :type models: dict[str, LanguageModel]
+    :param workers: Number of worker processes. Defaults to the number of CPU cores.
+    :type workers: int | None
+    :raises ValueError: If there is no model or `workers` is smaller than one.
+    """
+
+    def __init__(self, models: dict[str, LanguageModel], workers: int | None = None):
+        if not models:
+            raise ValueError("At least one model is required")
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError("At least one worker is required")
+
+        self.models = models
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(models,))
+        self.jobs: OrderedDict[str, Job] = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Start all workers now, so the first requests do not pay for process startup
+        for future in [self.executor.submit(_ping) for _ in range(workers)]:
+            future.result()
+
+    def submit(self, request: dict) -> Job:
+        """
+        Validate a solve request and queue it.
+
+        :param request: A dictionary with the `ciphertext`, optionally the `model`
+            identifier (defaults to the first model) and any of the `SOLVER_OPTIONS`.
+        :type request: dict
+        :return: The queued job.
+        :rtype: Job
+        :raises ValueError: If the request is invalid.
+        """
+        ciphertext = request.get("ciphertext")
+        if not isinstance(ciphertext, str):
+            raise ValueError("Field 'ciphertext' has to be a string")
+        if set(ciphertext.upper()) - set(ALPHABET):
+            raise ValueError("Ciphertext contains characters outside of the alphabet")
+
+        model = request.get("model", next(iter(self.models)))
+        if not isinstance(model, str):
+            raise ValueError("Field 'model' has to be a string")
+        if model not in self.models:
+            raise ValueError(f"Unknown model '{model}'")
+
+        options = {}
+        for name, value in request.items():
+            if name in ("ciphertext", "model") or value is None:
+                continue
+            if name not in SOLVER_OPTIONS:
+                raise ValueError(f"Unknown field '{name}'")
+            expected = SOLVER_OPTIONS[name]
+            valid = isinstance(value, expected) or expected is float and isinstance(value, int)
+            if isinstance(value, bool) or not valid:
+                raise ValueError(f"Field '{name}' has to be of type {expected.__name__}")
+            options[name] = value
+        if options.get("init", "random") not in INITIALIZERS:
+            raise ValueError(f"Field 'init' has to be one of: {', '.join(INITIALIZERS)}")
+        if options.get("schedule", "linear") not in SCHEDULES:
+            raise ValueError(f"Field 'schedule' has to be one of: {', '.join(SCHEDULES)}")
+
+        job = Job(id=uuid.uuid4().hex, model=model, submitted=time.time(),
+                  future=self.executor.submit(_solve_request, model, ciphertext, options))
+        with self._lock:
+            self.jobs[job.id] = job
+            self._forget_finished_jobs()
+        return job
+
+    def _forget_finished_jobs(self) -> None:
+        # Drop the oldest finished jobs once too many are retained
+        for job_id in list(self.jobs):
+            if len(self.jobs) <= MAX_RETAINED_JOBS:
+                break
+            if self.jobs[job_id].future.done():
+                del self.jobs[job_id]
+
+    def get(self, job_id: str, wait: float = 0.0) -> Job | None:
+        """
+        Look up a job, optionally waiting for it to finish.
+
+        :param job_id: Identifier of the job.
+        :type job_id: str
+        :param wait: Maximum number of seconds to wait for the job to finish.
+        :type wait: float
+        :return: The job, or None if it is unknown.
+        :rtype: Job | None
+        """
+        with self._lock:
+            job = self.jobs.get(job_id)
+        if job is not None and wait > 0:
+            try:
+                job.future.exception(timeout=wait)
+            except FutureTimeoutError:
+                pass
+        return job
+
+    def shutdown(self) -> None:
+        """
+        Cancel the queued jobs and stop the worker processes.
+        """
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    server_version = "SubCipher"
+    service: SolverService  # Set on the subclass created by `create_server`
+
+    def _send_json(self, status: HTTPStatus, body: dict) -> None:
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if url.path == "/models":
+            self._send_json(HTTPStatus.OK, {"models": list(self.service.models)})
+            return
+
+        if url.path.startswith("/jobs/"):
+            try:
+                wait = float(parse_qs(url.query).get("wait", ["0"])[0])
+            except ValueError:
+                self._send_json(HTTPStatus.BAD_REQUEST, {"error": "Parameter 'wait' has to be a number"})
+                return
+            job = self.service.get(url.path[len("/jobs/"):], wait)
+            if job is None:
+                self._send_json(HTTPStatus.NOT_FOUND, {"error": "Unknown job"})
+            else:
+                self._send_json(HTTPStatus.OK, job.to_dict())
+            return
+
+        self._send_json(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+
+    def do_POST(self) -> None:
+        if urlparse(self.path).path != "/solve":
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+            return
+
+        if self.headers.get("Content-Length") is None:
+            self._send_json(HTTPStatus.LENGTH_REQUIRED, {"error": "Header 'Content-Length' is required"})
+            return
+        try:
+            length = int(self.headers["Content-Length"])
+            if length < 0:
+                raise ValueError()
+        except ValueError:
+            self._send_json(HTTPStatus.BAD_REQUEST,
+                            {"error": "Header 'Content-Length' has to be a non-negative integer"})
+            return
+        if length > MAX_REQUEST_SIZE:
+            self._send_json(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Request is too large"})
+            return
+        try:
+            request = json.loads(self.rfile.read(length))
+            if not isinstance(request, dict):
+                raise ValueError("Request has to be a JSON object")
+            job = self.service.submit(request)
+        except ValueError as e:  # Includes invalid JSON
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+            return
+        self._send_json(HTTPStatus.ACCEPTED, {"id": job.id, "status": job.status})
+
+    def address_string(self) -> str:
+        # Clients of a Unix socket have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format: str, *args) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self) -> None:
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name, self.server_port = "localhost", 0
+
+
+def create_server(service: SolverService, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                  socket_path: str | Path | None = None, quiet: bool = False) -> socketserver.BaseServer:
+    """
+    Create the HTTP server of a solver service.
+
+    :param service: The service handling the requests.
+    :type service: SolverService
+    :param host: Address to listen on; only local addresses should be used.
+    :type host: str
+    :param port: TCP port to listen on; 0 picks a free port.
+    :type port: int
+    :param socket_path: Listen on this Unix socket instead of TCP; a stale socket file is replaced.
+    :type socket_path: str | Path | None
+    :param quiet: Whether to suppress the request log.
+    :type quiet: bool
+    :return: The bound server; call `serve_forever` to handle requests.
+    :rtype: socketserver.BaseServer
+    """
+    handler = type("RequestHandler", (_RequestHandler,), {"service": service})
+    if socket_path is not None:
+        Path(socket_path).unlink(missing_ok=True)
+        server = _UnixHTTPServer(str(socket_path), handler)
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+    server.quiet = quiet
+    return server
+
+
+def _parse_model(spec: str) -> tuple[str, str]:
+    name, separator, path = spec.partition("=")
+    if not separator or not name or not path:
+        raise argparse.ArgumentTypeError("Model has to be given as NAME=PATH")
+    return name, path
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog='subcipher.py serve', description='SubCipher - solver service')
+    parser.add_argument('--model', '-m', type=_parse_model, action='append', default=None, metavar='NAME=PATH',
+                        help='Reference file or model file of a model to keep loaded; can be repeated '
+                             '(default: default=data_samples/krakatit.txt)')
+    parser.add_argument('--ngram', '-n', type=int, default=2, choices=range(MIN_ORDER, MAX_ORDER + 1),
+                        help='Order of the n-gram language models')
+    parser.add_argument('--profile', type=str, default=None, choices=list(NORMALIZATION_PROFILES),
+                        help=f'Language profile of the reference text normalization (default: {DEFAULT_PROFILE}, '
+                             'or the profile stored in a model file)')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                        help='Directory for cached reference matrices (default: ~/.cache/subcipher)')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='TCP port to listen on')
+    parser.add_argument('--socket', type=str, default=None, help='Listen on this Unix socket instead of TCP')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes (default: number of CPU cores)')
+    parser.add_argument('--quiet', '-q', action='store_true', help='Do not log requests')
+    args = parser.parse_args(argv)
+
+    specs = args.model or [("default", "data_samples/krakatit.txt")]
+    models = {name: load_language_model(path, args.ngram, ALPHABET, cache_dir=args.cache_dir, profile=args.profile)
+              for name, path in specs}
+
+    service = SolverService(models, workers=args.workers)
+    server = create_server(service, args.host, args.port, args.socket, args.quiet)
+    address = args.socket or f"http://{args.host}:{server.server_address[1]}"
+    print(f"Serving models {', '.join(models)} on {address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+        if args.socket:
+            Path(args.socket).unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
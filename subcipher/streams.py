@@ -0,0 +1,59 @@
+import numpy as np
+
+from subcipher.constants import ALPHABET
+
+PROPOSAL_BLOCK = 4096  # Iterations whose proposals are drawn at once
+
+Seed = int | np.random.SeedSequence | np.random.Generator | None
+
+
+def create_rng(seed: Seed = None) -> np.random.Generator:
+    """
+    Create the random generator of a solver run.
+
+    :param seed: An integer seed, a `SeedSequence`, or a `Generator` which is used as it is.
+        When None, the generator is seeded from the operating system.
+    :type seed: Seed
+    :return: The generator.
+    :rtype: np.random.Generator
+    """
+    return np.random.default_rng(seed)
+
+
+def draw_proposals(rng: np.random.Generator, count: int, size: int = len(ALPHABET)) -> tuple[list, list, list]:
+    """
+    Draw the swap proposals and acceptance thresholds of many iterations at once.
+
+    A proposal with score difference `d` at temperature `t` is accepted when
+    `d > threshold * t`. As the threshold is `log(u)` for a uniform `u`, this is the
+    Metropolis criterion `u < exp(d / t)` without an exponential per iteration; improving
+    proposals are always accepted, as the threshold is never positive.
+
+    :param rng: The random generator of the run.
+    :type rng: np.random.Generator
+    :param count: Number of proposals.
+    :type count: int
+    :param size: Number of symbols.
+    :type size: int
+    :return: Lists of the first symbols, the second symbols (always different from the
+        first) and the thresholds, as Python numbers for fast access in the loop.
+    :rtype: tuple[list, list, list]
+    """
+    first = rng.integers(size, size=count)
+    second = rng.integers(size - 1, size=count)
+    second += second >= first
+    return first.tolist(), second.tolist(), draw_thresholds(rng, count)
+
+
+def draw_thresholds(rng: np.random.Generator, count: int) -> list:
+    """
+    Draw acceptance thresholds of many Metropolis tests at once, see `draw_proposals`.
+
+    :param rng: The random generator of the run.
+    :type rng: np.random.Generator
+    :param count: Number of thresholds.
+    :type count: int
+    :return: The thresholds, logs of uniform numbers in (0, 1], so never -inf.
+    :rtype: list
+    """
+    return np.log1p(-rng.random(count)).tolist()
@@ -0,0 +1,167 @@
+import time
+from collections.abc import Callable
+
+from subcipher.initialization import initial_decode
+from subcipher.mh_solver import SolverResult, StopReason
+from subcipher.pool import CiphertextPool
+from subcipher.posterior import PosteriorRecorder
+from subcipher.scoring import LanguageModel, create_scorer, decode_to_key
+from subcipher.streams import PROPOSAL_BLOCK, Seed, create_rng, draw_proposals, draw_thresholds
+
+
+def temperature_ladder(replicas: int, min_temp: float, max_temp: float) -> list[float]:
+    """
+    Space the temperatures of the replicas geometrically between two bounds.
+
+    :param replicas: Number of replicas.
+    :type replicas: int
+    :param min_temp: Temperature of the coldest replica.
+    :type min_temp: float
+    :param max_temp: Temperature of the hottest replica.
+    :type max_temp: float
+    :return: The temperatures from the coldest to the hottest.
+    :rtype: list[float]
+    :raises ValueError: If there is no replica, or the bounds are not positive and ordered.
+    """
+    if replicas < 1:
+        raise ValueError("At least one replica is required")
+    if not 0 < min_temp <= max_temp:
+        raise ValueError("Temperatures have to satisfy 0 < min_temp <= max_temp")
+    if replicas == 1:
+        return [min_temp]
+    ratio = (max_temp / min_temp) ** (1 / (replicas - 1))
+    return [min_temp * ratio ** k for k in range(replicas)]
+
+
+def solve_tempering(ciphertext: str | CiphertextPool, tm_ref: LanguageModel, iterations: int = 5000,
+                    replicas: int = 8, min_temp: float = 0.3, max_temp: float = 5.0, exchange_interval: int = 1,
+                    delta_scoring: bool = True, seed: Seed = None, verbose: bool = True,
+                    callback: Callable[[int, str, float], None] | None = None, patience: int | None = None,
+                    target_score: float | None = None, time_budget: float | None = None, init: str = "random",
+                    initial_key: str | None = None, sample_after: int | None = None) -> SolverResult:
+    """
+    Implements parallel tempering (replica exchange Metropolis-Hastings).
+
+    Several replicas of the chain run at fixed temperatures from `min_temp` to `max_temp`.
+    Every iteration makes one swap proposal in each replica; every `exchange_interval`
+    iterations neighbouring replicas exchange their keys with the Metropolis probability
+    of the exchange. Hot replicas explore freely and hand good keys down to the cold ones,
+    which refine them, so no cooling schedule has to be tuned to the text length.
+
+    Args:
+        ciphertext: The encrypted text to decrypt, or a `CiphertextPool` of messages sharing one key
+        tm_ref: Reference transition matrix, or an `NgramModel` of order 2 to 4
+        iterations: Maximum number of iterations; each makes `replicas` proposals
+        replicas: Number of replicas
+        min_temp: Temperature of the coldest replica
+        max_temp: Temperature of the hottest replica
+        exchange_interval: Number of iterations between two rounds of exchanges
+        delta_scoring: Score proposals incrementally, see `solve`
+        seed: Seed of the `numpy.random.Generator` of this run, or the generator itself, see `solve`
+        verbose: Whether to print the progress every 500 iterations
+        callback: Called with the iteration number, key and score whenever a new best key is
+            found in any replica; iteration 0 is the best initial key
+        patience: Stop when the best score has not improved for this many iterations
+        target_score: Stop as soon as the best score reaches this value
+        time_budget: Stop after this many seconds of wall time
+        init: How to choose the initial keys, see `solve`. With `random` every replica starts
+            from its own key, otherwise all replicas start from the same one
+        initial_key: Start all replicas from this key instead; `init` is then ignored
+        sample_after: Collect a `KeyPosterior` from the states of the coldest replica after
+            this many burn-in iterations, see `solve`. The replica runs at the fixed
+            temperature `min_temp`; set it to 1 to sample the posterior of the model itself
+
+    Returns:
+        SolverResult with the best key found by any replica; `iterations` counts iterations,
+        not proposals
+
+    Raises:
+        ValueError: If the replica count, the temperatures or the exchange interval are invalid
+    """
+    start = time.perf_counter()
+    temperatures = temperature_ladder(replicas, min_temp, max_temp)
+    if exchange_interval < 1:
+        raise ValueError("Exchange interval has to be at least one")
+    rng = create_rng(seed)
+
+    # Replica k runs at temperatures[k]; exchanging keys swaps the scorers between two slots
+    scorers = [create_scorer(ciphertext, tm_ref, delta_scoring) for _ in range(replicas)]
+    betas = [1 / temperature for temperature in temperatures]
+    if init == "random" and initial_key is None:
+        # Every replica starts from its own random key
+        scores = [scorer.reset(initial_decode(ciphertext, tm_ref, scorer, rng=rng)) for scorer in scorers]
+    else:
+        decode = initial_decode(ciphertext, tm_ref, scorers[0], init, initial_key, rng)
+        scores = [scorer.reset(decode) for scorer in scorers]
+
+    best = max(range(replicas), key=scores.__getitem__)
+    best_decode = scorers[best].decode.copy()
+    best_score = scores[best]
+    best_iteration = 0
+    if callback is not None:
+        callback(0, decode_to_key(best_decode), best_score)
+
+    sampler = PosteriorRecorder(scorers[0].decode, sample_after) if sample_after is not None else None
+    deadline = start + time_budget if time_budget is not None else None
+    stop_reason = StopReason.ITERATIONS
+    performed = 0
+    parity = 0
+    pairs = replicas // 2
+    block_start = block_end = 0
+
+    for i in range(iterations):
+        if target_score is not None and best_score >= target_score:
+            stop_reason = StopReason.TARGET_SCORE
+            break
+        if patience is not None and i - best_iteration >= patience:
+            stop_reason = StopReason.PATIENCE
+            break
+        if deadline is not None and time.perf_counter() >= deadline:
+            stop_reason = StopReason.TIME_BUDGET
+            break
+
+        if i == block_end:
+            # Proposals of all replicas and the exchange tests are drawn for a block of iterations
+            count = min(PROPOSAL_BLOCK, iterations - i)
+            firsts, seconds, thresholds = draw_proposals(rng, count * replicas)
+            exchange_thresholds = draw_thresholds(rng, count * pairs)
+            block_start, block_end = i, i + count
+
+        offset = (i - block_start) * replicas
+        for k in range(replicas):
+            scorer = scorers[k]
+            a, b = firsts[offset + k], seconds[offset + k]
+
+            score_diff = scorer.swap_delta(a, b)
+            if score_diff > thresholds[offset + k] * temperatures[k]:
+                if k == 0 and sampler is not None:
+                    sampler.swap(i, a, b)
+                scorer.swap(a, b)
+                scores[k] += score_diff
+
+                if scores[k] > best_score:
+                    best_decode[:] = scorer.decode
+                    best_score = scores[k]
+                    best_iteration = i + 1
+                    if callback is not None:
+                        callback(i + 1, decode_to_key(best_decode), best_score)
+
+        if (i + 1) % exchange_interval == 0:
+            # Alternate between even and odd neighbour pairs, so every pair gets its turn
+            offset = (i - block_start) * pairs
+            for m, k in enumerate(range(parity, replicas - 1, 2)):
+                log_ratio = (scores[k + 1] - scores[k]) * (betas[k] - betas[k + 1])
+                if log_ratio > exchange_thresholds[offset + m]:
+                    if k == 0 and sampler is not None:
+                        sampler.replace(i, scorers[1].decode)
+                    scorers[k], scorers[k + 1] = scorers[k + 1], scorers[k]
+                    scores[k], scores[k + 1] = scores[k + 1], scores[k]
+            parity ^= 1
+
+        performed = i + 1
+        if verbose and performed % 500 == 0:
+            print(f"\rIteration {performed:5d} | coldest score: {scores[0]:.4f} | best score: {best_score:.4f}", end="\033[K")
+
+    return SolverResult(key=decode_to_key(best_decode), score=best_score, iterations=performed, stop_reason=stop_reason,
+                        elapsed=time.perf_counter() - start, seed=seed if isinstance(seed, int) else None,
+                        posterior=sampler.finish(performed) if sampler is not None else None)
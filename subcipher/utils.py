@@ -1,41 +1,211 @@
 import math
 import os
+import unicodedata
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
+from string import ascii_uppercase
 
-from subcipher.constants import ALPHABET
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 1 << 20  # Characters per chunk when streaming large text files
+
+_SEPARATOR = ord('_')
+_DELETED = 0  # Table value of the code units that are dropped, e.g. combining marks
+_EXPANDED = 1  # Table value of the code units that do not become exactly one character, e.g. ß
+_TABLE_CACHE_SIZE = 16  # Profiles whose code unit tables are kept
+
+
+@dataclass(frozen=True)
+class NormalizationProfile:
+    """
+    Language specific rules of `normalize_text`.
+
+    The text is converted to upper case, letters with diacritics are replaced by their
+    base letters, and every other character becomes the separator `_`.
+
+    :ivar name: Identifier of the profile, a key of `NORMALIZATION_PROFILES`.
+    :ivar replacements: Replacement of upper case letters outside of `A-Z`; a replacement
+        may be longer than one letter, e.g. `AE` for `Ä`.
+    :ivar decompose: Apply the Unicode NFKD decomposition first and drop the combining
+        marks, so every letter with diacritics is reduced to its base letter.
+    """
+    name: str
+    replacements: dict[str, str] = field(default_factory=dict)
+    decompose: bool = False
+
+
+NORMALIZATION_PROFILES = {profile.name: profile for profile in (
+    NormalizationProfile("cs", {
+        'Á': 'A', 'Č': 'C', 'Ď': 'D', 'É': 'E', 'Ě': 'E',
+        'Í': 'I', 'Ň': 'N', 'Ó': 'O', 'Ř': 'R', 'Š': 'S',
+        'Ť': 'T', 'Ů': 'U', 'Ú': 'U', 'Ý': 'Y', 'Ž': 'Z'
+    }),
+    NormalizationProfile("sk", {
+        'Á': 'A', 'Ä': 'A', 'Č': 'C', 'Ď': 'D', 'É': 'E', 'Í': 'I',
+        'Ĺ': 'L', 'Ľ': 'L', 'Ň': 'N', 'Ó': 'O', 'Ô': 'O', 'Ŕ': 'R',
+        'Š': 'S', 'Ť': 'T', 'Ú': 'U', 'Ý': 'Y', 'Ž': 'Z'
+    }),
+    NormalizationProfile("de", {'Ä': 'AE', 'Ö': 'OE', 'Ü': 'UE', 'ẞ': 'SS'}),
+    NormalizationProfile("generic", decompose=True),
+)}
+DEFAULT_PROFILE = "cs"
+
+
+def get_profile(profile: str | NormalizationProfile) -> NormalizationProfile:
+    """
+    Resolve a profile name, or return a profile object unchanged.
+
+    :param profile: One of the names in `NORMALIZATION_PROFILES`, or a profile object.
+    :type profile: str | NormalizationProfile
+    :return: The profile.
+    :rtype: NormalizationProfile
+    :raises ValueError: If the profile name is unknown.
+    """
+    if isinstance(profile, NormalizationProfile):
+        return profile
+    if profile not in NORMALIZATION_PROFILES:
+        raise ValueError(f"Unknown normalization profile '{profile}', "
+                         f"expected one of: {', '.join(NORMALIZATION_PROFILES)}")
+    return NORMALIZATION_PROFILES[profile]
+
+
+def _code(char: str, profile: NormalizationProfile) -> int:
+    # Output character of one upper case character after its replacement
+    if char in ascii_uppercase:
+        return ord(char)
+    return _DELETED if profile.decompose and unicodedata.combining(char) else _SEPARATOR
+
+
+def _expansion(char: str, profile: NormalizationProfile) -> bytes:
+    # Output characters of a character that may become more than one letter, e.g. ß or Ä
+    return bytes(_code(letter, profile) for upper in char.upper()
+                 for letter in profile.replacements.get(upper, upper))
+
+
+@lru_cache(maxsize=_TABLE_CACHE_SIZE)
+def _profile_table(name: str, replacements: tuple[tuple[str, str], ...],
+                   decompose: bool) -> tuple[np.ndarray, np.ndarray]:
+    # Output character of every UTF-16 code unit with the case conversion folded in, and
+    # whether it has been computed; keyed by the rules, so equal profiles share the table
+    return np.zeros(1 << 16, dtype=np.uint8), np.zeros(1 << 16, dtype=bool)
+
+
+def _translate_units(units: np.ndarray, profile: NormalizationProfile) -> np.ndarray:
+    table, known = _profile_table(profile.name, tuple(sorted(profile.replacements.items())), profile.decompose)
+    missing = units[~known[units]]
+    if len(missing):
+        # Only the code units that occur are computed, most texts use a few dozen of them
+        missing = np.unique(missing)
+        table[missing] = [codes[0] if len(codes) == 1 else _EXPANDED
+                          for codes in (_expansion(chr(unit), profile) for unit in missing.tolist())]
+        known[missing] = True
+    return table[units]
+
+
+def _normalize_units(text: str, profile: NormalizationProfile) -> np.ndarray:
+    # Normalize a text into an array of ASCII codes, without collapsing the separators
+    if profile.decompose:
+        text = unicodedata.normalize('NFKD', text)
+    # Characters outside of the BMP are encoded as two surrogates, which both become separators
+    units = np.frombuffer(text.encode('utf-16-le', 'surrogatepass'), dtype=np.uint16)
+    codes = _translate_units(units, profile)
+
+    positions = np.flatnonzero(codes == _EXPANDED)
+    if len(positions):
+        # The few characters that are replaced by several letters (or by none) are spliced in
+        expansions = {}
+        pieces = []
+        previous = 0
+        for position, unit in zip(positions.tolist(), units[positions].tolist()):
+            if unit not in expansions:
+                expansions[unit] = np.frombuffer(_expansion(chr(unit), profile), dtype=np.uint8)
+            pieces += (codes[previous:position], expansions[unit])
+            previous = position + 1
+        pieces.append(codes[previous:])
+        codes = np.concatenate(pieces)
+    return codes[codes != _DELETED] if profile.decompose else codes
+
+
+def _collapse_separators(codes: np.ndarray) -> np.ndarray:
+    separators = codes == _SEPARATOR
+    keep = np.ones(len(codes), dtype=bool)
+    keep[1:] = ~(separators[1:] & separators[:-1])
+    return codes[keep]
 
 
 def load_textfile(file_path: str) -> str:
     with open(file_path, 'r', encoding='utf-8') as file:
         return file.read()
 
+def read_chunks(file_path: str | Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Read a UTF-8 text file in chunks of a fixed number of characters.
+
+    :param file_path: Path of the text file.
+    :type file_path: str | Path
+    :param chunk_size: Maximum number of characters per chunk.
+    :type chunk_size: int
+    :return: An iterator over the chunks of the file, in order.
+    :rtype: Iterator[str]
+    :raises FileNotFoundError: If the file does not exist.
+    """
+    with open(file_path, 'r', encoding='utf-8') as file:
+        while chunk := file.read(chunk_size):
+            yield chunk
+
 def save_textfile(text: str, output_path: Path) -> None:
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     with open(output_path, 'w', encoding='utf-8') as file:
         file.write(text)
 
 
-def normalize_text(text: str) -> str:
-    text = text.upper()
+def normalize_text(text: str, profile: str | NormalizationProfile = DEFAULT_PROFILE) -> str:
+    """
+    Normalize a text to the symbols of `ALPHABET`.
 
-    # Replace Czech diacritics
-    replacements = {
-        'Á': 'A', 'Č': 'C', 'Ď': 'D', 'É': 'E', 'Ě': 'E',
-        'Í': 'I', 'Ň': 'N', 'Ó': 'O', 'Ř': 'R', 'Š': 'S',
-        'Ť': 'T', 'Ú': 'U', 'Ů': 'U', 'Ý': 'Y', 'Ž': 'Z'
-    }
+    Letters are converted to upper case and their diacritics are removed according to the
+    language profile; every run of other characters becomes a single `_`. The text is
+    mapped by one lookup in a table over the UTF-16 code units, whose entries are computed
+    when a character first occurs, and the separators are collapsed in one vectorized pass.
+
+    :param text: The text to normalize.
+    :type text: str
+    :param profile: The language profile, see `NORMALIZATION_PROFILES`.
+    :type profile: str | NormalizationProfile
+    :return: The normalized text.
+    :rtype: str
+    :raises ValueError: If the profile name is unknown.
+    """
+    return _collapse_separators(_normalize_units(text, get_profile(profile))).tobytes().decode('ascii')
 
-    normalized = text
-    for char, replacement in replacements.items():
-        normalized = normalized.replace(char, replacement)
 
-    normalized = ''.join(char if char in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ' else '_'
-                         for char in normalized)
+def normalize_chunks(chunks: Iterable[str], profile: str | NormalizationProfile = DEFAULT_PROFILE) -> Iterator[str]:
+    """
+    Normalize a text given as consecutive chunks without joining it in memory.
 
-    while '__' in normalized:
-        normalized = normalized.replace('__', '_')
+    Each chunk is normalized like `normalize_text`. A separator run that spans a chunk
+    boundary is collapsed as well, so joining the output equals `normalize_text` of the
+    joined input.
 
-    return normalized
+    :param chunks: Consecutive pieces of the text, e.g. from `read_chunks`.
+    :type chunks: Iterable[str]
+    :param profile: The language profile, see `NORMALIZATION_PROFILES`.
+    :type profile: str | NormalizationProfile
+    :return: An iterator over the normalized pieces; empty pieces are skipped.
+    :rtype: Iterator[str]
+    :raises ValueError: If the profile name is unknown.
+    """
+    profile = get_profile(profile)
+    ends_with_separator = False
+    for chunk in chunks:
+        normalized = normalize_text(chunk, profile)
+        if ends_with_separator and normalized.startswith('_'):
+            normalized = normalized[1:]
+        if normalized:
+            ends_with_separator = normalized.endswith('_')
+            yield normalized
 
 
 def log_to_percentage(log_value: float) -> float:
@@ -1,4 +1,6 @@
 import pytest
+from subcipher.analysis import text_transition_matrix
+from subcipher.cipher import substitute_encrypt
 from subcipher.constants import ALPHABET
 
 @pytest.fixture
@@ -15,4 +17,16 @@ def sample_encrypted():
 
 @pytest.fixture
 def complex_key():
-    return "VLZODTQHUXWSERMCFKNYIBJGP_A"
\ No newline at end of file
+    return "VLZODTQHUXWSERMCFKNYIBJGP_A"
+
+@pytest.fixture
+def reference_text():
+    return "THE_QUICK_BROWN_FOX_JUMPS_OVER_THE_LAZY_DOG_AND_THE_DOG_SLEEPS"
+
+@pytest.fixture
+def reference_tm(reference_text):
+    return text_transition_matrix(reference_text)
+
+@pytest.fixture
+def ciphertext(complex_key):
+    return substitute_encrypt("A_QUICK_MOVEMENT_OF_THE_ENEMY_WILL_JEOPARDIZE_SIX_GUNBOATS", complex_key)
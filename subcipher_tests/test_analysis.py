@@ -1,7 +1,10 @@
+import math
+
 import numpy as np
 import pytest
 from subcipher.analysis import calculate_plausibility, get_bigrams
 from subcipher.analysis import get_bigrams, transition_matrix
+from subcipher.analysis import UNKNOWN, bigram_counts, encode_text, text_transition_matrix
 from subcipher.constants import ALPHABET
 
 
@@ -109,4 +112,39 @@ class TestTransitionMatrix:
     # def test_bigrams_with_repeated_letters(self):
     #     bigrams = ["aa", "aa", "bb"]
     #     result_matrix = transition_matrix(bigrams, ALPHABET)
-    #     assert result_matrix[ALPHABET.index("a")][ALPHABET.index("a")] > 1, "Matrix should handle repeated bigrams."
\ No newline at end of file
+    #     assert result_matrix[ALPHABET.index("a")][ALPHABET.index("a")] > 1, "Matrix should handle repeated bigrams."
+
+
+class TestEncodedAnalysis:
+    def test_encode_text(self):
+        assert encode_text("AB_Z").tolist() == [0, 1, 26, 25]
+        assert encode_text("AB_Z").dtype == np.uint8
+
+    def test_encode_text_rejects_unknown_characters(self):
+        with pytest.raises(ValueError):
+            encode_text("AB!")
+
+    def test_encode_text_lenient(self):
+        assert encode_text("Ař!", strict=False).tolist() == [0, UNKNOWN, UNKNOWN]
+
+    def test_bigram_counts_skip_unknown(self):
+        counts = bigram_counts(encode_text("ABA!AB", strict=False))
+        assert counts.sum() == 3
+        assert counts[ALPHABET.index("A"), ALPHABET.index("B")] == 2
+        assert counts[ALPHABET.index("B"), ALPHABET.index("A")] == 1
+
+    def test_transition_matrix_counts(self):
+        result_matrix = transition_matrix(["AB"] * 10 + ["A1", "!", "###"], ALPHABET)
+        smoothed = np.ones((len(ALPHABET), len(ALPHABET)))
+        smoothed[ALPHABET.index("A"), ALPHABET.index("B")] += 10
+        np.testing.assert_allclose(result_matrix, smoothed / smoothed.sum())
+
+    def test_text_transition_matrix_matches_bigram_list(self):
+        text = "PRILIS_ZLUTOUCKY_KUN_UPEL_DABELSKE_ODY?!"
+        np.testing.assert_array_equal(text_transition_matrix(text), transition_matrix(get_bigrams(text), ALPHABET))
+
+    def test_plausibility_matches_bigram_loop(self):
+        text = "PRILIS_ZLUTOUCKY_KUN_UPEL_DABELSKE_ODY"
+        tm_ref = text_transition_matrix("ZLUTOUCKY_KUN_PRILIS")
+        expected = sum(math.log(tm_ref[ALPHABET.index(a), ALPHABET.index(b)] + 1e-10) for a, b in get_bigrams(text))
+        assert calculate_plausibility(text, tm_ref) == pytest.approx(expected)
@@ -0,0 +1,38 @@
+import json
+
+import pytest
+from subcipher.batch import run_batch
+from subcipher.cipher import substitute_encrypt
+
+
+class TestRunBatch:
+    @pytest.fixture
+    def ciphertext_files(self, tmp_path, complex_key):
+        files = []
+        for i, text in enumerate(["THE_DOG_SLEEPS", "THE_FOX_JUMPS", "A_LAZY_DOG"]):
+            file = tmp_path / "encrypted" / f"text_10_sample_{i}_ciphertext.txt"
+            file.parent.mkdir(exist_ok=True)
+            file.write_text(substitute_encrypt(text, complex_key), encoding='utf-8')
+            files.append(file)
+        return files
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_writes_outputs_and_summary(self, tmp_path, ciphertext_files, reference_tm, workers):
+        output_dir = tmp_path / "output"
+        results = list(run_batch(ciphertext_files, reference_tm, output_dir, workers=workers, iterations=100, seed=1))
+
+        assert sorted(result.file for result in results) == sorted(str(file) for file in ciphertext_files)
+        records = [json.loads(line) for line in (output_dir / "summary.jsonl").read_text(encoding='utf-8').splitlines()]
+        assert [record["file"] for record in records] == [result.file for result in results]
+        for record in records:
+            assert record["error"] is None
+            assert record["iterations"] == 100
+            assert set(record) == {"file", "key", "score", "iterations", "elapsed", "error"}
+        for file in ciphertext_files:
+            assert (output_dir / f"{file.stem}_plaintext.txt").exists()
+            assert (output_dir / f"{file.stem}_key.txt").exists()
+
+    def test_failed_file_is_reported(self, tmp_path, reference_tm):
+        results = list(run_batch([tmp_path / "missing.txt"], reference_tm, tmp_path / "output", workers=1))
+        assert results[0].key is None
+        assert results[0].error is not None
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+from subcipher.analysis import text_transition_matrix
+from subcipher.benchmark import BenchmarkCase, character_accuracy, load_sample_cases, run_benchmark, synthetic_cases
+from subcipher.cipher import substitute_encrypt
+from subcipher.constants import ALPHABET
+
+CORPUS = "Příliš žluťoučký kůň úpěl ďábelské ódy. " * 20
+
+
+class TestBenchmark:
+    def test_character_accuracy(self, complex_key):
+        ciphertext = substitute_encrypt("ABBA", complex_key)
+        assert character_accuracy(ciphertext, complex_key, complex_key) == 1.0
+        wrong_key = complex_key.translate(str.maketrans(complex_key[0] + complex_key[1], complex_key[1] + complex_key[0]))
+        assert character_accuracy(ciphertext, wrong_key, complex_key) == 0.0
+
+    def test_synthetic_cases_are_reproducible(self):
+        cases = synthetic_cases(CORPUS, per_class=2, length_classes=(50, 100), seed=3)
+        assert [case.length_class for case in cases] == [50, 50, 100, 100]
+        assert all(len(case.ciphertext) == case.length_class for case in cases)
+        assert all(sorted(case.key) == sorted(ALPHABET) for case in cases)
+        assert synthetic_cases(CORPUS, per_class=2, length_classes=(50, 100), seed=3) == cases
+
+    def test_synthetic_cases_need_long_corpus(self):
+        with pytest.raises(ValueError):
+            synthetic_cases("SHORT", length_classes=(250,))
+
+    def test_load_sample_cases(self, tmp_path, complex_key):
+        (tmp_path / "encrypted").mkdir()
+        (tmp_path / "decrypted").mkdir()
+        (tmp_path / "encrypted" / "text_250_sample_2_ciphertext.txt").write_text("ABC", encoding='utf-8')
+        (tmp_path / "encrypted" / "text_250_sample_1_ciphertext.txt").write_text("CBA", encoding='utf-8')
+        (tmp_path / "encrypted" / "notes.txt").write_text("ignored", encoding='utf-8')
+        (tmp_path / "decrypted" / "text_250_sample_1_key.txt").write_text(complex_key + "\n", encoding='utf-8')
+
+        cases = load_sample_cases(tmp_path / "encrypted", tmp_path / "decrypted")
+        assert [(case.name, case.key) for case in cases] == [
+            ("text_250_sample_1_ciphertext", complex_key),
+            ("text_250_sample_2_ciphertext", None),
+        ]
+
+    def test_report(self, complex_key):
+        model = text_transition_matrix("ABABABAB_ABBA_BABA")
+        cases = [
+            BenchmarkCase("known", 10, substitute_encrypt("ABABAB_AB", complex_key), complex_key),
+            BenchmarkCase("unknown", 10, substitute_encrypt("BABA_AB", complex_key)),
+        ]
+        report = run_benchmark(cases, model, iterations=300)
+
+        json.dumps(report)
+        assert report["classes"]["10"]["cases"] == 2
+        assert report["classes"]["10"]["known"] == 1
+        known, unknown = report["cases"]
+        assert 0.0 <= known["accuracy"] <= 1.0
+        assert known["solved"] == (known["iterations_to_solve"] is not None)
+        assert unknown["accuracy"] is None
+        assert known["iterations_per_sec"] > 0
@@ -0,0 +1,142 @@
+import numpy as np
+import pytest
+from subcipher.analysis import text_transition_matrix
+from subcipher.checkpoint import load_checkpoint, run_fingerprint
+from subcipher.mh_solver import solve
+from subcipher.pool import CiphertextPool
+from subcipher.schedules import AdaptiveSchedule, LinearSchedule
+from subcipher.streams import PROPOSAL_BLOCK
+
+ITERATIONS = 1000
+
+
+class Preempted(Exception):
+    pass
+
+
+def preempting(schedule_class, stop_at, iterations=ITERATIONS):
+    class PreemptingSchedule(schedule_class):
+        def temperature(self, iteration):
+            if iteration == stop_at:
+                raise Preempted()
+            return super().temperature(iteration)
+
+    return PreemptingSchedule(1.0, iterations)
+
+
+class TestCheckpoint:
+    @pytest.mark.parametrize("schedule_class, name", [(LinearSchedule, "linear"), (AdaptiveSchedule, "adaptive")])
+    def test_resume_continues_exactly(self, tmp_path, ciphertext, reference_tm, schedule_class, name):
+        expected = solve(ciphertext, reference_tm, iterations=ITERATIONS, seed=3, verbose=False, schedule=name)
+
+        path = tmp_path / "run.json"
+        with pytest.raises(Preempted):
+            solve(ciphertext, reference_tm, iterations=ITERATIONS, seed=3, verbose=False,
+                  schedule=preempting(schedule_class, 450), checkpoint=path, checkpoint_interval=100)
+        assert load_checkpoint(path).iteration == 400
+
+        resumed = solve(ciphertext, reference_tm, iterations=ITERATIONS, seed=3, verbose=False, schedule=name,
+                        checkpoint=path, checkpoint_interval=100)
+        assert (resumed.key, resumed.score, resumed.iterations) == (expected.key, expected.score, expected.iterations)
+
+    def test_finished_run_returns_its_result(self, tmp_path, ciphertext, reference_tm):
+        path = tmp_path / "run.json"
+        first = solve(ciphertext, reference_tm, iterations=ITERATIONS, seed=3, verbose=False, checkpoint=path)
+        assert load_checkpoint(path).stop_reason == "iterations"
+
+        calls = []
+        again = solve(ciphertext, reference_tm, iterations=ITERATIONS, seed=5, verbose=False, checkpoint=path,
+                      callback=lambda iteration, key, score: calls.append(iteration))
+        assert (again.key, again.score, again.iterations, again.stop_reason) == \
+            (first.key, first.score, first.iterations, first.stop_reason)
+        assert len(calls) == 1
+
+    @pytest.mark.parametrize("interval", [1500, PROPOSAL_BLOCK])
+    def test_resume_across_proposal_blocks(self, tmp_path, ciphertext, reference_tm, interval):
+        iterations = 2 * PROPOSAL_BLOCK + 100
+        expected = solve(ciphertext, reference_tm, iterations=iterations, seed=8, verbose=False)
+
+        path = tmp_path / "run.json"
+        with pytest.raises(Preempted):
+            solve(ciphertext, reference_tm, iterations=iterations, seed=8, verbose=False,
+                  schedule=preempting(LinearSchedule, PROPOSAL_BLOCK + 600, iterations), checkpoint=path,
+                  checkpoint_interval=interval)
+        resumed = solve(ciphertext, reference_tm, iterations=iterations, verbose=False, checkpoint=path,
+                        checkpoint_interval=interval)
+        assert (resumed.key, resumed.score) == (expected.key, expected.score)
+
+    def test_posterior_survives_checkpoint(self, tmp_path, ciphertext, reference_tm):
+        expected = solve(ciphertext, reference_tm, iterations=1000, seed=3, verbose=False, sample_after=200)
+
+        path = tmp_path / "run.json"
+        with pytest.raises(Preempted):
+            solve(ciphertext, reference_tm, iterations=1000, seed=3, verbose=False, sample_after=200,
+                  schedule=preempting(LinearSchedule, 650), checkpoint=path, checkpoint_interval=100)
+        resumed = solve(ciphertext, reference_tm, iterations=1000, seed=3, verbose=False, sample_after=200,
+                        checkpoint=path, checkpoint_interval=100)
+        np.testing.assert_array_equal(resumed.posterior.counts, expected.posterior.counts)
+
+        again = solve(ciphertext, reference_tm, iterations=1000, verbose=False, sample_after=200, checkpoint=path)
+        np.testing.assert_array_equal(again.posterior.counts, expected.posterior.counts)
+
+    def test_checkpoint_without_samples_is_rejected(self, tmp_path, ciphertext, reference_tm):
+        path = tmp_path / "run.json"
+        solve(ciphertext, reference_tm, iterations=500, seed=1, verbose=False, checkpoint=path)
+        with pytest.raises(ValueError):
+            solve(ciphertext, reference_tm, iterations=500, verbose=False, sample_after=100, checkpoint=path)
+
+    def test_checkpoint_of_other_run_is_rejected(self, tmp_path, ciphertext, reference_tm):
+        path = tmp_path / "run.json"
+        solve(ciphertext, reference_tm, iterations=200, seed=1, verbose=False, checkpoint=path)
+        with pytest.raises(ValueError):
+            solve(ciphertext, reference_tm, iterations=300, seed=1, verbose=False, checkpoint=path)
+        with pytest.raises(ValueError):
+            solve(ciphertext[::-1], reference_tm, iterations=200, seed=1, verbose=False, checkpoint=path)
+
+    def test_checkpoint_of_other_model_or_schedule_is_rejected(self, tmp_path, ciphertext, reference_text,
+                                                               reference_tm):
+        path = tmp_path / "run.json"
+        solve(ciphertext, reference_tm, iterations=200, seed=1, verbose=False, checkpoint=path)
+        with pytest.raises(ValueError):
+            solve(ciphertext, text_transition_matrix(reference_text[::-1]), iterations=200, verbose=False,
+                  checkpoint=path)
+        with pytest.raises(ValueError):
+            solve(ciphertext, reference_tm, iterations=200, verbose=False, schedule="adaptive", checkpoint=path)
+        with pytest.raises(ValueError):
+            solve(ciphertext, reference_tm, iterations=200, initial_temp=2.0, verbose=False, checkpoint=path)
+
+    def test_fingerprint(self, ciphertext, reference_text, reference_tm):
+        assert run_fingerprint(ciphertext, 10, reference_tm) == run_fingerprint(ciphertext, 10, reference_tm)
+        assert run_fingerprint(ciphertext, 10, reference_tm) != run_fingerprint(ciphertext, 11, reference_tm)
+        assert run_fingerprint(ciphertext, 10, reference_tm) != \
+            run_fingerprint(ciphertext, 10, text_transition_matrix(reference_text[::-1]))
+        assert run_fingerprint(ciphertext, 10, reference_tm, "linear") == \
+            run_fingerprint(ciphertext, 10, reference_tm, LinearSchedule(1.0, 10))
+        assert run_fingerprint(ciphertext, 10, reference_tm, "linear") != \
+            run_fingerprint(ciphertext, 10, reference_tm, "exponential")
+        assert run_fingerprint(ciphertext, 10, reference_tm, delta_scoring=True) != \
+            run_fingerprint(ciphertext, 10, reference_tm, delta_scoring=False)
+
+    def test_edited_pool_file_is_rejected(self, tmp_path, ciphertext, reference_tm):
+        file_path = tmp_path / "message.txt"
+        file_path.write_text(ciphertext)
+        pool = CiphertextPool()
+        pool.add_file(file_path)
+        fingerprint = run_fingerprint(pool, 10, reference_tm)
+        assert run_fingerprint(pool, 10, reference_tm) == fingerprint
+
+        file_path.write_text(ciphertext[::-1] + "A")
+        assert run_fingerprint(pool, 10, reference_tm) != fingerprint
+
+    def test_invalid_file_is_rejected(self, tmp_path):
+        path = tmp_path / "run.json"
+        path.write_text("[1, 2]")
+        with pytest.raises(ValueError):
+            load_checkpoint(path)
+
+    def test_saved_mappings_are_arrays(self, tmp_path, ciphertext, reference_tm):
+        path = tmp_path / "run.json"
+        result = solve(ciphertext, reference_tm, iterations=200, seed=1, verbose=False, checkpoint=path)
+        saved = load_checkpoint(path)
+        assert isinstance(saved.best_decode, np.ndarray)
+        assert saved.best_score == result.score
@@ -1,5 +1,7 @@
+import io
+
 import pytest
-from subcipher.cipher import substitute_encrypt, substitute_decrypt
+from subcipher.cipher import SubstitutionCipher, substitute_encrypt, substitute_decrypt
 from subcipher.constants import ALPHABET
 
 
@@ -35,4 +37,47 @@ class TestSubstitutionCipher:
     def test_encryption_decryption_cycle(self, sample_text, sample_key):
         encrypted = substitute_encrypt(sample_text, sample_key)
         decrypted = substitute_decrypt(encrypted, sample_key)
-        assert decrypted == sample_text
\ No newline at end of file
+        assert decrypted == sample_text
+
+
+class TestSubstitutionCipherObject:
+    def test_matches_functions(self, sample_text, sample_key, sample_encrypted):
+        cipher = SubstitutionCipher(sample_key)
+        assert cipher.encrypt(sample_text) == substitute_encrypt(sample_text, sample_key)
+        assert cipher.decrypt(sample_encrypted) == substitute_decrypt(sample_encrypted, sample_key)
+
+    def test_bytes_match_str(self, complex_key):
+        cipher = SubstitutionCipher(complex_key)
+        text = "Hello_World\nTHE_END!"
+        assert cipher.encrypt(text.encode()) == cipher.encrypt(text).encode()
+        assert cipher.decrypt(cipher.encrypt(text.encode())) == text.upper().encode()
+
+    def test_non_ascii_text_is_uppercased_first(self, complex_key):
+        cipher = SubstitutionCipher(complex_key)
+        text = "straße_ıs"
+        assert cipher.encrypt(text) == text.upper().translate(str.maketrans(ALPHABET, complex_key))
+
+    def test_batch(self, complex_key):
+        cipher = SubstitutionCipher(complex_key)
+        texts = ["ONE", b"TWO", "three"]
+        encrypted = cipher.encrypt_batch(texts)
+        assert encrypted == [cipher.encrypt(text) for text in texts]
+        assert cipher.decrypt_batch(encrypted) == ["ONE", b"TWO", "THREE"]
+
+    @pytest.mark.parametrize("chunk_size", [1, 4, 1 << 20])
+    def test_streams(self, complex_key, chunk_size):
+        cipher = SubstitutionCipher(complex_key)
+        text = "THE_QUICK_BROWN_FOX\njumps_over_the_lazy_dog\n"
+
+        encrypted = io.StringIO()
+        assert cipher.encrypt_stream(io.StringIO(text), encrypted, chunk_size) == len(text)
+        assert encrypted.getvalue() == cipher.encrypt(text)
+
+        decrypted = io.BytesIO()
+        cipher.decrypt_stream(io.BytesIO(encrypted.getvalue().encode()), decrypted, chunk_size)
+        assert decrypted.getvalue() == text.upper().encode()
+
+    @pytest.mark.parametrize("invalid_key", ["ABC", "ABCDEFGHIJKLMNOPQRSTUVWXYZ_1", "ABCDEFGHIJKLMNOPQRSTUVWXYZA"])
+    def test_invalid_keys(self, invalid_key):
+        with pytest.raises(ValueError):
+            SubstitutionCipher(invalid_key)
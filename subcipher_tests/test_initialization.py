@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from subcipher.analysis import calculate_plausibility
+from subcipher.cipher import substitute_decrypt
+from subcipher.constants import ALPHABET
+from subcipher.initialization import (frequency_decode, greedy_refine, initial_decode, unigram_frequencies)
+from subcipher.mh_solver import solve
+from subcipher.ngram import build_ngram_model
+from subcipher.scoring import create_scorer, key_to_decode
+from subcipher.tempering import solve_tempering
+
+
+class TestInitialization:
+    def test_unigram_frequencies(self, reference_text, reference_tm):
+        frequencies = unigram_frequencies(reference_tm)
+        assert frequencies.sum() == pytest.approx(1.0)
+        assert ALPHABET[int(np.argmax(frequencies))] == "_"
+        ngram_frequencies = unigram_frequencies(build_ngram_model(reference_text, 3))
+        assert ALPHABET[int(np.argmax(ngram_frequencies))] == "_"
+
+    def test_frequency_decode_maps_separator(self, ciphertext, reference_tm, complex_key):
+        decode = frequency_decode(ciphertext, reference_tm)
+        assert sorted(decode) == list(range(len(ALPHABET)))
+        # The most frequent ciphertext symbol encrypts "_" and has to be mapped back to it
+        assert decode[ALPHABET.index(complex_key[ALPHABET.index("_")])] == ALPHABET.index("_")
+
+    def test_greedy_refine_does_not_lower_score(self, ciphertext, reference_tm):
+        scorer = create_scorer(ciphertext, reference_tm)
+        start = frequency_decode(ciphertext, reference_tm)
+        refined = greedy_refine(scorer, start)
+        assert sorted(refined) == list(range(len(ALPHABET)))
+        assert scorer.score(refined) >= scorer.score(start)
+        assert np.array_equal(greedy_refine(scorer, refined), refined)
+
+    def test_initial_decode(self, ciphertext, reference_tm, complex_key):
+        scorer = create_scorer(ciphertext, reference_tm)
+        assert np.array_equal(initial_decode(ciphertext, reference_tm, scorer, initial_key=complex_key),
+                              key_to_decode(complex_key))
+        with pytest.raises(ValueError):
+            initial_decode(ciphertext, reference_tm, scorer, initial_key="ABC")
+        with pytest.raises(ValueError):
+            initial_decode(ciphertext, reference_tm, scorer, init="unknown")
+
+    @pytest.mark.parametrize("init", ["frequency", "greedy"])
+    def test_solver_reports_warm_start(self, ciphertext, reference_tm, init):
+        starts = []
+        solve(ciphertext, reference_tm, iterations=10, seed=1, verbose=False, init=init,
+              callback=lambda iteration, key, score: starts.append(key) if iteration == 0 else None)
+        scorer = create_scorer(ciphertext, reference_tm)
+        expected = frequency_decode(ciphertext, reference_tm)
+        if init == "greedy":
+            expected = greedy_refine(scorer, expected)
+        assert np.array_equal(key_to_decode(starts[0]), expected)
+
+    def test_solver_starts_from_initial_key(self, ciphertext, reference_tm, complex_key):
+        result = solve(ciphertext, reference_tm, iterations=0, verbose=False, initial_key=complex_key)
+        assert result.key == complex_key
+        assert result.score == pytest.approx(calculate_plausibility(substitute_decrypt(ciphertext, complex_key),
+                                                                    reference_tm))
+
+    def test_tempering_starts_from_initial_key(self, ciphertext, reference_tm, complex_key):
+        result = solve_tempering(ciphertext, reference_tm, iterations=0, verbose=False, initial_key=complex_key)
+        assert result.key == complex_key
@@ -0,0 +1,69 @@
+import csv
+import json
+
+import pytest
+from subcipher.instrumentation import RunRecorder
+from subcipher.mh_solver import solve
+
+
+class TestInstrumentation:
+    def test_report_is_opt_in(self, ciphertext, reference_tm):
+        assert solve(ciphertext, reference_tm, iterations=50, seed=1, verbose=False).report is None
+
+    def test_report_counts(self, ciphertext, reference_tm):
+        result = solve(ciphertext, reference_tm, iterations=1000, seed=1, verbose=False, instrument=True)
+        report = result.report
+
+        assert report.proposals == result.iterations == 1000
+        assert sum(band.proposals for band in report.bands) == report.proposals
+        assert sum(band.accepted for band in report.bands) == report.accepted
+        assert 0 < report.acceptance_rate <= 1
+        assert report.proposals_per_sec > 0
+        assert set(report.timings) == {"setup", "propose", "score", "accept", "overhead"}
+        assert sum(report.timings.values()) == pytest.approx(report.elapsed)
+
+        assert report.trace[-1].iteration == 1000
+        assert report.trace[-1].best_score == pytest.approx(result.score)
+        iterations = [point.iteration for point in report.trace]
+        assert iterations == sorted(iterations)
+
+    def test_report_does_not_change_the_run(self, ciphertext, reference_tm):
+        plain = solve(ciphertext, reference_tm, iterations=500, seed=4, verbose=False)
+        instrumented = solve(ciphertext, reference_tm, iterations=500, seed=4, verbose=False, instrument=True)
+        assert (plain.key, plain.score) == (instrumented.key, instrumented.score)
+
+    def test_trace_ends_at_early_stop(self, ciphertext, reference_tm):
+        result = solve(ciphertext, reference_tm, iterations=10000, seed=2, verbose=False, patience=30,
+                       instrument=True)
+        assert result.iterations < 10000
+        assert result.report.trace[-1].iteration == result.iterations
+
+    def test_bands_follow_the_temperature(self):
+        recorder = RunRecorder(iterations=4, max_temp=1.0, bands=2)
+        for iteration, temperature, accepted in [(1, 1.0, True), (2, 0.75, True), (3, 0.5, False), (4, 0.25, False)]:
+            recorder.record(iteration, temperature, -1.0, accepted, 0.0, 0.0, 0.0, 0.0, -10.0, -5.0)
+        report = recorder.finish(1.0)
+        assert [(band.proposals, band.accepted) for band in report.bands] == [(1, 0), (3, 2)]
+        assert report.bands[0].acceptance_rate == 0.0
+
+    def test_export(self, tmp_path, ciphertext, reference_tm):
+        report = solve(ciphertext, reference_tm, iterations=400, seed=3, verbose=False, instrument=True).report
+
+        report.save_json(tmp_path / "report.json")
+        data = json.loads((tmp_path / "report.json").read_text(encoding='utf-8'))
+        assert data["proposals"] == 400
+        assert data["proposals_per_sec"] == pytest.approx(report.proposals_per_sec)
+        assert len(data["bands"]) == len(report.bands)
+
+        report.save_csv(tmp_path / "trace.csv")
+        with open(tmp_path / "trace.csv", encoding='utf-8') as file:
+            rows = list(csv.DictReader(file))
+        assert len(rows) == len(report.trace)
+        assert int(rows[-1]["iteration"]) == 400
+
+        report.save_csv(tmp_path / "bands.csv", table="bands")
+        with open(tmp_path / "bands.csv", encoding='utf-8') as file:
+            assert "acceptance_rate" in next(csv.reader(file))
+
+        with pytest.raises(ValueError):
+            report.save_csv(tmp_path / "other.csv", table="other")
@@ -0,0 +1,92 @@
+import pickle
+
+import numpy as np
+import pytest
+from subcipher.analysis import UNKNOWN, encode_text, text_transition_matrix
+from subcipher.cipher import substitute_decrypt, substitute_encrypt
+from subcipher.largefile import decrypt_file, encode_bytes, file_ngram_counts, map_file
+from subcipher.ngram import ngram_counts
+from subcipher.pool import CiphertextPool
+from subcipher.scoring import create_scorer
+
+TEXT = "THE_QUICK_BROWN_FOX_JUMPS_OVER_THE_LAZY_DOG_AND_THE_DOG_SLEEPS_IN_THE_SUN"
+
+
+class TestLargeFile:
+    @pytest.fixture
+    def ciphertext_file(self, tmp_path, complex_key):
+        path = tmp_path / "ciphertext.txt"
+        path.write_text(substitute_encrypt(TEXT, complex_key))
+        return path
+
+    def test_encode_bytes_matches_encode_text(self):
+        data = np.frombuffer(b"AbZ_\n!", dtype=np.uint8)
+        assert np.array_equal(encode_bytes(data), encode_text("ABZ_\n!", strict=False))
+        assert encode_bytes(data)[-1] == UNKNOWN
+
+    def test_map_file_of_empty_file(self, tmp_path):
+        path = tmp_path / "empty.txt"
+        path.write_bytes(b"")
+        assert len(map_file(path)) == 0
+        assert file_ngram_counts(path, 2).sum() == 0
+
+    @pytest.mark.parametrize("n", [1, 2, 3])
+    @pytest.mark.parametrize("chunk_size", [1, 2, 7, 1 << 20])
+    def test_counts_match_in_memory_counts(self, ciphertext_file, n, chunk_size):
+        expected = ngram_counts(encode_text(ciphertext_file.read_text()), n)
+        assert np.array_equal(file_ngram_counts(ciphertext_file, n, chunk_size=chunk_size), expected)
+
+    def test_counts_skip_line_breaks(self, tmp_path):
+        path = tmp_path / "lines.txt"
+        path.write_bytes(b"AB\nab\n")
+        counts = file_ngram_counts(path, 2, chunk_size=3)
+        assert counts.sum() == 2
+        assert counts[0, 1] == 2
+
+    @pytest.mark.parametrize("chunk_size", [5, 1 << 20])
+    def test_decrypt_file_matches_substitute_decrypt(self, tmp_path, complex_key, chunk_size):
+        ciphertext = substitute_encrypt(TEXT, complex_key) + "\n" + substitute_encrypt(TEXT, complex_key).lower()
+        input_path = tmp_path / "ciphertext.txt"
+        input_path.write_text(ciphertext)
+        output_path = tmp_path / "out" / "plaintext.txt"
+
+        written = decrypt_file(input_path, output_path, complex_key, chunk_size=chunk_size)
+        assert output_path.read_text() == substitute_decrypt(ciphertext, complex_key)
+        assert written == len(ciphertext)
+
+    def test_decrypt_file_rejects_invalid_key(self, ciphertext_file, tmp_path):
+        with pytest.raises(ValueError):
+            decrypt_file(ciphertext_file, tmp_path / "plaintext.txt", "ABC")
+
+
+class TestFilePool:
+    @pytest.fixture
+    def ciphertext_file(self, tmp_path, complex_key):
+        path = tmp_path / "ciphertext.txt"
+        path.write_text(substitute_encrypt(TEXT, complex_key) + "\n")
+        return path
+
+    def test_add_file_updates_cached_counts(self, ciphertext_file, complex_key):
+        message = substitute_encrypt("THE_DOG", complex_key)
+        pool = CiphertextPool([message])
+        bigrams = pool.counts(2)
+        pool.add_file(ciphertext_file)
+
+        expected = CiphertextPool([message, substitute_encrypt(TEXT, complex_key)])
+        assert len(pool) == 2
+        assert pool.counts(2) is bigrams
+        assert np.array_equal(bigrams, expected.counts(2))
+        assert np.array_equal(pool.counts(3), expected.counts(3))
+
+    def test_pickle_keeps_files(self, ciphertext_file):
+        pool = CiphertextPool()
+        pool.add_file(ciphertext_file)
+        restored = pickle.loads(pickle.dumps(pool))
+        assert restored.files == [ciphertext_file]
+        assert np.array_equal(restored.counts(2), pool.counts(2))
+
+    def test_text_scoring_rejects_files(self, ciphertext_file):
+        pool = CiphertextPool()
+        pool.add_file(ciphertext_file)
+        with pytest.raises(ValueError):
+            create_scorer(pool, text_transition_matrix(TEXT), delta_scoring=False)
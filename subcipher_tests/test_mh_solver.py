@@ -1,9 +1,12 @@
+import random
+
 import numpy as np
 import pytest
-from subcipher.analysis import calculate_plausibility
+from subcipher.analysis import bigram_counts, calculate_plausibility, encode_text, log_transition_matrix
 from subcipher.cipher import substitute_encrypt, substitute_decrypt
 from subcipher.constants import ALPHABET
-from subcipher.mh_solver import metropolis_hastings
+from subcipher.mh_solver import StopReason, metropolis_hastings, solve
+from subcipher.scoring import batch_key_scores, create_scorer, key_score
 
 
 class TestMetropolisHastings:
@@ -24,7 +27,8 @@ class TestMetropolisHastings:
             ciphertext=sample_encrypted,
             tm_ref=sample_transition_matrix,
             iterations=1000,
-            initial_temp=1.0
+            initial_temp=1.0,
+            seed=0
         )
         assert isinstance(result_key, str)
         assert len(result_key) == len(ALPHABET)
@@ -37,12 +41,111 @@ class TestMetropolisHastings:
             ciphertext=sample_encrypted,
             tm_ref=sample_transition_matrix,
             iterations=iterations // 2,
-            initial_temp=1.0
+            initial_temp=1.0,
+            seed=0
         )
         new_result_key, new_score = metropolis_hastings(
             ciphertext=sample_encrypted,
             tm_ref=sample_transition_matrix,
             iterations=iterations,
-            initial_temp=1.0
+            initial_temp=1.0,
+            seed=0
         )
         assert new_score >= initial_score
+
+
+class TestDeltaScoring:
+    def test_key_score_matches_full_score(self, ciphertext, reference_tm, complex_key):
+        counts = bigram_counts(encode_text(ciphertext))
+        log_tm = log_transition_matrix(reference_tm)
+        rng = random.Random(7)
+        for _ in range(20):
+            key = list(ALPHABET)
+            rng.shuffle(key)
+            key = ''.join(key)
+            decode = np.array([key.index(char) for char in ALPHABET])
+            expected = calculate_plausibility(substitute_decrypt(ciphertext, key), reference_tm)
+            assert key_score(counts, log_tm, decode) == pytest.approx(expected)
+
+    def test_swap_delta_matches_full_score(self, ciphertext, reference_tm):
+        counts = bigram_counts(encode_text(ciphertext))
+        log_tm = log_transition_matrix(reference_tm)
+        decode = np.arange(len(ALPHABET))
+        scorer = create_scorer(ciphertext, reference_tm)
+        scorer.reset(decode)
+        for a, b in [(0, 1), (3, 26), (25, 26), (5, 12)]:
+            swapped = decode.copy()
+            swapped[a], swapped[b] = decode[b], decode[a]
+            expected = key_score(counts, log_tm, swapped) - key_score(counts, log_tm, decode)
+            assert scorer.swap_delta(a, b) == pytest.approx(expected)
+
+    def test_batch_key_scores(self, ciphertext, reference_tm):
+        counts = bigram_counts(encode_text(ciphertext))
+        log_tm = log_transition_matrix(reference_tm)
+        decodes = np.argsort(np.random.default_rng(5).random((600, len(ALPHABET))), axis=1)
+        expected = [key_score(counts, log_tm, decode) for decode in decodes]
+        assert batch_key_scores(counts, log_tm, decodes) == pytest.approx(expected)
+        assert batch_key_scores(counts, log_tm, decodes[:0]).shape == (0,)
+        with pytest.raises(ValueError):
+            batch_key_scores(counts, log_tm, decodes[:, :5])
+
+    @pytest.mark.parametrize("delta_scoring", [True, False])
+    def test_scorer_batch_matches_single_scores(self, ciphertext, reference_tm, delta_scoring):
+        scorer = create_scorer(ciphertext, reference_tm, delta_scoring)
+        decodes = np.argsort(np.random.default_rng(6).random((20, len(ALPHABET))), axis=1)
+        assert scorer.score_batch(decodes) == pytest.approx([scorer.score(decode) for decode in decodes])
+
+    @pytest.mark.parametrize("delta_scoring", [True, False])
+    def test_scorer_tracks_swaps(self, ciphertext, reference_tm, delta_scoring):
+        scorer = create_scorer(ciphertext, reference_tm, delta_scoring)
+        counts = bigram_counts(encode_text(ciphertext))
+        log_tm = log_transition_matrix(reference_tm)
+        rng = random.Random(3)
+        score = scorer.reset(np.random.default_rng(3).permutation(len(ALPHABET)))
+        for _ in range(50):
+            a, b = rng.sample(range(len(ALPHABET)), 2)
+            swapped = scorer.decode.copy()
+            swapped[a], swapped[b] = swapped[b], swapped[a]
+            delta = scorer.swap_delta(a, b)
+            assert delta == pytest.approx(key_score(counts, log_tm, swapped) - score)
+            scorer.swap(a, b)
+            score += delta
+            assert np.array_equal(scorer.decode, swapped)
+            assert score == pytest.approx(key_score(counts, log_tm, scorer.decode))
+
+    @pytest.mark.parametrize("delta_scoring", [True, False])
+    def test_reported_score_matches_full_score(self, ciphertext, reference_tm, delta_scoring):
+        key, score = metropolis_hastings(ciphertext, reference_tm, iterations=300, delta_scoring=delta_scoring,
+                                         seed=42)
+        assert score == pytest.approx(calculate_plausibility(substitute_decrypt(ciphertext, key), reference_tm))
+
+
+class TestEarlyStopping:
+    def test_runs_all_iterations_by_default(self, ciphertext, reference_tm):
+        result = solve(ciphertext, reference_tm, iterations=300, seed=1, verbose=False)
+        assert result.iterations == 300
+        assert result.stop_reason == StopReason.ITERATIONS
+
+    def test_patience(self, ciphertext, reference_tm):
+        improvements = []
+        result = solve(ciphertext, reference_tm, iterations=100000, seed=1, verbose=False, patience=200,
+                       callback=lambda iteration, key, score: improvements.append(iteration))
+        assert result.stop_reason == StopReason.PATIENCE
+        assert result.iterations == improvements[-1] + 200
+
+    def test_target_score(self, ciphertext, reference_tm):
+        initial = solve(ciphertext, reference_tm, iterations=0, seed=1, verbose=False)
+        result = solve(ciphertext, reference_tm, iterations=100000, seed=1, verbose=False,
+                       target_score=initial.score + 1)
+        assert result.stop_reason == StopReason.TARGET_SCORE
+        assert result.score >= initial.score + 1
+        assert result.iterations < 100000
+
+    def test_time_budget(self, ciphertext, reference_tm):
+        result = solve(ciphertext, reference_tm, iterations=10 ** 9, seed=1, verbose=False, time_budget=0.05)
+        assert result.stop_reason == StopReason.TIME_BUDGET
+        assert 0 < result.iterations < 10 ** 9
+
+    def test_metropolis_hastings_matches_solve(self, ciphertext, reference_tm):
+        result = solve(ciphertext, reference_tm, iterations=300, seed=4, verbose=False)
+        assert metropolis_hastings(ciphertext, reference_tm, 300, seed=4, verbose=False) == (result.key, result.score)
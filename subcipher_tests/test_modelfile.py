@@ -0,0 +1,124 @@
+import pickle
+import struct
+
+import numpy as np
+import pytest
+from subcipher.cipher import substitute_decrypt, substitute_encrypt
+from subcipher.mh_solver import solve
+from subcipher.modelfile import (MODEL_MAGIC, MODEL_VERSION, MappedNgramModel, build_model_file, is_model_file,
+                                 load_model, save_model)
+from subcipher.ngram import build_ngram_model
+from subcipher.reference import load_language_model
+
+REFERENCE = "THE_QUICK_BROWN_FOX_JUMPS_OVER_THE_LAZY_DOG_AND_THE_DOG_SLEEPS_IN_THE_SUN"
+
+
+class TestModelFile:
+    @pytest.mark.parametrize("n", [2, 3, 4])
+    def test_round_trip(self, tmp_path, n):
+        model = build_ngram_model(REFERENCE, n, smoothing=0.5)
+        save_model(model, tmp_path / "model.scm")
+        loaded = load_model(tmp_path / "model.scm")
+
+        assert isinstance(loaded, MappedNgramModel)
+        assert isinstance(loaded.log_probs, np.memmap)
+        assert (loaded.n, loaded.alphabet, loaded.smoothing) == (n, model.alphabet, 0.5)
+        np.testing.assert_array_equal(loaded.counts, model.counts)
+        np.testing.assert_array_equal(loaded.log_probs, model.log_probs)
+        assert loaded.plausibility("THE_DOG") == model.plausibility("THE_DOG")
+
+    def test_counts_are_compact(self, tmp_path):
+        model = build_ngram_model(REFERENCE, 2)
+        save_model(model, tmp_path / "small.scm")
+        assert load_model(tmp_path / "small.scm").counts.dtype == np.uint8
+
+        model.counts = model.counts * 100000
+        save_model(model, tmp_path / "large.scm")
+        assert load_model(tmp_path / "large.scm").counts.dtype == np.uint32
+
+    def test_corrupted_file_is_rejected(self, tmp_path):
+        path = tmp_path / "model.scm"
+        save_model(build_ngram_model(REFERENCE, 2), path)
+        data = bytearray(path.read_bytes())
+        data[-1] ^= 0xFF
+        path.write_bytes(bytes(data))
+
+        with pytest.raises(ValueError, match="corrupted"):
+            load_model(path)
+        load_model(path, verify=False)
+
+    def test_truncated_and_foreign_files_are_rejected(self, tmp_path):
+        path = tmp_path / "model.scm"
+        save_model(build_ngram_model(REFERENCE, 2), path)
+        path.write_bytes(path.read_bytes()[:-8])
+        with pytest.raises(ValueError, match="truncated"):
+            load_model(path)
+
+        text = tmp_path / "text.txt"
+        text.write_text(REFERENCE)
+        assert not is_model_file(text)
+        with pytest.raises(ValueError):
+            load_model(text)
+
+    def test_pickle_maps_file_again(self, tmp_path):
+        path = tmp_path / "model.scm"
+        save_model(build_ngram_model(REFERENCE, 3), path)
+        model = load_model(path)
+
+        data = pickle.dumps(model)
+        assert len(data) < model.log_probs.nbytes
+        restored = pickle.loads(data)
+        assert isinstance(restored.log_probs, np.memmap)
+        np.testing.assert_array_equal(restored.log_probs, model.log_probs)
+
+    def test_build_from_several_corpora(self, tmp_path):
+        first, second = tmp_path / "first.txt", tmp_path / "second.txt"
+        first.write_text("Příliš žluťoučký kůň", encoding='utf-8')
+        second.write_text("úpěl ďábelské ódy", encoding='utf-8')
+        model = build_model_file([first, second], tmp_path / "model.scm", n=3)
+
+        expected = build_ngram_model(first.read_text(encoding='utf-8'), 3).counts + \
+            build_ngram_model(second.read_text(encoding='utf-8'), 3).counts
+        np.testing.assert_array_equal(model.counts, expected)
+        assert is_model_file(tmp_path / "model.scm")
+        assert (tmp_path / "model.scm").read_bytes().startswith(MODEL_MAGIC)
+
+    def test_language_model_loads_model_files(self, tmp_path, complex_key):
+        corpus = tmp_path / "corpus.txt"
+        corpus.write_text(REFERENCE)
+        build_model_file([corpus], tmp_path / "model.scm", n=2)
+        model = load_language_model(tmp_path / "model.scm", n=3)
+        assert isinstance(model, MappedNgramModel) and model.n == 2
+
+        ciphertext = substitute_encrypt("THE_DOG_SLEEPS", complex_key)
+        result = solve(ciphertext, model, iterations=200, seed=1, verbose=False)
+        assert result.score == pytest.approx(model.plausibility(substitute_decrypt(ciphertext, result.key)))
+
+    def test_profile_is_recorded(self, tmp_path):
+        corpus = tmp_path / "corpus.txt"
+        corpus.write_text("Größe der Übung", encoding='utf-8')
+        build_model_file([corpus], tmp_path / "de.scm", n=2, profile="de")
+        assert load_model(tmp_path / "de.scm").profile == "de"
+
+        save_model(build_ngram_model(REFERENCE, 2), tmp_path / "unknown.scm")
+        assert load_model(tmp_path / "unknown.scm").profile is None
+        with pytest.raises(ValueError):
+            save_model(build_ngram_model(REFERENCE, 2), tmp_path / "long.scm", profile="x" * 17)
+
+    def test_other_profile_is_rejected(self, tmp_path):
+        corpus = tmp_path / "corpus.txt"
+        corpus.write_text(REFERENCE)
+        build_model_file([corpus], tmp_path / "model.scm", n=2, profile="de")
+        with pytest.raises(ValueError, match="'de'"):
+            load_language_model(tmp_path / "model.scm", profile="cs")
+        assert load_language_model(tmp_path / "model.scm", profile="de").profile == "de"
+        assert load_language_model(tmp_path / "model.scm").profile == "de"
+
+    def test_other_version_is_rejected(self, tmp_path):
+        path = tmp_path / "model.scm"
+        save_model(build_ngram_model(REFERENCE, 2), path)
+        data = bytearray(path.read_bytes())
+        struct.pack_into("<H", data, len(MODEL_MAGIC), MODEL_VERSION + 1)
+        path.write_bytes(bytes(data))
+        with pytest.raises(ValueError, match="version"):
+            load_model(path, verify=False)
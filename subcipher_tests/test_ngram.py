@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from subcipher.analysis import bigram_counts, calculate_plausibility, encode_text, text_transition_matrix
+from subcipher.cipher import substitute_decrypt
+from subcipher.constants import ALPHABET
+from subcipher.mh_solver import metropolis_hastings
+from subcipher.ngram import NgramModel, build_ngram_model, build_ngram_model_from_file, ngram_counts
+from subcipher.scoring import create_scorer, key_to_decode
+from subcipher.utils import normalize_text
+
+REFERENCE = "Příliš žluťoučký kůň úpěl ďábelské ódy. The quick brown fox jumps over the lazy dog."
+
+
+class TestNgramModel:
+    def test_bigram_counts_match(self):
+        encoded = encode_text("ABRAKADABRA_")
+        np.testing.assert_array_equal(ngram_counts(encoded, 2), bigram_counts(encoded))
+
+    def test_trigram_counts(self):
+        counts = ngram_counts(encode_text("ABAB"), 3)
+        assert counts.shape == (27, 27, 27)
+        assert counts.sum() == 2
+        assert counts[0, 1, 0] == counts[1, 0, 1] == 1
+
+    def test_counts_skip_unknown(self):
+        assert ngram_counts(encode_text("AB!AB", strict=False), 3).sum() == 0
+
+    def test_bigram_model_matches_transition_matrix(self):
+        model = build_ngram_model(REFERENCE, 2)
+        text = "ZLUTY_KUN_SKACE"
+        assert model.plausibility(text) == pytest.approx(
+            calculate_plausibility(text, text_transition_matrix(normalize_text(REFERENCE))))
+
+    @pytest.mark.parametrize("n", [2, 3, 4])
+    def test_streaming_build_matches_in_memory(self, tmp_path, n):
+        file = tmp_path / "reference.txt"
+        file.write_text(REFERENCE, encoding='utf-8')
+        streamed = build_ngram_model_from_file(file, n, chunk_size=5)
+        np.testing.assert_array_equal(streamed.counts, build_ngram_model(REFERENCE, n).counts)
+
+    @pytest.mark.parametrize("n", [1, 5])
+    def test_unsupported_order(self, n):
+        with pytest.raises(ValueError):
+            build_ngram_model(REFERENCE, n)
+
+    def test_invalid_smoothing(self):
+        with pytest.raises(ValueError):
+            NgramModel.from_counts(np.zeros((27, 27)), smoothing=0)
+
+
+class TestNgramScorer:
+    @pytest.mark.parametrize("n", [2, 3, 4])
+    def test_score_and_delta_match_full_rescoring(self, ciphertext, complex_key, n):
+        model = build_ngram_model(REFERENCE, n)
+        scorer = create_scorer(ciphertext, model)
+        decode = key_to_decode(complex_key)
+
+        assert scorer.score(decode) == pytest.approx(model.plausibility(substitute_decrypt(ciphertext, complex_key)))
+        scorer.reset(decode)
+        for a, b in [(0, 1), (4, 26), (7, 19), (2, 3), (0, 1)]:
+            swapped = scorer.decode.copy()
+            swapped[a], swapped[b] = swapped[b], swapped[a]
+            expected = scorer.score(swapped) - scorer.score(scorer.decode)
+            assert scorer.swap_delta(a, b) == pytest.approx(expected)
+            scorer.swap(a, b)
+            assert np.array_equal(scorer.decode, swapped)
+
+    @pytest.mark.parametrize("n", [2, 3, 4])
+    def test_score_batch(self, ciphertext, n):
+        scorer = create_scorer(ciphertext, build_ngram_model(REFERENCE, n))
+        decodes = np.argsort(np.random.default_rng(n).random((300, len(ALPHABET))), axis=1)
+        assert scorer.score_batch(decodes) == pytest.approx([scorer.score(decode) for decode in decodes])
+
+    @pytest.mark.parametrize("delta_scoring", [True, False])
+    def test_solver_accepts_model(self, ciphertext, delta_scoring):
+        model = build_ngram_model(REFERENCE, 3)
+        key, score = metropolis_hastings(ciphertext, model, iterations=200, delta_scoring=delta_scoring,
+                                         seed=1, verbose=False)
+        assert sorted(key) == sorted(ALPHABET)
+        assert score == pytest.approx(model.plausibility(substitute_decrypt(ciphertext, key)))
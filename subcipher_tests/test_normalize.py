@@ -1,5 +1,8 @@
+from pathlib import Path
+
 import pytest
-from subcipher.utils import normalize_text
+from subcipher.utils import (NORMALIZATION_PROFILES, NormalizationProfile, _TABLE_CACHE_SIZE, _profile_table,
+                             get_profile, load_textfile, normalize_text)
 
 class TestNormalizeText:
     def test_basic_normalization(self):
@@ -23,3 +26,67 @@ class TestNormalizeText:
     def test_empty_string(self):
         """Test normalization of an empty string."""
         assert normalize_text("") == ""
+
+
+def replace_passes(text):
+    # The original implementation of the Czech normalization, kept as the reference output
+    normalized = text.upper()
+    for char, replacement in zip("ÁČĎÉĚÍŇÓŘŠŤÚŮÝŽ", "ACDEEINORSTUUYZ"):
+        normalized = normalized.replace(char, replacement)
+    normalized = ''.join(char if char in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ' else '_' for char in normalized)
+    while '__' in normalized:
+        normalized = normalized.replace('__', '_')
+    return normalized
+
+
+class TestNormalizationProfiles:
+    @pytest.mark.parametrize("text", [
+        "Příliš žluťoučký kůň úpěl ďábelské ódy",
+        "Straße ﬁnále ŉ ΐ ǅ Ωmega",
+        "emoji 😀😀 and \ud800 surrogate",
+        "Äpfel, Öl & Übermut_____!",
+        "áb̌ c",
+    ])
+    def test_default_matches_replace_passes(self, text):
+        assert normalize_text(text) == replace_passes(text)
+
+    def test_reference_corpus_matches_replace_passes(self):
+        text = load_textfile(Path(__file__).parent.parent / "data_samples" / "krakatit.txt")[:200000]
+        assert normalize_text(text) == replace_passes(text)
+
+    @pytest.mark.parametrize("profile, text, expected", [
+        ("sk", "Ľúbostná báseň, štvorlístok v ďateline, Ôsmy kôň, päť", "LUBOSTNA_BASEN_STVORLISTOK_V_DATELINE_OSMY_KON_PAT"),
+        ("cs", "päť", "P_T"),
+        ("de", "Grüße aus Köln, Ärger über ẞ", "GRUESSE_AUS_KOELN_AERGER_UEBER_SS"),
+        ("generic", "Příliš Ł naïve café ﬁ ǆ Ｆｕｌｌ", "PRILIS_NAIVE_CAFE_FI_DZ_FULL"),
+    ])
+    def test_profiles(self, profile, text, expected):
+        assert normalize_text(text, profile) == expected
+
+    def test_generic_profile_covers_czech(self):
+        text = "Příliš žluťoučký kůň úpěl ďábelské ódy, ČŘŮ"
+        assert normalize_text(text, "generic") == normalize_text(text)
+
+    def test_custom_profile(self):
+        profile = NormalizationProfile("pl", {'Ł': 'L', 'Ą': 'A'})
+        assert normalize_text("Łąka", profile) == "LAKA"
+
+    def test_profiles_with_equal_rules_share_a_table(self):
+        _profile_table.cache_clear()
+        for _ in range(3):
+            assert normalize_text("Łąka", NormalizationProfile("pl", {'Ł': 'L', 'Ą': 'A'})) == "LAKA"
+        assert _profile_table.cache_info().currsize == 1
+        for index in range(_TABLE_CACHE_SIZE + 5):
+            normalize_text("Łąka", NormalizationProfile(f"pl{index}", {'Ł': 'L'}))
+        assert _profile_table.cache_info().currsize == _TABLE_CACHE_SIZE
+
+    def test_table_grows_with_new_characters(self):
+        profile = NormalizationProfile("cs-copy", NORMALIZATION_PROFILES["cs"].replacements)
+        assert normalize_text("Čas", profile) == "CAS"
+        assert normalize_text("Žába ß", profile) == "ZABA_SS"
+        assert normalize_text("Čas", profile) == "CAS"
+
+    def test_unknown_profile(self):
+        with pytest.raises(ValueError):
+            normalize_text("text", "xx")
+        assert get_profile("de") is NORMALIZATION_PROFILES["de"]
@@ -0,0 +1,33 @@
+import pytest
+from subcipher.constants import ALPHABET
+from subcipher.mh_solver import metropolis_hastings
+from subcipher.parallel import chain_seeds, solve_parallel
+
+
+class TestSolveParallel:
+    def test_chain_seeds_are_distinct_and_reproducible(self):
+        seeds = chain_seeds(16, seed=3)
+        assert len(set(seeds)) == 16
+        assert chain_seeds(16, seed=3) == seeds
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_returns_best_chain(self, ciphertext, reference_tm, workers):
+        best_key, best_score, chains = solve_parallel(ciphertext, reference_tm, restarts=3, workers=workers,
+                                                      iterations=200, seed=11)
+        assert len(chains) == 3
+        assert best_score == max(chain.score for chain in chains)
+        assert sorted(best_key) == sorted(ALPHABET)
+
+    def test_chains_are_reproducible(self, ciphertext, reference_tm):
+        _, _, chains = solve_parallel(ciphertext, reference_tm, restarts=2, workers=2, iterations=200, seed=5)
+        for chain in chains:
+            key, score = metropolis_hastings(ciphertext, reference_tm, iterations=200, seed=chain.seed, verbose=False)
+            assert (key, score) == (chain.key, chain.score)
+
+    def test_invalid_arguments(self, ciphertext, reference_tm):
+        with pytest.raises(ValueError):
+            solve_parallel(ciphertext, reference_tm, restarts=0)
+        with pytest.raises(ValueError):
+            solve_parallel(ciphertext, reference_tm, workers=0)
+        with pytest.raises(ValueError):
+            solve_parallel(ciphertext, reference_tm, restarts=2, workers=1, checkpoint="run.json")
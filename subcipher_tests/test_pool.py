@@ -0,0 +1,76 @@
+import pickle
+
+import numpy as np
+import pytest
+from subcipher.analysis import calculate_plausibility, encode_text, text_transition_matrix
+from subcipher.cipher import substitute_decrypt, substitute_encrypt
+from subcipher.mh_solver import solve_joint
+from subcipher.ngram import build_ngram_model, ngram_counts
+from subcipher.pool import CiphertextPool
+from subcipher.scoring import create_scorer, key_to_decode
+from subcipher.tempering import solve_tempering
+
+REFERENCE = "THE_QUICK_BROWN_FOX_JUMPS_OVER_THE_LAZY_DOG_AND_THE_DOG_SLEEPS_IN_THE_SUN"
+MESSAGES = ["THE_DOG_SLEEPS", "AND_THE_FOX_JUMPS", "OVER_THE_LAZY_DOG"]
+
+
+class TestCiphertextPool:
+    @pytest.fixture
+    def ciphertexts(self, complex_key):
+        return [substitute_encrypt(message, complex_key) for message in MESSAGES]
+
+    @pytest.mark.parametrize("n", [1, 2, 3])
+    def test_counts_do_not_cross_messages(self, ciphertexts, n):
+        pool = CiphertextPool(ciphertexts)
+        expected = sum(ngram_counts(encode_text(ciphertext), n) for ciphertext in ciphertexts)
+        assert np.array_equal(pool.counts(n), expected)
+        assert pool.counts(2).sum() == sum(len(ciphertext) - 1 for ciphertext in ciphertexts)
+
+    def test_add_updates_cached_counts(self, ciphertexts):
+        pool = CiphertextPool(ciphertexts[:1])
+        bigrams = pool.counts(2)
+        pool.add(ciphertexts[1])
+        pool.add(ciphertexts[2])
+        assert len(pool) == 3
+        assert pool.counts(2) is bigrams
+        assert np.array_equal(bigrams, CiphertextPool(ciphertexts).counts(2))
+
+    def test_add_rejects_unknown_characters(self):
+        with pytest.raises(ValueError):
+            CiphertextPool(["ABC!"])
+
+    def test_pickle_keeps_messages(self, ciphertexts):
+        pool = CiphertextPool(ciphertexts)
+        pool.counts(2)
+        restored = pickle.loads(pickle.dumps(pool))
+        assert restored.messages == pool.messages
+        assert np.array_equal(restored.counts(2), pool.counts(2))
+
+    @pytest.mark.parametrize("delta_scoring", [True, False])
+    def test_joint_score_is_sum_of_message_scores(self, ciphertexts, complex_key, delta_scoring):
+        reference_tm = text_transition_matrix(REFERENCE)
+        scorer = create_scorer(CiphertextPool(ciphertexts), reference_tm, delta_scoring)
+        expected = sum(calculate_plausibility(substitute_decrypt(ciphertext, complex_key), reference_tm)
+                       for ciphertext in ciphertexts)
+        assert scorer.score(key_to_decode(complex_key)) == pytest.approx(expected)
+
+    def test_joint_ngram_score(self, ciphertexts, complex_key):
+        model = build_ngram_model(REFERENCE, 3)
+        scorer = create_scorer(CiphertextPool(ciphertexts), model)
+        expected = sum(model.plausibility(substitute_decrypt(ciphertext, complex_key)) for ciphertext in ciphertexts)
+        assert scorer.score(key_to_decode(complex_key)) == pytest.approx(expected)
+
+    def test_solve_joint(self, ciphertexts):
+        reference_tm = text_transition_matrix(REFERENCE)
+        result = solve_joint(ciphertexts, reference_tm, iterations=300, seed=1, verbose=False)
+        expected = sum(calculate_plausibility(substitute_decrypt(ciphertext, result.key), reference_tm)
+                       for ciphertext in ciphertexts)
+        assert result.score == pytest.approx(expected)
+
+        tempered = solve_joint(CiphertextPool(ciphertexts), reference_tm, solver=solve_tempering, iterations=50,
+                               replicas=2, seed=1, verbose=False, init="greedy")
+        assert sorted(tempered.key) == sorted(result.key)
+
+    def test_solve_joint_needs_messages(self):
+        with pytest.raises(ValueError):
+            solve_joint([], text_transition_matrix(REFERENCE), verbose=False)
@@ -0,0 +1,106 @@
+import json
+
+import numpy as np
+import pytest
+from subcipher.cipher import substitute_decrypt, substitute_encrypt
+from subcipher.constants import ALPHABET
+from subcipher.mh_solver import solve
+from subcipher.posterior import KeyPosterior, PosteriorRecorder
+from subcipher.scoring import key_to_decode
+from subcipher.tempering import solve_tempering
+
+SIZE = len(ALPHABET)
+
+
+def naive_counts(states, start):
+    # Count the mapping of every state after the burn-in one by one
+    counts = np.zeros((SIZE, SIZE), dtype=np.int64)
+    for decode in states[start:]:
+        counts[np.arange(SIZE), decode] += 1
+    return counts
+
+
+class TestPosterior:
+    @pytest.mark.parametrize("start", [0, 37, 500])
+    def test_recorder_matches_counting_every_state(self, start):
+        rng = np.random.default_rng(0)
+        decode = rng.permutation(SIZE)
+        recorder = PosteriorRecorder(decode, start)
+        states = []
+        for i in range(300):
+            if rng.random() < 0.3:
+                a, b = rng.choice(SIZE, 2, replace=False)
+                recorder.swap(i, a, b)
+                decode[[a, b]] = decode[[b, a]]
+            elif rng.random() < 0.05:
+                new_decode = rng.permutation(SIZE)
+                recorder.replace(i, new_decode)
+                decode = new_decode
+            states.append(decode.copy())
+
+        posterior = recorder.finish(len(states))
+        assert posterior.samples == max(len(states) - start, 0)
+        np.testing.assert_array_equal(posterior.counts, naive_counts(states, start))
+
+    def test_flush_splits_the_counts(self):
+        decode = np.arange(SIZE)
+        recorder = PosteriorRecorder(decode, 10)
+        saved = recorder.flush(50)
+        resumed = PosteriorRecorder(decode, 10, saved, performed=50)
+        assert resumed.finish(80).counts.sum() == 70 * SIZE
+
+    def test_confidence_and_partial_decryption(self, complex_key):
+        decode = key_to_decode(complex_key)
+        counts = np.zeros((SIZE, SIZE), dtype=np.int64)
+        counts[np.arange(SIZE), decode] = 10
+        # The symbol encrypting E was mapped to A in 4 of the 10 samples
+        symbol = ALPHABET.index(complex_key[ALPHABET.index("E")])
+        counts[symbol, decode[symbol]] = 6
+        counts[symbol, ALPHABET.index("A")] = 4
+        posterior = KeyPosterior(counts=counts, samples=10)
+
+        confidence = posterior.letter_confidence(complex_key)
+        assert confidence["E"] == pytest.approx(0.6)
+        assert all(value == 1.0 for letter, value in confidence.items() if letter != "E")
+        assert posterior.ambiguous_letters(complex_key) == "E"
+
+        ciphertext = substitute_encrypt("THE_ENEMY", complex_key)
+        assert posterior.partial_decrypt(ciphertext, complex_key) == "TH?_?N?MY"
+        assert posterior.partial_decrypt(ciphertext, complex_key, threshold=0.5) == "THE_ENEMY"
+
+        record = json.loads(json.dumps(posterior.to_dict(complex_key)))
+        assert record["letters"]["E"] == {"symbol": complex_key[ALPHABET.index("E")], "confidence": 0.6}
+        merged = posterior.merge(posterior)
+        assert merged.samples == 20 and merged.letter_confidence(complex_key) == confidence
+
+    def test_sampling_does_not_change_the_run(self, ciphertext, reference_tm):
+        plain = solve(ciphertext, reference_tm, iterations=2000, seed=4, verbose=False)
+        sampled = solve(ciphertext, reference_tm, iterations=2000, seed=4, verbose=False, sample_after=500)
+        assert plain.posterior is None
+        assert (sampled.key, sampled.score) == (plain.key, plain.score)
+
+        posterior = sampled.posterior
+        assert posterior.samples == 1500
+        np.testing.assert_array_equal(posterior.counts.sum(axis=1), 1500)
+        np.testing.assert_array_equal(posterior.counts.sum(axis=0) > 0, True)
+
+    def test_converged_letters_are_confident(self, complex_key, reference_text, reference_tm):
+        ciphertext = substitute_encrypt(reference_text * 5, complex_key)
+        result = solve(ciphertext, reference_tm, iterations=8000, seed=1, verbose=False, schedule="constant",
+                       initial_temp=1.0, init="greedy", sample_after=4000)
+        assert substitute_decrypt(ciphertext, result.key) == reference_text * 5
+        confidence = result.posterior.letter_confidence(result.key)
+        assert min(confidence[letter] for letter in "THE_O") > 0.9
+
+    def test_sampling_stops_before_burn_in(self, ciphertext, reference_tm):
+        result = solve(ciphertext, reference_tm, iterations=100, seed=1, verbose=False, sample_after=500)
+        assert result.posterior.samples == 0
+        assert not result.posterior.counts.any()
+
+    def test_tempering_samples_coldest_replica(self, ciphertext, reference_tm):
+        plain = solve_tempering(ciphertext, reference_tm, iterations=500, replicas=4, seed=2, verbose=False)
+        sampled = solve_tempering(ciphertext, reference_tm, iterations=500, replicas=4, seed=2, verbose=False,
+                                  sample_after=100)
+        assert (sampled.key, sampled.score) == (plain.key, plain.score)
+        assert sampled.posterior.samples == 400
+        np.testing.assert_array_equal(sampled.posterior.counts.sum(axis=1), 400)
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from subcipher.analysis import text_transition_matrix
+from subcipher.constants import ALPHABET
+from subcipher.mh_solver import solve
+from subcipher.reference import (build_reference, build_reference_from_file, load_language_model, load_reference,
+                                 reference_digest)
+from subcipher.utils import normalize_text
+
+
+class TestReferenceCache:
+    @pytest.fixture
+    def reference_file(self, tmp_path):
+        file = tmp_path / "reference.txt"
+        file.write_text("Příliš žluťoučký kůň úpěl ďábelské ódy.", encoding='utf-8')
+        return file
+
+    def test_build_matches_transition_matrix(self, reference_file):
+        text = reference_file.read_text(encoding='utf-8')
+        model = build_reference(text)
+        np.testing.assert_allclose(model.matrix, text_transition_matrix(normalize_text(text)))
+        np.testing.assert_allclose(model.log_probs, np.log(model.matrix + 1e-10))
+
+    def test_cached_model_is_memory_mapped(self, reference_file, tmp_path):
+        built = load_reference(reference_file, cache_dir=tmp_path / "cache")
+        cached = load_reference(reference_file, cache_dir=tmp_path / "cache")
+        assert isinstance(cached.counts, np.memmap)
+        assert isinstance(cached.log_probs, np.memmap)
+        np.testing.assert_array_equal(cached.counts, built.counts)
+        np.testing.assert_array_equal(cached.log_probs, built.log_probs)
+
+    def test_language_model_uses_cached_log_probs(self, reference_file, tmp_path, ciphertext):
+        load_reference(reference_file, cache_dir=tmp_path / "cache")
+        model = load_language_model(reference_file, cache_dir=tmp_path / "cache")
+        assert model.n == 2 and isinstance(model.log_probs, np.memmap)
+
+        matrix = load_reference(reference_file, cache_dir=tmp_path / "cache").matrix
+        assert solve(ciphertext, model, iterations=300, seed=2, verbose=False).score == \
+            solve(ciphertext, matrix, iterations=300, seed=2, verbose=False).score
+
+    def test_rebuild_ignores_cache(self, reference_file, tmp_path):
+        load_reference(reference_file, cache_dir=tmp_path / "cache")
+        rebuilt = load_reference(reference_file, cache_dir=tmp_path / "cache", rebuild=True)
+        assert not isinstance(rebuilt.counts, np.memmap)
+
+    def test_digest_depends_on_content_and_alphabet(self, reference_file):
+        digest = reference_digest(reference_file)
+        assert reference_digest(reference_file, ALPHABET[::-1]) != digest
+        assert reference_digest(reference_file, profile="generic") != digest
+        reference_file.write_text("Jiný text", encoding='utf-8')
+        assert reference_digest(reference_file) != digest
+
+    @pytest.mark.parametrize("chunk_size", [1, 4, 1 << 20])
+    def test_streaming_build_matches_in_memory(self, reference_file, chunk_size):
+        expected = build_reference(reference_file.read_text(encoding='utf-8'))
+        streamed = build_reference_from_file(reference_file, chunk_size=chunk_size)
+        np.testing.assert_array_equal(streamed.counts, expected.counts)
+        np.testing.assert_array_equal(streamed.log_probs, expected.log_probs)
@@ -0,0 +1,66 @@
+import pytest
+from subcipher.analysis import text_transition_matrix
+from subcipher.cipher import substitute_encrypt
+from subcipher.mh_solver import solve
+from subcipher.schedules import (MIN_TEMP, SCHEDULES, AdaptiveSchedule, ConstantSchedule, ExponentialSchedule,
+                                 LinearSchedule, create_schedule)
+
+
+class TestSchedules:
+    def test_linear_matches_the_original_ramp(self):
+        schedule = LinearSchedule(2.0, 100)
+        assert schedule.temperature(0) == 2.0
+        assert schedule.temperature(50) == pytest.approx(1.0)
+        assert schedule.temperature(100) == MIN_TEMP
+
+    def test_exponential_reaches_final_temperature(self):
+        schedule = ExponentialSchedule(1.0, 100, final_temp=0.01)
+        assert schedule.temperature(0) == 1.0
+        assert schedule.temperature(50) == pytest.approx(0.1)
+        assert schedule.temperature(100) == pytest.approx(0.01)
+
+    def test_exponential_needs_positive_temperatures(self):
+        with pytest.raises(ValueError):
+            ExponentialSchedule(0.0, 100)
+
+    def test_adaptive_follows_acceptance_rate(self):
+        schedule = AdaptiveSchedule(1.0, 1000, target_rate=0.5, window=10, factor=2.0)
+        for _ in range(10):
+            schedule.temperature(0)
+            schedule.observe(False)
+        assert schedule.temperature(10) == 2.0
+        for _ in range(10):
+            schedule.observe(True)
+        assert schedule.temperature(20) == 1.0
+
+    @pytest.mark.parametrize("kwargs", [{"target_rate": 0.0}, {"target_rate": 1.5}, {"factor": 1.0}])
+    def test_adaptive_validates_parameters(self, kwargs):
+        with pytest.raises(ValueError):
+            AdaptiveSchedule(1.0, 100, **kwargs)
+
+    def test_constant_keeps_temperature(self):
+        schedule = ConstantSchedule(0.7, 100)
+        assert [schedule.temperature(i) for i in (0, 50, 99)] == [0.7, 0.7, 0.7]
+        assert ConstantSchedule(0.0, 100).temperature(0) == MIN_TEMP
+
+    def test_create_schedule(self):
+        assert isinstance(create_schedule("exponential", 1.0, 10), ExponentialSchedule)
+        schedule = LinearSchedule(1.0, 10)
+        assert create_schedule(schedule, 5.0, 20) is schedule
+        with pytest.raises(ValueError):
+            create_schedule("cubic", 1.0, 10)
+
+    @pytest.mark.parametrize("name", list(SCHEDULES))
+    def test_solver_accepts_schedule(self, complex_key, name):
+        reference_tm = text_transition_matrix("THE_QUICK_BROWN_FOX_JUMPS_OVER_THE_LAZY_DOG")
+        ciphertext = substitute_encrypt("THE_LAZY_DOG", complex_key)
+        result = solve(ciphertext, reference_tm, iterations=300, seed=1, verbose=False, schedule=name)
+        assert result.iterations == 300
+
+    def test_default_schedule_is_linear(self, complex_key):
+        reference_tm = text_transition_matrix("THE_QUICK_BROWN_FOX_JUMPS_OVER_THE_LAZY_DOG")
+        ciphertext = substitute_encrypt("THE_LAZY_DOG", complex_key)
+        default = solve(ciphertext, reference_tm, iterations=300, seed=1, verbose=False)
+        linear = solve(ciphertext, reference_tm, iterations=300, seed=1, verbose=False,
+                       schedule=LinearSchedule(1.0, 300))
+        assert (default.key, default.score) == (linear.key, linear.score)
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from subcipher.analysis import text_transition_matrix
+from subcipher.cipher import substitute_encrypt
+from subcipher.ngram import NgramModel, build_ngram_model
+from subcipher.selection import ModelSelector, bigram_probabilities
+
+ENGLISH = "THE_QUICK_BROWN_FOX_JUMPS_OVER_THE_LAZY_DOG_AND_THE_DOG_SLEEPS_IN_THE_SUN_WHILE_THE_FOX_RUNS_AWAY"
+CZECH = "PRILIS_ZLUTOUCKY_KUN_UPEL_DABELSKE_ODY_A_KONE_SE_PASLI_NA_LOUCE_KDE_ROSTLA_ZELENA_TRAVA_A_KVETINY"
+
+
+class TestModelSelector:
+    @pytest.fixture
+    def selector(self):
+        return ModelSelector({"english": text_transition_matrix(ENGLISH), "czech": text_transition_matrix(CZECH)})
+
+    @pytest.mark.parametrize("name, text", [("english", ENGLISH), ("czech", CZECH)])
+    def test_rank_prefers_matching_model(self, selector, complex_key, name, text):
+        ranking = selector.rank(substitute_encrypt(text, complex_key))
+        assert [score.name for score in ranking][0] == name
+        assert ranking[0].bigram >= ranking[1].bigram
+        assert selector.select(substitute_encrypt(text, complex_key))[0] == name
+
+    def test_log_tables_are_cached(self, selector):
+        assert selector.log_table("czech") is selector.log_table("czech")
+
+    def test_single_model_is_selected_without_ranking(self):
+        model = text_transition_matrix(ENGLISH)
+        assert ModelSelector({"only": model}).select("ABC!") == ("only", model)
+
+    def test_mixture_weights_favour_matching_model(self, selector, complex_key):
+        weights = selector.mixture_weights(substitute_encrypt(ENGLISH + "_" + ENGLISH, complex_key))
+        assert sum(weights.values()) == pytest.approx(1.0)
+        assert weights["english"] > weights["czech"]
+
+    def test_mixture_of_matrices(self, selector):
+        mixed = selector.mixture({"english": 3.0, "czech": 1.0})
+        expected = 0.75 * text_transition_matrix(ENGLISH) + 0.25 * text_transition_matrix(CZECH)
+        np.testing.assert_allclose(mixed, expected)
+        with pytest.raises(ValueError):
+            selector.mixture({"english": 0.0})
+
+    def test_mixture_of_ngram_models(self):
+        english, czech = build_ngram_model(ENGLISH, 3), build_ngram_model(CZECH, 3)
+        mixed = ModelSelector({"english": english, "czech": czech}).mixture({"english": 0.5, "czech": 0.5})
+        assert isinstance(mixed, NgramModel) and mixed.n == 3
+        np.testing.assert_allclose(np.exp(mixed.log_probs).sum(), 1.0, rtol=1e-5)
+        np.testing.assert_array_equal(mixed.counts, english.counts + czech.counts)
+
+    def test_bigram_probabilities_of_higher_orders(self):
+        model = build_ngram_model(ENGLISH, 3)
+        probs = bigram_probabilities(model)
+        assert probs.shape == (27, 27)
+        np.testing.assert_allclose(probs, np.exp(model.log_probs).sum(axis=2) / np.exp(model.log_probs).sum())
@@ -0,0 +1,116 @@
+import http.client
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+from subcipher.analysis import text_transition_matrix
+from subcipher.cipher import substitute_decrypt, substitute_encrypt
+from subcipher.server import SolverService, create_server
+
+REFERENCE = "THE_QUICK_BROWN_FOX_JUMPS_OVER_THE_LAZY_DOG_AND_THE_DOG_SLEEPS"
+
+
+@pytest.fixture(scope="module")
+def service():
+    service = SolverService({"default": text_transition_matrix(REFERENCE)}, workers=1)
+    yield service
+    service.shutdown()
+
+
+@pytest.fixture(scope="module")
+def base_url(service):
+    server = create_server(service, port=0, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _request(url, body=None):
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data), timeout=30) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read())
+
+
+class TestSolverService:
+    def test_submit_and_wait(self, service, complex_key):
+        ciphertext = substitute_encrypt("THE_DOG_SLEEPS", complex_key)
+        job = service.submit({"ciphertext": ciphertext, "iterations": 200, "seed": 1})
+        job = service.get(job.id, wait=30)
+        record = job.to_dict()
+        assert record["status"] == "done"
+        assert record["result"]["iterations"] == 200
+        assert record["result"]["plaintext"] == substitute_decrypt(ciphertext, record["result"]["key"])
+        assert record["result"]["posterior"] is None
+
+    def test_posterior_is_serialized(self, service, complex_key):
+        ciphertext = substitute_encrypt("THE_DOG_SLEEPS", complex_key)
+        job = service.submit({"ciphertext": ciphertext, "iterations": 200, "seed": 1, "sample_after": 50})
+        result = json.loads(json.dumps(service.get(job.id, wait=30).to_dict()))["result"]
+        assert result["posterior"]["samples"] == 150
+        assert set(result["posterior"]["letters"]["E"]) == {"symbol", "confidence"}
+
+    @pytest.mark.parametrize("request_body", [
+        {},
+        {"ciphertext": "ABC!"},
+        {"ciphertext": "ABC", "model": "missing"},
+        {"ciphertext": "ABC", "model": ["x"]},
+        {"ciphertext": "ABC", "iterations": "many"},
+        {"ciphertext": "ABC", "iterations": True},
+        {"ciphertext": "ABC", "schedule": "cubic"},
+        {"ciphertext": "ABC", "unknown": 1},
+    ])
+    def test_invalid_requests(self, service, request_body):
+        with pytest.raises(ValueError):
+            service.submit(request_body)
+
+    def test_unknown_job(self, service):
+        assert service.get("missing") is None
+
+    def test_needs_models(self):
+        with pytest.raises(ValueError):
+            SolverService({})
+
+
+class TestServer:
+    def test_models(self, base_url):
+        assert _request(f"{base_url}/models") == (200, {"models": ["default"]})
+
+    def test_solve_over_http(self, base_url, complex_key):
+        ciphertext = substitute_encrypt("THE_LAZY_DOG", complex_key)
+        status, body = _request(f"{base_url}/solve", {"ciphertext": ciphertext, "iterations": 100, "replicas": 2,
+                                                      "seed": 3})
+        assert status == 202
+
+        status, job = _request(f"{base_url}/jobs/{body['id']}?wait=30")
+        assert status == 200
+        assert job["status"] == "done"
+        assert sorted(job["result"]["key"]) == sorted(complex_key)
+
+    def test_errors(self, base_url):
+        assert _request(f"{base_url}/solve", {"ciphertext": 1})[0] == 400
+        assert _request(f"{base_url}/solve", [1, 2])[0] == 400
+        assert _request(f"{base_url}/solve", {"ciphertext": "ABC", "model": ["x"]})[0] == 400
+        assert _request(f"{base_url}/jobs/missing")[0] == 404
+        assert _request(f"{base_url}/jobs/missing?wait=soon")[0] == 400
+        assert _request(f"{base_url}/unknown")[0] == 404
+
+    @pytest.mark.parametrize("content_length, status", [(None, 411), ("many", 400), ("-1", 400), ("1e3", 400)])
+    def test_invalid_content_length(self, base_url, content_length, status):
+        connection = http.client.HTTPConnection(base_url[len("http://"):], timeout=30)
+        try:
+            connection.putrequest("POST", "/solve")
+            if content_length is not None:
+                connection.putheader("Content-Length", content_length)
+            connection.endheaders()
+            response = connection.getresponse()
+            assert response.status == status
+            assert "Content-Length" in json.loads(response.read())["error"]
+        finally:
+            connection.close()
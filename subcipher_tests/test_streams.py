@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from subcipher.mh_solver import solve
+from subcipher.streams import create_rng, draw_proposals, draw_thresholds
+from subcipher.tempering import solve_tempering
+
+
+class TestStreams:
+    def test_proposals_are_distinct_uniform_pairs(self):
+        firsts, seconds, thresholds = draw_proposals(create_rng(1), 100000)
+        firsts, seconds = np.array(firsts), np.array(seconds)
+        assert np.all(firsts != seconds)
+        assert firsts.min() == seconds.min() == 0 and firsts.max() == seconds.max() == 26
+
+        pairs = np.bincount(firsts * 27 + seconds, minlength=27 * 27).reshape(27, 27)
+        off_diagonal = pairs[~np.eye(27, dtype=bool)]
+        assert off_diagonal.min() > 0.7 * off_diagonal.mean()
+
+    def test_thresholds_are_logs_of_uniform_numbers(self):
+        thresholds = np.array(draw_thresholds(create_rng(2), 100000))
+        assert np.all(np.isfinite(thresholds)) and np.all(thresholds <= 0)
+        # Acceptance probability of a proposal worsening the score by 1 at temperature 1
+        assert np.mean(-1 > thresholds) == pytest.approx(np.exp(-1), abs=0.01)
+
+    def test_same_seed_reproduces_run(self, ciphertext, reference_tm):
+        first = solve(ciphertext, reference_tm, iterations=5000, seed=11, verbose=False)
+        second = solve(ciphertext, reference_tm, iterations=5000, seed=11, verbose=False)
+        assert (first.key, first.score, first.seed) == (second.key, second.score, 11)
+
+    def test_generator_is_used_as_stream(self, ciphertext, reference_tm):
+        rng = create_rng(5)
+        first = solve(ciphertext, reference_tm, iterations=300, seed=rng, verbose=False)
+        second = solve(ciphertext, reference_tm, iterations=300, seed=rng, verbose=False)
+        assert first.seed is None
+        assert solve(ciphertext, reference_tm, iterations=300, seed=create_rng(5), verbose=False).key == first.key
+        assert second.key != first.key
+
+    def test_seeded_tempering_is_reproducible(self, ciphertext, reference_tm):
+        first = solve_tempering(ciphertext, reference_tm, iterations=300, replicas=3, seed=4, verbose=False)
+        second = solve_tempering(ciphertext, reference_tm, iterations=300, replicas=3, seed=4, verbose=False)
+        assert (first.key, first.score) == (second.key, second.score)
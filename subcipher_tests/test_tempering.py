@@ -0,0 +1,53 @@
+import pytest
+from subcipher.analysis import calculate_plausibility
+from subcipher.cipher import substitute_decrypt
+from subcipher.constants import ALPHABET
+from subcipher.mh_solver import StopReason
+from subcipher.parallel import solve_parallel
+from subcipher.tempering import solve_tempering, temperature_ladder
+
+
+class TestTempering:
+    def test_temperature_ladder(self):
+        assert temperature_ladder(3, 0.5, 2.0) == pytest.approx([0.5, 1.0, 2.0])
+        assert temperature_ladder(1, 0.5, 2.0) == [0.5]
+
+    @pytest.mark.parametrize("replicas, min_temp, max_temp", [(0, 0.5, 2.0), (4, 0.0, 2.0), (4, 3.0, 2.0)])
+    def test_temperature_ladder_validation(self, replicas, min_temp, max_temp):
+        with pytest.raises(ValueError):
+            temperature_ladder(replicas, min_temp, max_temp)
+
+    def test_result_score_matches_key(self, ciphertext, reference_tm):
+        result = solve_tempering(ciphertext, reference_tm, iterations=300, replicas=4, seed=1, verbose=False)
+        assert sorted(result.key) == sorted(ALPHABET)
+        assert result.iterations == 300
+        assert result.stop_reason == StopReason.ITERATIONS
+        assert result.score == pytest.approx(calculate_plausibility(substitute_decrypt(ciphertext, result.key),
+                                                                    reference_tm))
+
+    def test_seed_reproduces_run(self, ciphertext, reference_tm):
+        first = solve_tempering(ciphertext, reference_tm, iterations=200, seed=9, verbose=False)
+        second = solve_tempering(ciphertext, reference_tm, iterations=200, seed=9, verbose=False)
+        assert (first.key, first.score) == (second.key, second.score)
+
+    def test_callback_reports_improvements(self, ciphertext, reference_tm):
+        scores = []
+        result = solve_tempering(ciphertext, reference_tm, iterations=200, seed=2, verbose=False,
+                                 callback=lambda iteration, key, score: scores.append(score))
+        assert scores == sorted(scores)
+        assert scores[-1] == result.score
+
+    def test_early_stopping(self, ciphertext, reference_tm):
+        result = solve_tempering(ciphertext, reference_tm, iterations=10000, seed=3, verbose=False, patience=20)
+        assert result.stop_reason == StopReason.PATIENCE
+        assert result.iterations < 10000
+
+    def test_invalid_exchange_interval(self, ciphertext, reference_tm):
+        with pytest.raises(ValueError):
+            solve_tempering(ciphertext, reference_tm, exchange_interval=0, verbose=False)
+
+    def test_runs_as_parallel_chains(self, ciphertext, reference_tm):
+        key, score, chains = solve_parallel(ciphertext, reference_tm, restarts=2, workers=1, seed=4,
+                                            solver=solve_tempering, iterations=100, replicas=3)
+        assert len(chains) == 2
+        assert score == max(chain.score for chain in chains)
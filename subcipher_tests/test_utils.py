@@ -1,5 +1,5 @@
 import pytest
-from subcipher.utils import normalize_text, load_textfile, save_textfile
+from subcipher.utils import NORMALIZATION_PROFILES, normalize_chunks, normalize_text, load_textfile, read_chunks, save_textfile
 
 
 class TestTextProcessing:
@@ -35,4 +35,20 @@ class TestFileOperations:
 
     def test_file_not_found(self):
         with pytest.raises(FileNotFoundError):
-            load_textfile("nonexistent_file.txt")
\ No newline at end of file
+            load_textfile("nonexistent_file.txt")
+
+
+class TestStreamingNormalization:
+    TEXT = "Příliš  žluťoučký kůň --- úpěl\nďábelské ódy!!\r\nStraße ½ ŉ Äpfel nai\u0308ve"
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1000])
+    @pytest.mark.parametrize("profile", list(NORMALIZATION_PROFILES))
+    def test_matches_normalize_text(self, chunk_size, profile):
+        chunks = [self.TEXT[i:i + chunk_size] for i in range(0, len(self.TEXT), chunk_size)]
+        assert ''.join(normalize_chunks(chunks, profile)) == normalize_text(self.TEXT, profile)
+
+    def test_read_chunks(self, tmp_path):
+        test_file = tmp_path / "test.txt"
+        save_textfile(self.TEXT, str(test_file))
+        assert list(read_chunks(test_file, 5))[0] == self.TEXT[:5]
+        assert ''.join(read_chunks(test_file, 5)) == load_textfile(str(test_file))